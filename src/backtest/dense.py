@@ -0,0 +1,357 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src import tracing
+from src.backtest.risk import TRADING_DAYS, align_to_panel, fill_volatility, rolling_volatility
+from src.backtest.rules import CompiledRule, RuleBatch
+from src.backtest.sim import SimResult
+from src.backtest.sweep import summarize_daily_returns
+from src.storage.dtypes import KEY_COLUMNS
+
+
+@dataclass(frozen=True)
+class DensePanel:
+    """
+    Merged table pivoted once into dense dates x tickers arrays.
+    Cells without a merged row are NaN.
+    """
+
+    dates: np.ndarray  # (D,) str, ascending
+    tickers: np.ndarray  # (T,) str, ascending
+    features: dict[str, np.ndarray]  # name -> (D, T) float
+    ret: np.ndarray  # (D, T) forward return earned by a position held on that date
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.ret.shape
+
+
+@dataclass(frozen=True)
+class DenseRun:
+    weights: np.ndarray  # (D, T) portfolio weights actually held
+    portfolio_ret: np.ndarray  # (D,) net of turnover costs
+    turnover: np.ndarray  # (D,) sum of |w_t - w_{t-1}|
+    n_positions: np.ndarray  # (D,)
+    n_trades: int  # position entries and flips
+    active: np.ndarray  # (D,) bool: held positions or paid exit costs that day
+
+
+def pivot_dense(merged_df: pd.DataFrame, cols: list[str]) -> tuple[np.ndarray, np.ndarray, dict[str, np.ndarray]]:
+    """
+    Scatter long-format (ticker, date) rows into (D, T) float arrays, one per column.
+    Returns (dates, tickers, arrays); missing cells are NaN.
+    """
+    d_codes, dates = pd.factorize(merged_df["date"].astype(str), sort=True)
+    t_codes, tickers = pd.factorize(merged_df["ticker"].astype(str).str.lower(), sort=True)
+    shape = (len(dates), len(tickers))
+
+    arrays = {}
+    for col in cols:
+        arr = np.full(shape, np.nan)
+        arr[d_codes, t_codes] = pd.to_numeric(merged_df[col], errors="coerce").to_numpy(dtype=float)
+        arrays[col] = arr
+    return np.asarray(dates, dtype=object), np.asarray(tickers, dtype=object), arrays
+
+
+def build_dense_panel(merged_df: pd.DataFrame, ret_col: str = "fwd_ret_1d") -> DensePanel:
+    feature_cols = [
+        c
+        for c in merged_df.columns
+        if c not in KEY_COLUMNS
+        and not c.startswith("fwd_ret")
+        and pd.api.types.is_numeric_dtype(merged_df[c])
+    ]
+    dates, tickers, arrays = pivot_dense(merged_df, [*feature_cols, ret_col])
+    ret = arrays.pop(ret_col)
+    return DensePanel(dates=dates, tickers=tickers, features=arrays, ret=ret)
+
+
+def dense_signals(
+    panel: DensePanel,
+    sent_thresh: float = 0.05,
+    vol_thresh: float = 1.0,
+    min_docs: int = 10,
+    rule: str | CompiledRule | None = None,
+) -> np.ndarray:
+    """Same rule as `build_signals` (or a compiled `rule`), as an int8 (D, T) matrix."""
+    if rule is not None:
+        batch = RuleBatch([rule])
+        env = {c: panel.features[c].ravel() for c in batch.columns}
+        return batch.evaluate(env, n_rows=panel.ret.size)[0].reshape(panel.ret.shape)
+
+    sent = panel.features["avg_compound"]
+    gate = (panel.features["volume_z"] >= vol_thresh) & (panel.features["docs"] >= min_docs)
+    sig = np.where(gate & (sent >= sent_thresh), 1, 0).astype(np.int8)
+    sig[gate & (sent <= -sent_thresh)] = -1
+    return sig
+
+
+def hold_positions(exec_signal: np.ndarray, hold_days: int) -> np.ndarray:
+    """
+    Carry each executed signal forward for `hold_days` dates (vectorized, no
+    per-day loop). A new non-zero signal replaces the held one and restarts
+    its holding window.
+    """
+    n_dates = exec_signal.shape[0]
+    if hold_days <= 1 or n_dates == 0:
+        return exec_signal.copy()
+
+    rows = np.arange(n_dates, dtype=np.int32)[:, None]
+    last = np.where(exec_signal != 0, rows, -1)
+    last = np.maximum.accumulate(last, axis=0)
+    held = (last >= 0) & (rows - last < hold_days)
+    src = np.take_along_axis(exec_signal, np.maximum(last, 0), axis=0)
+    return np.where(held, src, 0).astype(exec_signal.dtype)
+
+
+SIZING_MODES = ("equal", "inverse_vol", "vol_target")
+
+
+def panel_volatility(
+    panel: DensePanel,
+    window: int = 20,
+    min_obs: int = 10,
+    price_returns: tuple[np.ndarray, list[str], np.ndarray] | None = None,
+) -> np.ndarray:
+    """
+    (D, T) daily volatility known at each panel date's close.
+
+    With `price_returns` (from `load_returns_matrix`) vol is computed on the
+    full price calendar and aligned to the panel; otherwise it falls back to
+    the panel's own returns, lagged one date so only realized returns are used.
+    """
+    if price_returns is not None:
+        dates, tickers, rets = price_returns
+        vol = rolling_volatility(rets, window=window, min_obs=min(min_obs, window))
+        return align_to_panel(vol, dates, tickers, panel.dates, panel.tickers)
+
+    realized = np.full_like(panel.ret, np.nan)
+    realized[1:] = panel.ret[:-1]
+    return rolling_volatility(realized, window=window, min_obs=min(min_obs, window))
+
+
+def price_forward_returns(
+    panel: DensePanel, price_returns: tuple[np.ndarray, list[str], np.ndarray]
+) -> np.ndarray:
+    """
+    (D, T) next-session close-to-close return from the price calendar, for
+    panel dates that are trading days of the ticker; NaN elsewhere. Fills the
+    returns of held positions on dates the merged table has no row for.
+    """
+    dates, tickers, rets = price_returns
+    fwd = np.full_like(rets, np.nan)
+    fwd[:-1] = rets[1:]
+    out = align_to_panel(fwd, dates, tickers, panel.dates, panel.tickers)
+    trading_day = np.isin(np.asarray(panel.dates).astype("datetime64[D]"), np.asarray(dates).astype("datetime64[D]"))
+    out[~trading_day] = np.nan
+    return out
+
+
+def size_positions(
+    pos: np.ndarray,
+    sizing: str = "equal",
+    vol: np.ndarray | None = None,
+    max_gross: float = 1.0,
+    target_vol: float = 0.10,
+    max_weight: float | None = None,
+    periods_per_year: float = TRADING_DAYS,
+) -> np.ndarray:
+    """
+    Turn held directions (D, T) in {-1, 0, 1} into weights.
+
+      equal        1/n of `max_gross` per position
+      inverse_vol  weight ~ 1/vol, scaled to `max_gross` total exposure
+      vol_target   weight ~ 1/vol, scaled so the book's annualized vol (names
+                   treated as uncorrelated) is `target_vol`; gross capped at `max_gross`
+
+    `max_weight` caps each |weight|; the excess stays in cash.
+    """
+    if sizing not in SIZING_MODES:
+        raise ValueError(f"Unknown sizing mode: {sizing} (expected one of {SIZING_MODES})")
+    n_pos = np.count_nonzero(pos, axis=1)
+
+    if sizing == "equal":
+        weights = pos * (max_gross / np.maximum(n_pos, 1))[:, None]
+    else:
+        if vol is None:
+            raise ValueError(f"Sizing mode {sizing} needs a volatility matrix.")
+        raw = pos / fill_volatility(vol)
+        if sizing == "inverse_vol":
+            scale = max_gross / np.maximum(np.abs(raw).sum(axis=1), 1e-12)
+        else:
+            scale = (target_vol / np.sqrt(periods_per_year)) / np.sqrt(np.maximum(n_pos, 1))
+            gross = np.abs(raw).sum(axis=1) * scale
+            scale = np.where(gross > max_gross, scale * max_gross / np.maximum(gross, 1e-12), scale)
+        weights = raw * scale[:, None]
+
+    if max_weight is not None:
+        weights = np.clip(weights, -max_weight, max_weight)
+    return weights
+
+
+def run_dense(
+    panel: DensePanel,
+    signals: np.ndarray,
+    hold_days: int = 1,
+    slippage_bps: float = 2.0,
+    max_gross: float = 1.0,
+    max_net: float | None = None,
+    sizing: str = "equal",
+    vol: np.ndarray | None = None,
+    target_vol: float = 0.10,
+    max_weight: float | None = None,
+    periods_per_year: float = TRADING_DAYS,
+    held_ret: np.ndarray | None = None,
+) -> DenseRun:
+    """
+    Vectorized portfolio over a (D, T) signal matrix.
+
+      1) signal on date t executes on the next panel date (1-day delay);
+         entries need a tradable (finite-return) cell
+      2) positions are held `hold_days` dates, then exit unless renewed;
+         on held dates without a merged row the return comes from `held_ret`
+         (see `price_forward_returns`). A held name with no return that date
+         sits out: it is not sized and not traded, and resumes afterwards
+      3) held positions are sized by `size_positions` (equal weight to
+         `max_gross` by default); if |net| exceeds `max_net` the whole book
+         is scaled down
+      4) costs are `slippage_bps` per unit of turnover sum(|w_t - w_{t-1}|)
+
+    With hold_days=1, equal sizing, zero slippage and a panel where every
+    ticker has a row on every date, returns match `simulate_equal_weight_portfolio`.
+    """
+    n_dates, _ = signals.shape
+    tradable = np.isfinite(panel.ret)
+    ret = panel.ret if held_ret is None else np.where(tradable, panel.ret, held_ret)
+    earns = np.isfinite(ret)
+
+    exec_sig = np.zeros_like(signals, dtype=np.int8)
+    if n_dates > 1:
+        exec_sig[1:] = signals[:-1]
+    exec_sig[~tradable] = 0
+
+    held = hold_positions(exec_sig, hold_days).astype(float)
+    idle = (held != 0) & ~earns
+    pos = np.where(idle, 0.0, held)
+    n_pos = np.count_nonzero(pos, axis=1)
+
+    weights = size_positions(
+        pos,
+        sizing=sizing,
+        vol=vol,
+        max_gross=max_gross,
+        target_vol=target_vol,
+        max_weight=max_weight,
+        periods_per_year=periods_per_year,
+    )
+    if max_net is not None:
+        net = np.abs(weights.sum(axis=1))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            scale = np.where(net > max_net, max_net / net, 1.0)
+        weights *= scale[:, None]
+
+    # Idle cells keep their last traded weight for turnover, so sitting out costs nothing.
+    rows = np.arange(n_dates)[:, None]
+    last = np.maximum.accumulate(np.where(idle, -1, rows), axis=0)
+    traded_w = np.where(last >= 0, np.take_along_axis(weights, np.maximum(last, 0), axis=0), 0.0)
+    prev = np.zeros_like(traded_w)
+    prev[1:] = traded_w[:-1]
+    turnover = np.abs(traded_w - prev).sum(axis=1)
+
+    gross_pnl = np.where(earns, weights * np.nan_to_num(ret), 0.0).sum(axis=1)
+    cost = turnover * (slippage_bps / 10000.0)
+    port = gross_pnl - cost
+
+    prev_pos = np.zeros_like(held)
+    prev_pos[1:] = held[:-1]
+    n_trades = int(np.count_nonzero((held != prev_pos) & (held != 0)))
+
+    return DenseRun(
+        weights=weights,
+        portfolio_ret=port,
+        turnover=turnover,
+        n_positions=n_pos,
+        n_trades=n_trades,
+        active=(n_pos > 0) | (cost > 0),
+    )
+
+
+@tracing.traced(cat="simulate")
+def simulate_dense_portfolio(
+    merged_df: pd.DataFrame,
+    out_dir: Path,
+    sent_thresh: float = 0.05,
+    vol_thresh: float = 1.0,
+    min_docs: int = 10,
+    slippage_bps: float = 2.0,
+    hold_days: int = 1,
+    max_gross: float = 1.0,
+    max_net: float | None = None,
+    rule: str | CompiledRule | None = None,
+    sizing: str = "equal",
+    target_vol: float = 0.10,
+    max_weight: float | None = None,
+    vol_window: int = 20,
+    price_returns: tuple[np.ndarray, list[str], np.ndarray] | None = None,
+    ret_col: str = "fwd_ret_1d",
+    periods_per_year: float = 252,
+) -> SimResult:
+    """
+    Dense-matrix counterpart of `simulate_equal_weight_portfolio` with multi-day
+    holding, exposure caps, volatility-based sizing and turnover-based trades/costs.
+    `price_returns` (from `load_returns_matrix`) feeds vol sizing and, with
+    hold_days > 1, the returns of held positions on dates without news.
+
+    Writes:
+      - out_dir/portfolio_daily.csv (active dates only, same columns + turnover)
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out_path = out_dir / "portfolio_daily.csv"
+
+    panel = build_dense_panel(merged_df, ret_col=ret_col)
+    signals = dense_signals(panel, sent_thresh=sent_thresh, vol_thresh=vol_thresh, min_docs=min_docs, rule=rule)
+    run = run_dense(
+        panel,
+        signals,
+        hold_days=hold_days,
+        slippage_bps=slippage_bps,
+        max_gross=max_gross,
+        max_net=max_net,
+        sizing=sizing,
+        vol=panel_volatility(panel, window=vol_window, price_returns=price_returns) if sizing != "equal" else None,
+        target_vol=target_vol,
+        max_weight=max_weight,
+        periods_per_year=periods_per_year,
+        held_ret=price_forward_returns(panel, price_returns) if price_returns is not None and hold_days > 1 else None,
+    )
+
+    port = pd.DataFrame(
+        {
+            "date": panel.dates,
+            "portfolio_ret": run.portfolio_ret,
+            "n_positions": run.n_positions,
+            "turnover": run.turnover,
+        }
+    )[run.active].reset_index(drop=True)
+    if port.empty:
+        pd.DataFrame(columns=["date", "portfolio_ret", "n_positions", "turnover"]).to_csv(out_path, index=False)
+        return SimResult(int(np.count_nonzero(signals)), 0, 0.0, 0.0, out_path)
+
+    port["equity"] = (1.0 + port["portfolio_ret"]).cumprod()
+    port.to_csv(out_path, index=False)
+
+    stats = summarize_daily_returns(
+        run.portfolio_ret[None, :], run.active[None, :].astype(int), periods_per_year=periods_per_year
+    )
+    return SimResult(
+        n_signal_days=int(np.count_nonzero(signals)),
+        n_trades=run.n_trades,
+        sharpe_annual=float(stats["sharpe_ann"][0]),
+        max_drawdown=float(stats["max_drawdown"][0]),
+        out_portfolio_csv=out_path,
+    )
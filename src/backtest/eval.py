@@ -4,10 +4,20 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import List
 
+import numpy as np
 import pandas as pd
 
-from src.backtest.returns import compute_forward_returns, load_price_cache
+from src import tracing
+from src.backtest.returns import (
+    compute_bar_forward_returns,
+    compute_forward_returns,
+    load_intraday_price_cache,
+    load_price_cache,
+)
 from src.backtest.stats import bootstrap_mean_ci, permutation_pvalue_ic, spearman_ic
+from src.features.sessions import label_bucket_ids
+from src.storage.dtypes import apply_dtype_policy
+from src.storage.frame_store import read_table
 
 
 @dataclass(frozen=True)
@@ -31,21 +41,38 @@ def _spearman(x: pd.Series, y: pd.Series) -> float:
     return float(df["x"].corr(df["y"], method="spearman"))
 
 
+def _lookup_join(sub: pd.DataFrame, keys: np.ndarray, price_keys: np.ndarray, fwd: pd.DataFrame) -> pd.DataFrame:
+    """Left join as an integer lookup: feature key -> row of the (sorted) price keys."""
+    pos = np.searchsorted(price_keys, keys)
+    hit = pos < len(price_keys)
+    hit[hit] = price_keys[pos[hit]] == keys[hit]
+    for col in fwd.columns:
+        vals = np.full(len(sub), np.nan)
+        vals[hit] = fwd[col].to_numpy(dtype=float)[pos[hit]]
+        sub[col] = vals
+    return sub
+
+
+@tracing.traced(cat="eval")
 def build_eval_table(
     tickers: List[str],
     features_path: Path,
     prices_cache_dir: Path,
+    horizons: tuple[int, ...] = (1, 3),
+    bucket_minutes: int | None = None,
 ) -> pd.DataFrame:
     """
-    Load daily_features.csv and merge with forward returns for each ticker-day.
+    Load the daily features table (.frame or CSV) and merge with forward returns for each ticker-day.
+    `horizons` selects the fwd_ret_{h}d columns (1 and 3 are used by eval/sim).
+
+    With `bucket_minutes`, features are N-minute bars and `prices_cache_dir`
+    holds intraday prices; the returns are fwd_ret_{h}b (h bars ahead).
     """
-    feats = pd.read_csv(features_path)
+    feats = read_table(features_path)
     if feats.empty:
         raise ValueError("daily_features.csv is empty. Run Day 4 again.")
 
-    feats = feats.copy()
-    feats["ticker"] = feats["ticker"].astype(str).str.lower()
-    feats["date"] = feats["date"].astype(str)
+    feats = apply_dtype_policy(feats)
 
     merged_all = []
     for t in tickers:
@@ -54,39 +81,52 @@ def build_eval_table(
         if sub.empty:
             continue
 
-        px = load_price_cache(ticker=tl, cache_dir=prices_cache_dir)
-        fwd = compute_forward_returns(px)
-        fwd["ticker"] = tl
-
-        m = sub.merge(fwd, on=["ticker", "date"], how="left")
-        merged_all.append(m)
+        with tracing.span("merge_ticker", cat="eval", args={"ticker": tl}):
+            if bucket_minutes:
+                try:
+                    px = load_intraday_price_cache(ticker=tl, cache_dir=prices_cache_dir)
+                except FileNotFoundError:
+                    continue
+                fwd = compute_bar_forward_returns(px, bucket_minutes=bucket_minutes, horizons=horizons)
+                keys = label_bucket_ids(sub["date"], bucket_minutes)
+                merged_all.append(_lookup_join(sub, keys, fwd["bucket"].to_numpy(), fwd.drop(columns="bucket")))
+                continue
+
+            px = load_price_cache(ticker=tl, cache_dir=prices_cache_dir)
+            fwd = compute_forward_returns(px, horizons=horizons)
+            price_days = px["Date"].to_numpy().astype("datetime64[D]").astype(np.int64)
+            feat_days = sub["day"].to_numpy().astype(np.int64)
+            merged_all.append(_lookup_join(sub, feat_days, price_days, fwd.drop(columns="date")))
 
     if not merged_all:
         return pd.DataFrame()
 
-    out = pd.concat(merged_all, ignore_index=True)
-    return out
+    return pd.concat(merged_all, ignore_index=True)
 
 
-def run_signal_eval(eval_df: pd.DataFrame) -> EvalResult:
+@tracing.traced(cat="eval")
+def run_signal_eval(eval_df: pd.DataFrame, ret_cols: tuple[str, str] = ("fwd_ret_1d", "fwd_ret_3d")) -> EvalResult:
     """
     Compute:
     - Spearman IC between avg_compound and fwd_ret_1d
     - Simple event study on "news burst" days (volume_z >= 1.0)
+
+    `ret_cols` swaps in other (short, long) horizons, e.g. intraday fwd_ret_1b / fwd_ret_3b.
     """
+    ret_short, ret_long = ret_cols
     if eval_df.empty:
         return EvalResult(
             merged_rows=0, ic_spearman_1d=0.0, events_n=0, event_mean_1d=0.0, event_mean_3d=0.0
         )
 
-    ic = spearman_ic(eval_df["avg_compound"], eval_df["fwd_ret_1d"])
-    p_ic = permutation_pvalue_ic(eval_df["avg_compound"], eval_df["fwd_ret_1d"], n_perm=1000)
+    ic = spearman_ic(eval_df["avg_compound"], eval_df[ret_short])
+    p_ic = permutation_pvalue_ic(eval_df["avg_compound"], eval_df[ret_short], n_perm=1000)
 
     events = eval_df[(eval_df["volume_z"] >= 1.0) & (eval_df["docs"] >= 10)].copy()
     events_n = int(len(events))
 
-    m1, lo1, hi1 = bootstrap_mean_ci(events["fwd_ret_1d"]) if events_n else (0.0, 0.0, 0.0)
-    m3, lo3, hi3 = bootstrap_mean_ci(events["fwd_ret_3d"]) if events_n else (0.0, 0.0, 0.0)
+    m1, lo1, hi1 = bootstrap_mean_ci(events[ret_short]) if events_n else (0.0, 0.0, 0.0)
+    m3, lo3, hi3 = bootstrap_mean_ci(events[ret_long]) if events_n else (0.0, 0.0, 0.0)
 
     return EvalResult(
         merged_rows=int(len(eval_df)),
@@ -102,7 +142,37 @@ def run_signal_eval(eval_df: pd.DataFrame) -> EvalResult:
     )
 
 
-def write_day5_report(result, eval_df: pd.DataFrame, out_path: Path) -> None:
+def _ic_matrix_lines(ic_table: pd.DataFrame) -> list[str]:
+    horizons = sorted(ic_table["horizon_days"].unique())
+    lines = [
+        "## IC matrix (Spearman, pooled)",
+        "",
+        "IC per feature and forward horizon; (p) is the permutation p-value, [p_max] the",
+        "family-wise p-value against the max |IC| of each joint permutation.",
+        "",
+        "| feature | " + " | ".join(f"{h}D" for h in horizons) + " |",
+        "|---|" + "---:|" * len(horizons),
+    ]
+    for feature, g in ic_table.groupby("feature", sort=False):
+        cells = g.set_index("horizon_days")
+        lines.append(
+            f"| {feature} | "
+            + " | ".join(
+                f"{cells.at[h, 'ic']:.4f} ({cells.at[h, 'perm_pvalue']:.3f}) [{cells.at[h, 'perm_pvalue_max']:.3f}]"
+                for h in horizons
+            )
+            + " |"
+        )
+    lines.append("")
+    return lines
+
+
+def write_day5_report(
+    result,
+    eval_df: pd.DataFrame,
+    out_path: Path,
+    ic_table: pd.DataFrame | None = None,
+) -> None:
     out_path.parent.mkdir(parents=True, exist_ok=True)
 
     # ---- Dataset summary (from eval_df) ----
@@ -110,7 +180,7 @@ def write_day5_report(result, eval_df: pd.DataFrame, out_path: Path) -> None:
     n_tickers = len(tickers)
 
     if "date" in eval_df.columns:
-        d = pd.to_datetime(eval_df["date"], errors="coerce").dropna()
+        d = pd.to_datetime(eval_df["date"].astype(str), errors="coerce").dropna()
         min_date = d.min().date().isoformat() if len(d) else ""
         max_date = d.max().date().isoformat() if len(d) else ""
     else:
@@ -158,6 +228,7 @@ def write_day5_report(result, eval_df: pd.DataFrame, out_path: Path) -> None:
         f"- event_mean_1d: {result.event_mean_1d:.6f} (95% CI [{result.event_mean_1d_ci_lo:.6f}, {result.event_mean_1d_ci_hi:.6f}])",
         f"- event_mean_3d: {result.event_mean_3d:.6f} (95% CI [{result.event_mean_3d_ci_lo:.6f}, {result.event_mean_3d_ci_hi:.6f}])",
         "",
+        *(_ic_matrix_lines(ic_table) if ic_table is not None and not ic_table.empty else []),
         *interpretation_lines,
     ]
 
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src import tracing
+from src.backtest.risk import trailing_sums
+
+
+@dataclass(frozen=True)
+class EventStudyResult:
+    n_events: int
+    n_dropped: int  # events without a full estimation / event window
+    curve: pd.DataFrame  # offset, n_events, mean_ar, mean_car, car_ci_lo, car_ci_hi, car_t
+    car_final: float
+    car_final_ci_lo: float
+    car_final_ci_hi: float
+
+
+def rolling_market_model(
+    rets: np.ndarray,
+    market: np.ndarray,
+    window: int = 120,
+    min_obs: int = 60,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    OLS alpha/beta of every ticker on the market over the trailing `window`
+    dates ending at each date (inclusive), for all tickers at once.
+    Returns (alpha, beta), each (D, T); NaN where fewer than `min_obs` paired returns.
+    """
+    x = np.broadcast_to(market[:, None], rets.shape)
+    ok = np.isfinite(rets) & np.isfinite(x)
+    x0 = np.where(ok, x, 0.0)
+    y0 = np.where(ok, rets, 0.0)
+
+    n = trailing_sums(ok.astype(float), window)
+    sx = trailing_sums(x0, window)
+    sy = trailing_sums(y0, window)
+    sxx = trailing_sums(x0 * x0, window)
+    sxy = trailing_sums(x0 * y0, window)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        var_x = n * sxx - sx * sx
+        beta = (n * sxy - sx * sy) / var_x
+        alpha = (sy - beta * sx) / n
+    bad = (n < min_obs) | ~(var_x > 0)
+    return np.where(bad, np.nan, alpha), np.where(bad, np.nan, beta)
+
+
+@tracing.traced(cat="eval")
+def market_model_event_study(
+    eval_df: pd.DataFrame,
+    dates: np.ndarray,
+    tickers: list[str],
+    rets: np.ndarray,
+    market_ticker: str = "spy.us",
+    pre: int = 1,
+    post: int = 5,
+    est_window: int = 120,
+    min_obs: int = 60,
+    vol_thresh: float = 1.0,
+    min_docs: int = 10,
+    z: float = 1.96,
+) -> EventStudyResult:
+    """
+    Market-model abnormal returns around news-burst days
+    (volume_z >= vol_thresh and docs >= min_docs), from t-pre to t+post.
+
+    Day 0 is the first trading session on/after the news date. Alpha/beta come
+    from the `est_window` sessions ending just before t-pre. All event windows
+    are gathered from the (sessions x tickers) returns matrix with one fancy
+    index, so there is no per-event loop.
+    """
+    tickers = [t.lower() for t in tickers]
+    if market_ticker not in tickers:
+        raise ValueError(f"Market ticker {market_ticker} has no price data.")
+    m_idx = tickers.index(market_ticker)
+    market = rets[:, m_idx]
+
+    ev = eval_df[(eval_df["volume_z"] >= vol_thresh) & (eval_df["docs"] >= min_docs)]
+    ev = ev[ev["ticker"].astype(str).str.lower() != market_ticker]
+    t_idx = pd.Index(tickers).get_indexer(ev["ticker"].astype(str).str.lower())
+    ev_dates = pd.to_datetime(ev["date"].astype(str), errors="coerce").to_numpy().astype("datetime64[D]")
+    d0 = np.searchsorted(dates, ev_dates, side="left")
+
+    offsets = np.arange(-pre, post + 1)
+    est_end = d0 - pre - 1
+    in_range = (t_idx >= 0) & (est_end >= 0) & (d0 + post < len(dates)) & ~np.isnat(ev_dates)
+    t_idx, d0, est_end = t_idx[in_range], d0[in_range], est_end[in_range]
+
+    alpha, beta = rolling_market_model(rets, market, window=est_window, min_obs=min_obs)
+    a = alpha[est_end, t_idx]
+    b = beta[est_end, t_idx]
+
+    rows = d0[:, None] + offsets[None, :]  # (E, W)
+    r_win = rets[rows, t_idx[:, None]]
+    m_win = market[rows]
+    ar = r_win - (a[:, None] + b[:, None] * m_win)
+
+    valid = np.isfinite(ar).all(axis=1)
+    ar = ar[valid]
+    car = np.cumsum(ar, axis=1)
+    n = len(ar)
+
+    def _ci(x: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        mean = x.mean(axis=0) if n else np.zeros(len(offsets))
+        se = x.std(axis=0, ddof=1) / np.sqrt(n) if n > 1 else np.zeros(len(offsets))
+        return mean, se, mean / np.where(se > 0, se, np.nan)
+
+    mean_ar, _se_ar, _ = _ci(ar)
+    mean_car, se_car, t_car = _ci(car)
+
+    curve = pd.DataFrame(
+        {
+            "offset": offsets,
+            "n_events": n,
+            "mean_ar": mean_ar,
+            "mean_car": mean_car,
+            "car_ci_lo": mean_car - z * se_car,
+            "car_ci_hi": mean_car + z * se_car,
+            "car_t": t_car,
+        }
+    )
+    last = curve.iloc[-1]
+    return EventStudyResult(
+        n_events=n,
+        n_dropped=int(len(ev) - n),
+        curve=curve,
+        car_final=float(last["mean_car"]),
+        car_final_ci_lo=float(last["car_ci_lo"]),
+        car_final_ci_hi=float(last["car_ci_hi"]),
+    )
+
+
+def write_event_study_csv(res: EventStudyResult, out_path: Path) -> None:
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    res.curve.to_csv(out_path, index=False, float_format="%.6g")
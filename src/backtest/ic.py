@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src import tracing
+from src.backtest.dense import pivot_dense
+
+_HORIZON_COL = re.compile(r"^fwd_ret_(\d+)d$")
+
+DEFAULT_IC_FEATURES = ("avg_compound", "pos_frac", "neg_frac", "volume_z", "docs")
+
+# Max (permutation x row) cells of shuffled return ranks materialized at once.
+_MAX_PERM_CELLS = 4_000_000
+
+
+@dataclass(frozen=True)
+class ICReport:
+    timeseries: pd.DataFrame  # date, n, ic, ic_roll, ic_roll_mean, ic_roll_t
+    decay: pd.DataFrame  # horizon_days, days, mean_ic, ic_t, pooled_ic
+
+
+def horizon_columns(df: pd.DataFrame) -> list[tuple[int, str]]:
+    """(horizon_days, column) for every fwd_ret_{h}d column, sorted by horizon."""
+    out = []
+    for c in df.columns:
+        m = _HORIZON_COL.match(str(c))
+        if m:
+            out.append((int(m.group(1)), c))
+    return sorted(out)
+
+
+def _cross_sectional_ranks(x: np.ndarray, y: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Average-tie ranks per date (row) over the tickers where both x and y are
+    present. Returns (rank_x, rank_y, mask); cells outside the mask are NaN.
+    """
+    mask = np.isfinite(x) & np.isfinite(y)
+    rx = pd.DataFrame(np.where(mask, x, np.nan)).rank(axis=1, method="average").to_numpy()
+    ry = pd.DataFrame(np.where(mask, y, np.nan)).rank(axis=1, method="average").to_numpy()
+    return rx, ry, mask
+
+
+def _daily_sums(rx: np.ndarray, ry: np.ndarray, mask: np.ndarray) -> dict[str, np.ndarray]:
+    rx = np.where(mask, rx, 0.0)
+    ry = np.where(mask, ry, 0.0)
+    return {
+        "n": mask.sum(axis=1).astype(float),
+        "sx": rx.sum(axis=1),
+        "sy": ry.sum(axis=1),
+        "sxx": (rx * rx).sum(axis=1),
+        "syy": (ry * ry).sum(axis=1),
+        "sxy": (rx * ry).sum(axis=1),
+    }
+
+
+def _pearson_from_sums(s: dict[str, np.ndarray], min_n: float) -> np.ndarray:
+    n = s["n"]
+    cov = n * s["sxy"] - s["sx"] * s["sy"]
+    vx = n * s["sxx"] - s["sx"] ** 2
+    vy = n * s["syy"] - s["sy"] ** 2
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ic = cov / np.sqrt(vx * vy)
+    return np.where((n >= min_n) & (vx > 0) & (vy > 0), ic, np.nan)
+
+
+def _rolling_sum(a: np.ndarray, window: int) -> np.ndarray:
+    """Trailing window sums via one cumulative sum (each step adds one date, drops one)."""
+    c = np.cumsum(np.concatenate([[0.0], a]))
+    lo = np.maximum(np.arange(1, len(a) + 1) - window, 0)
+    return c[1:] - c[lo]
+
+
+def daily_ic(feature: np.ndarray, fwd_ret: np.ndarray, min_names: int = 3) -> tuple[np.ndarray, np.ndarray]:
+    """Cross-sectional Spearman IC per date for (D, T) matrices. Returns (ic, n_names)."""
+    rx, ry, mask = _cross_sectional_ranks(feature, fwd_ret)
+    sums = _daily_sums(rx, ry, mask)
+    return _pearson_from_sums(sums, min_n=min_names), sums["n"]
+
+
+def rolling_ic(ic: np.ndarray, n: np.ndarray, window: int = 20, min_days: int = 5) -> dict[str, np.ndarray]:
+    """
+    Rolling IC statistics over the last `window` dates, updated incrementally:
+      ic_roll       names-weighted mean IC (pooled correlation of per-date standardized ranks)
+      ic_roll_mean  equal-weighted mean of daily ICs
+      ic_roll_t     t-stat of the daily ICs in the window
+    """
+    valid = np.isfinite(ic)
+    ic0 = np.where(valid, ic, 0.0)
+    w = np.where(valid, n, 0.0)
+
+    k = _rolling_sum(valid.astype(float), window)
+    s1 = _rolling_sum(ic0, window)
+    s2 = _rolling_sum(ic0 * ic0, window)
+    sw = _rolling_sum(w, window)
+    swic = _rolling_sum(w * ic0, window)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = s1 / k
+        var = np.maximum(s2 / k - mean**2, 0.0)
+        t = mean / np.sqrt(var) * np.sqrt(k)
+        pooled = swic / sw
+    ok = k >= min_days
+    return {
+        "ic_roll": np.where(ok, pooled, np.nan),
+        "ic_roll_mean": np.where(ok, mean, np.nan),
+        "ic_roll_t": np.where(ok & (var > 0), t, np.nan),
+    }
+
+
+@tracing.traced(cat="eval")
+def compute_ic_report(
+    eval_df: pd.DataFrame,
+    feature: str = "avg_compound",
+    window: int = 20,
+    min_names: int = 3,
+    min_days: int = 5,
+) -> ICReport:
+    """
+    Daily cross-sectional ICs + rolling IC for the 1-day horizon, and an
+    IC-decay profile across every fwd_ret_{h}d column in `eval_df`.
+    The table is pivoted once into dense (dates x tickers) matrices.
+    """
+    horizons = horizon_columns(eval_df)
+    if not horizons:
+        raise ValueError("eval_df has no fwd_ret_{h}d columns.")
+
+    dates, _tickers, mats = pivot_dense(eval_df, [feature, *[c for _, c in horizons]])
+    x = mats[feature]
+
+    decay_rows = []
+    base_ic, base_n = None, None
+    for h, col in horizons:
+        ic, n = daily_ic(x, mats[col], min_names=min_names)
+        valid = np.isfinite(ic)
+        k = int(valid.sum())
+        mean = float(ic[valid].mean()) if k else float("nan")
+        sd = float(ic[valid].std(ddof=0)) if k else float("nan")
+        decay_rows.append(
+            {
+                "horizon_days": h,
+                "days": k,
+                "mean_ic": mean,
+                "ic_t": mean / sd * np.sqrt(k) if k > 1 and sd > 0 else float("nan"),
+                "pooled_ic": float((ic[valid] * n[valid]).sum() / n[valid].sum()) if k else float("nan"),
+            }
+        )
+        if base_ic is None or h == 1:
+            base_ic, base_n = ic, n
+
+    roll = rolling_ic(base_ic, base_n, window=window, min_days=min_days)
+    ts = pd.DataFrame({"date": dates, "n": base_n.astype(int), "ic": base_ic, **roll})
+    ts = ts[ts["n"] > 0].reset_index(drop=True)
+
+    return ICReport(timeseries=ts, decay=pd.DataFrame(decay_rows))
+
+
+def _standardized_ranks(a: np.ndarray) -> np.ndarray:
+    """Column-wise average-tie ranks, centered and scaled to unit norm (constant columns -> 0)."""
+    r = pd.DataFrame(a).rank(method="average").to_numpy()
+    r -= r.mean(axis=0)
+    norm = np.sqrt((r * r).sum(axis=0))
+    return np.divide(r, norm, out=np.zeros_like(r), where=norm > 0)
+
+
+@tracing.traced(cat="eval")
+def ic_matrix(
+    eval_df: pd.DataFrame,
+    features: tuple[str, ...] | list[str] | None = None,
+    n_perm: int = 1000,
+    seed: int = 42,
+    min_rows: int = 10,
+) -> pd.DataFrame:
+    """
+    Pooled Spearman IC of every feature against every fwd_ret_{h}d column,
+    with permutation p-values (same conventions as `spearman_ic` /
+    `permutation_pvalue_ic`: pairwise-complete rows, p = P(|IC_perm| >= |IC_obs|)).
+
+    (feature, horizon) pairs are grouped by their joint missingness pattern;
+    each group's columns are rank-transformed once and its whole IC block is
+    one matrix product of standardized ranks. Permutations shuffle the return
+    ranks jointly for the block, so one shuffle yields a null IC for every
+    cell; `perm_pvalue_max` compares each |IC| with the permutation maximum
+    over the whole matrix (family-wise, conservative across groups).
+
+    Returns one row per (feature, horizon): feature, horizon_days, n, ic,
+    perm_pvalue, perm_pvalue_max.
+    """
+    horizons = horizon_columns(eval_df)
+    if features is None:
+        features = [f for f in DEFAULT_IC_FEATURES if f in eval_df.columns]
+    features = list(features)
+    cols = [*features, *[c for _, c in horizons]]
+    if not features or not horizons:
+        return pd.DataFrame(columns=["feature", "horizon_days", "n", "ic", "perm_pvalue", "perm_pvalue_max"])
+
+    values = eval_df[cols].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+    finite = np.isfinite(values)
+    n_feat, n_hor = len(features), len(horizons)
+
+    # Group (feature, horizon) pairs by their pairwise-complete row mask.
+    groups: dict[bytes, tuple[np.ndarray, list[tuple[int, int]]]] = {}
+    for i in range(n_feat):
+        for j in range(n_hor):
+            mask = finite[:, i] & finite[:, n_feat + j]
+            groups.setdefault(np.packbits(mask).tobytes(), (mask, []))[1].append((i, j))
+
+    ic = np.zeros((n_feat, n_hor))
+    n_obs = np.zeros((n_feat, n_hor), dtype=np.int64)
+    exceed = np.zeros((n_feat, n_hor), dtype=np.int64)
+    perm_max = np.zeros(n_perm)
+    rng = np.random.default_rng(seed)
+
+    for mask, pairs in groups.values():
+        n = int(mask.sum())
+        fi = sorted({i for i, _ in pairs})
+        hi = sorted({j for _, j in pairs})
+        a = np.array([fi.index(i) for i, _ in pairs])
+        b = np.array([hi.index(j) for _, j in pairs])
+        pi = np.array([i for i, _ in pairs])
+        pj = np.array([j for _, j in pairs])
+        n_obs[pi, pj] = n
+        if n < min_rows:
+            continue
+
+        zx = _standardized_ranks(values[mask][:, fi])
+        zy = _standardized_ranks(values[mask][:, [n_feat + j for j in hi]])
+        block = (zx.T @ zy)[a, b]
+        ic[pi, pj] = block
+
+        step = max(1, _MAX_PERM_CELLS // max(1, n * len(hi)))
+        for lo in range(0, n_perm, step):
+            k = min(step, n_perm - lo)
+            order = np.argsort(rng.random((k, n)), axis=1)
+            perm = np.abs(np.matmul(zx.T[None, :, :], zy[order])[:, a, b])  # (k, pairs)
+            exceed[pi, pj] += (perm >= np.abs(block)[None, :] - 1e-12).sum(axis=0)
+            perm_max[lo : lo + k] = np.maximum(perm_max[lo : lo + k], perm.max(axis=1))
+
+    enough = n_obs >= min_rows
+    p = np.where(enough, exceed / max(n_perm, 1), 1.0)
+    if n_perm:
+        p_max = np.where(enough, (perm_max[None, None, :] >= np.abs(ic)[:, :, None] - 1e-12).mean(axis=2), 1.0)
+    else:
+        p_max = np.ones_like(ic)
+
+    out = []
+    for i, f in enumerate(features):
+        for j, (h, _) in enumerate(horizons):
+            out.append(
+                {
+                    "feature": f,
+                    "horizon_days": h,
+                    "n": int(n_obs[i, j]),
+                    "ic": float(ic[i, j]),
+                    "perm_pvalue": float(p[i, j]),
+                    "perm_pvalue_max": float(p_max[i, j]),
+                }
+            )
+    return pd.DataFrame(out)
+
+
+def write_ic_report(report: ICReport, out_timeseries: Path, out_decay: Path) -> None:
+    out_timeseries.parent.mkdir(parents=True, exist_ok=True)
+    report.timeseries.to_csv(out_timeseries, index=False, float_format="%.6g")
+    report.decay.to_csv(out_decay, index=False, float_format="%.6g")
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src import tracing
+from src.backtest.dense import build_dense_panel, dense_signals, hold_positions, pivot_dense
+from src.backtest.sweep import summarize_daily_returns
+
+# Bytes per (sim, date, ticker) cell: random keys, sort order, gathered returns, cumsum.
+_BYTES_PER_CELL = 32
+
+# Set once per worker process by the pool initializer.
+_WORKER_STATE: dict | None = None
+
+
+@dataclass(frozen=True)
+class MonteCarloResult:
+    n_sims: int
+    observed_sharpe: float
+    observed_max_drawdown: float
+    null_sharpe: np.ndarray
+    null_max_drawdown: np.ndarray
+    p_value_sharpe: float  # P(null Sharpe >= observed)
+    p_value_drawdown: float  # P(null drawdown >= observed), i.e. random is at least as shallow
+    delay: str = "row"  # execution delay of the observed strategy: "row" (pandas engine) or "date" (dense engine)
+
+    def quantiles(self, q=(0.05, 0.5, 0.95)) -> dict[str, list[float]]:
+        return {
+            "sharpe": [float(v) for v in np.quantile(self.null_sharpe, q)],
+            "max_drawdown": [float(v) for v in np.quantile(self.null_max_drawdown, q)],
+        }
+
+
+def _previous_row_signals(signals: np.ndarray, present: np.ndarray) -> np.ndarray:
+    """
+    Each cell takes the signal of its ticker's previous row in the merged table,
+    skipping dates the ticker has no row on: the groupby-shift(1) delay of
+    `simulate_equal_weight_portfolio`, on (D, T) matrices.
+    """
+    rows = np.arange(signals.shape[0])[:, None]
+    last = np.maximum.accumulate(np.where(present, rows, -1), axis=0)
+    prev = np.full_like(last, -1)
+    prev[1:] = last[:-1]
+    src = np.take_along_axis(signals, np.maximum(prev, 0), axis=0)
+    return np.where(prev >= 0, src, 0).astype(signals.dtype)
+
+
+def _pool_context():
+    # fork shares the returns matrix copy-on-write; spawn pickles the state once per worker.
+    methods = mp.get_all_start_methods()
+    return mp.get_context("fork" if "fork" in methods else "spawn")
+
+
+def _daily_from_sorted(ret_sorted: np.ndarray, n_long: np.ndarray, n_short: np.ndarray, slip: float) -> np.ndarray:
+    """
+    Equal-weight daily return when the first n_long cells of each (sim, date) row
+    are long and the next n_short are short. Rows are already randomly ordered.
+    """
+    b, d, _ = ret_sorted.shape
+    cs = np.concatenate([np.zeros((b, d, 1)), np.cumsum(ret_sorted, axis=2)], axis=2)
+    n = n_long + n_short
+    sum_long = np.take_along_axis(cs, np.broadcast_to(n_long[None, :, None], (b, d, 1)), axis=2)[..., 0]
+    sum_all = np.take_along_axis(cs, np.broadcast_to(n[None, :, None], (b, d, 1)), axis=2)[..., 0]
+    gross = (2.0 * sum_long - sum_all) / np.maximum(n, 1)[None, :]
+    return np.where(n[None, :] > 0, gross - slip, 0.0)
+
+
+@tracing.traced(cat="simulate")
+def _simulate_chunk(
+    ret: np.ndarray,
+    tradable: np.ndarray,
+    n_long: np.ndarray,
+    n_short: np.ndarray,
+    slip: float,
+    n_sims: int,
+    seed,
+) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    keys = rng.random((n_sims, *ret.shape))
+    keys[:, ~tradable] = np.inf  # untradable cells sort last and are never picked
+    order = np.argsort(keys, axis=2)
+    del keys
+    ret_sorted = np.take_along_axis(np.broadcast_to(np.nan_to_num(ret), order.shape), order, axis=2)
+    del order
+
+    daily = _daily_from_sorted(ret_sorted, n_long, n_short, slip)
+    counts = np.broadcast_to((n_long + n_short)[None, :], daily.shape)
+    stats = summarize_daily_returns(daily, counts)
+    return stats["sharpe_ann"], stats["max_drawdown"]
+
+
+def _init_worker(state: dict) -> None:
+    global _WORKER_STATE
+    _WORKER_STATE = state
+
+
+def _worker_chunk(args: tuple[int, np.random.SeedSequence]) -> tuple[np.ndarray, np.ndarray]:
+    n_sims, seed = args
+    s = _WORKER_STATE
+    return _simulate_chunk(s["ret"], s["tradable"], s["n_long"], s["n_short"], s["slip"], n_sims, seed)
+
+
+@tracing.traced(cat="simulate")
+def monte_carlo_null(
+    merged_df: pd.DataFrame,
+    sent_thresh: float = 0.05,
+    vol_thresh: float = 1.0,
+    min_docs: int = 10,
+    slippage_bps: float = 2.0,
+    hold_days: int = 1,
+    n_sims: int = 1000,
+    memory_budget_mb: float = 256.0,
+    workers: int = 1,
+    seed: int = 42,
+    rule: str | None = None,
+    delay: str = "row",
+) -> MonteCarloResult:
+    """
+    Null distribution of Sharpe / max drawdown for random trading at the
+    strategy's own activity level.
+
+    Each simulated portfolio holds, on every date, the same number of longs and
+    shorts as the real strategy, drawn uniformly from that date's tradable
+    tickers. Simulations run as batched (sims, dates, tickers) array ops,
+    chunked so one batch stays within `memory_budget_mb`; chunks can be spread
+    over `workers` processes.
+
+    Returns follow the pandas engine: equal-weight mean of signed returns minus
+    `slippage_bps` on each date with positions. With delay="row" signals execute
+    on the ticker's next row, as in `simulate_equal_weight_portfolio`, so the
+    observed Sharpe is the simulate stage's; delay="date" uses the dense
+    engine's next panel date instead.
+    """
+    if delay not in ("row", "date"):
+        raise ValueError(f"delay must be 'row' or 'date', got {delay!r}")
+    panel = build_dense_panel(merged_df)
+    tradable = np.isfinite(panel.ret)
+    signals = dense_signals(panel, sent_thresh=sent_thresh, vol_thresh=vol_thresh, min_docs=min_docs, rule=rule)
+
+    if delay == "row":
+        present = np.isfinite(pivot_dense(merged_df.assign(_row=1.0), ["_row"])[2]["_row"])
+        exec_sig = _previous_row_signals(signals, present)
+    else:
+        exec_sig = np.zeros_like(signals)
+        exec_sig[1:] = signals[:-1]
+    exec_sig[~tradable] = 0
+    pos = hold_positions(exec_sig, hold_days)
+    pos[~tradable] = 0
+
+    n_long = (pos > 0).sum(axis=1)
+    n_short = (pos < 0).sum(axis=1)
+    slip = slippage_bps / 10000.0
+
+    n = n_long + n_short
+    obs_daily = np.where(n > 0, (pos * np.nan_to_num(panel.ret)).sum(axis=1) / np.maximum(n, 1) - slip, 0.0)
+    obs = summarize_daily_returns(obs_daily[None, :], n[None, :])
+
+    cells = max(1, panel.ret.size)
+    chunk = max(1, int(memory_budget_mb * 1024 * 1024 // (_BYTES_PER_CELL * cells)))
+    sizes = [min(chunk, n_sims - i) for i in range(0, n_sims, chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    if workers > 1 and len(sizes) > 1:
+        state = {"ret": panel.ret, "tradable": tradable, "n_long": n_long, "n_short": n_short, "slip": slip}
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=_pool_context(), initializer=_init_worker, initargs=(state,)
+        ) as pool:
+            parts = list(pool.map(_worker_chunk, zip(sizes, seeds)))
+    else:
+        parts = [
+            _simulate_chunk(panel.ret, tradable, n_long, n_short, slip, size, s) for size, s in zip(sizes, seeds)
+        ]
+
+    null_sharpe = np.concatenate([p[0] for p in parts]) if parts else np.array([])
+    null_mdd = np.concatenate([p[1] for p in parts]) if parts else np.array([])
+    obs_sharpe = float(obs["sharpe_ann"][0])
+    obs_mdd = float(obs["max_drawdown"][0])
+
+    return MonteCarloResult(
+        n_sims=int(len(null_sharpe)),
+        observed_sharpe=obs_sharpe,
+        observed_max_drawdown=obs_mdd,
+        null_sharpe=null_sharpe,
+        null_max_drawdown=null_mdd,
+        p_value_sharpe=float((1 + (null_sharpe >= obs_sharpe).sum()) / (1 + len(null_sharpe))),
+        p_value_drawdown=float((1 + (null_mdd >= obs_mdd).sum()) / (1 + len(null_mdd))),
+        delay=delay,
+    )
+
+
+def write_mc_null_csv(res: MonteCarloResult, out_path: Path) -> None:
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame({"sharpe_ann": res.null_sharpe, "max_drawdown": res.null_max_drawdown}).to_csv(
+        out_path, index=False, float_format="%.6g"
+    )
+
+
+def mc_report_lines(res: MonteCarloResult) -> list[str]:
+    q = res.quantiles()
+    # The dense engine sizes and charges slippage on turnover; the null re-scores its positions the pandas way.
+    label = "observed_sharpe" if res.delay == "row" else "observed_sharpe (dense-engine positions, equal weight)"
+    return [
+        "Monte Carlo null (random trades, same per-date long/short counts):",
+        f"- sims: {res.n_sims}",
+        f"- {label}: {res.observed_sharpe:.4f} (p-value: {res.p_value_sharpe:.4f})",
+        f"- null_sharpe 5/50/95%: {q['sharpe'][0]:.4f} / {q['sharpe'][1]:.4f} / {q['sharpe'][2]:.4f}",
+        f"- observed_max_drawdown: {res.observed_max_drawdown:.4f} (p-value: {res.p_value_drawdown:.4f})",
+        f"- null_max_drawdown 5/50/95%: {q['max_drawdown'][0]:.4f} / {q['max_drawdown'][1]:.4f} / {q['max_drawdown'][2]:.4f}",
+    ]
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
 
@@ -26,17 +27,101 @@ def load_price_cache(ticker: str, cache_dir: Path) -> pd.DataFrame:
     return df[["Date", "Close"]]
 
 
-def compute_forward_returns(price_df: pd.DataFrame) -> pd.DataFrame:
+def compute_forward_returns(price_df: pd.DataFrame, horizons: tuple[int, ...] = (1, 3)) -> pd.DataFrame:
     """
-    Create forward returns:
-      fwd_ret_1d(t) = Close(t+1)/Close(t) - 1
-      fwd_ret_3d(t) = Close(t+3)/Close(t) - 1
+    Create forward returns for each horizon h (in trading days):
+      fwd_ret_{h}d(t) = Close(t+h)/Close(t) - 1
+    Defaults to fwd_ret_1d and fwd_ret_3d.
     """
     df = price_df.copy()
     df["date"] = df["Date"].dt.date.astype(str)
 
     close = df["Close"]
-    df["fwd_ret_1d"] = (close.shift(-1) / close) - 1.0
-    df["fwd_ret_3d"] = (close.shift(-3) / close) - 1.0
+    cols = []
+    for h in horizons:
+        col = f"fwd_ret_{int(h)}d"
+        df[col] = (close.shift(-int(h)) / close) - 1.0
+        cols.append(col)
 
-    return df[["date", "fwd_ret_1d", "fwd_ret_3d"]]
+    return df[["date", *cols]]
+
+
+def load_returns_matrix(tickers: list[str], cache_dir: Path) -> tuple[np.ndarray, list[str], np.ndarray]:
+    """
+    Daily close-to-close returns for all tickers on the union of their trading dates.
+    Returns (dates as datetime64[D], tickers found, (D, T) returns with NaN gaps).
+    Tickers without a price cache are skipped.
+    """
+    closes = {}
+    for t in tickers:
+        try:
+            px = load_price_cache(ticker=t.lower(), cache_dir=cache_dir)
+        except FileNotFoundError:
+            continue
+        closes[t.lower()] = px.set_index("Date")["Close"]
+
+    if not closes:
+        return np.array([], dtype="datetime64[D]"), [], np.empty((0, 0))
+
+    close = pd.DataFrame(closes).sort_index()
+    rets = close / close.ffill().shift(1) - 1.0
+    rets = rets.where(close.notna())
+    return close.index.to_numpy().astype("datetime64[D]"), list(close.columns), rets.to_numpy(dtype=float)
+
+
+def load_intraday_price_cache(ticker: str, cache_dir: Path) -> pd.DataFrame:
+    """
+    Load locally supplied intraday bars for ticker (cache_dir/{ticker}.csv).
+    Accepts a `Datetime` column, or Stooq-style `Date` + `Time`; naive times are UTC.
+    Returns df with Timestamp (UTC) and Close, sorted.
+    """
+    path = cache_dir / f"{ticker.lower()}.csv"
+    if not path.exists():
+        raise FileNotFoundError(f"Missing intraday price cache for {ticker}: {path}")
+
+    df = pd.read_csv(path)
+    if "Datetime" in df.columns:
+        stamp = df["Datetime"].astype(str)
+    elif {"Date", "Time"} <= set(df.columns):
+        stamp = df["Date"].astype(str) + " " + df["Time"].astype(str)
+    else:
+        raise ValueError(f"Unexpected intraday price columns for {ticker}: {df.columns.tolist()}")
+
+    out = pd.DataFrame(
+        {
+            "Timestamp": pd.to_datetime(stamp, utc=True, errors="coerce", format="mixed"),
+            "Close": pd.to_numeric(df["Close"], errors="coerce"),
+        }
+    )
+    return out.dropna().sort_values("Timestamp").reset_index(drop=True)
+
+
+def compute_bar_forward_returns(
+    price_df: pd.DataFrame,
+    bucket_minutes: int,
+    horizons: tuple[int, ...] = (1, 3),
+) -> pd.DataFrame:
+    """
+    Resample intraday prices to N-minute bars (last close in each bucket) and
+    create forward returns over the next h *bars* with prices:
+      fwd_ret_{h}b(b) = Close(bar b+h)/Close(bar b) - 1
+    Returns df with integer `bucket` ids (see src/features/sessions.py) and the return columns.
+    """
+    step = int(bucket_minutes) * 60 * 1_000_000_000
+    ts = pd.DatetimeIndex(price_df["Timestamp"]).asi8
+    buckets = ts // step
+    last = np.r_[buckets[1:] != buckets[:-1], True] if len(buckets) else np.zeros(0, dtype=bool)
+
+    close = price_df["Close"].to_numpy(dtype=float)[last]
+    out = pd.DataFrame({"bucket": buckets[last]})
+    for h in horizons:
+        fwd = np.full(len(close), np.nan)
+        if int(h) < len(close):
+            fwd[: len(close) - int(h)] = close[int(h) :] / close[: len(close) - int(h)] - 1.0
+        out[f"fwd_ret_{int(h)}b"] = fwd
+    return out
+
+
+def bars_per_year(bucket_minutes: int, session_minutes: int = 390, trading_days: int = 252) -> float:
+    """Annualization factor for N-minute bars of a regular 6.5h session."""
+    return trading_days * session_minutes / float(bucket_minutes)
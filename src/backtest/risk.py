@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import warnings
+
+import numpy as np
+
+TRADING_DAYS = 252
+
+
+def trailing_sums(a: np.ndarray, window: int) -> np.ndarray:
+    """Trailing `window`-row sums along axis 0 (inclusive of the current row)."""
+    c = np.cumsum(np.concatenate([np.zeros((1, *a.shape[1:])), a]), axis=0)
+    lo = np.maximum(np.arange(1, len(a) + 1) - window, 0)
+    return c[1:] - c[lo]
+
+
+def rolling_volatility(rets: np.ndarray, window: int = 20, min_obs: int = 10) -> np.ndarray:
+    """
+    Daily return volatility (sample std) of every column over the trailing
+    `window` rows, inclusive of the current row. One cumulative sum of x and
+    x^2 per panel, so each step adds one row and drops one for all tickers.
+    NaN returns are skipped; cells with fewer than `min_obs` returns are NaN.
+    """
+    ok = np.isfinite(rets)
+    x = np.where(ok, rets, 0.0)
+    n = trailing_sums(ok.astype(float), window)
+    s1 = trailing_sums(x, window)
+    s2 = trailing_sums(x * x, window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        var = np.maximum(s2 - s1 * s1 / n, 0.0) / (n - 1)
+    return np.where(n >= max(min_obs, 2), np.sqrt(var), np.nan)
+
+
+def align_to_panel(
+    values: np.ndarray,
+    dates: np.ndarray,
+    tickers: list[str],
+    panel_dates: np.ndarray,
+    panel_tickers: np.ndarray,
+) -> np.ndarray:
+    """
+    Re-index a (dates x tickers) matrix onto panel dates/tickers, taking the
+    last row on or before each panel date. Unknown tickers/dates are NaN.
+    """
+    pd_dates = np.asarray(panel_dates).astype("datetime64[D]")
+    rows = np.searchsorted(np.asarray(dates).astype("datetime64[D]"), pd_dates, side="right") - 1
+    lookup = {t.lower(): i for i, t in enumerate(tickers)}
+    cols = np.array([lookup.get(str(t).lower(), -1) for t in panel_tickers], dtype=np.int64)
+
+    out = np.full((len(pd_dates), len(cols)), np.nan)
+    if values.size == 0:
+        return out
+    r_ok, c_ok = rows >= 0, cols >= 0
+    out[np.ix_(r_ok, c_ok)] = values[np.ix_(rows[r_ok], cols[c_ok])]
+    return out
+
+
+def fill_volatility(vol: np.ndarray) -> np.ndarray:
+    """
+    Replace missing/zero vol by that date's cross-sectional median, then by the
+    panel median, so every held position can be sized.
+    """
+    v = np.where(np.isfinite(vol) & (vol > 0), vol, np.nan)
+    if not np.isfinite(v).any():
+        return np.ones_like(v)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN dates
+        row_med = np.nanmedian(v, axis=1)
+    row_med = np.where(np.isfinite(row_med), row_med, np.nanmedian(v))
+    return np.where(np.isfinite(v), v, row_med[:, None])
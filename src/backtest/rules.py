@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import ast
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Mapping
+
+import numpy as np
+
+# Node = hashable tuple tree; equal subexpressions produce equal keys and are evaluated once per batch.
+Node = tuple
+
+_CLAUSE = re.compile(r"^\s*(long|short)\s*:\s*(.+?)\s*$", re.IGNORECASE)
+
+_CMP_OPS: dict[type, str] = {
+    ast.Gt: ">",
+    ast.GtE: ">=",
+    ast.Lt: "<",
+    ast.LtE: "<=",
+    ast.Eq: "==",
+    ast.NotEq: "!=",
+}
+_BIN_OPS: dict[type, str] = {ast.Add: "+", ast.Sub: "-", ast.Mult: "*", ast.Div: "/"}
+_FUNCS = {"abs": np.abs}
+
+_APPLY: dict[str, Callable] = {
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+    "==": np.equal,
+    "!=": np.not_equal,
+    "+": np.add,
+    "-": np.subtract,
+    "*": np.multiply,
+    "/": np.divide,
+    "and": np.logical_and,
+    "or": np.logical_or,
+}
+
+
+class RuleSyntaxError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    text: str
+    long: Node | None
+    short: Node | None
+    columns: frozenset[str] = field(default_factory=frozenset)
+
+
+def _to_node(n: ast.AST, text: str) -> Node:
+    if isinstance(n, ast.BoolOp):
+        op = "and" if isinstance(n.op, ast.And) else "or"
+        out = _to_node(n.values[0], text)
+        for v in n.values[1:]:
+            out = (op, out, _to_node(v, text))
+        return out
+    if isinstance(n, ast.UnaryOp) and isinstance(n.op, ast.Not):
+        return ("not", _to_node(n.operand, text))
+    if isinstance(n, ast.UnaryOp) and isinstance(n.op, (ast.USub, ast.UAdd)):
+        inner = _to_node(n.operand, text)
+        if isinstance(n.op, ast.UAdd):
+            return inner
+        if inner[0] == "const":
+            return ("const", -inner[1])
+        return ("neg", inner)
+    if isinstance(n, ast.Compare):
+        # a < b < c  ->  (a < b) and (b < c)
+        parts = []
+        left = _to_node(n.left, text)
+        for op, comp in zip(n.ops, n.comparators):
+            if type(op) not in _CMP_OPS:
+                raise RuleSyntaxError(f"Unsupported comparison in rule: {text!r}")
+            right = _to_node(comp, text)
+            parts.append((_CMP_OPS[type(op)], left, right))
+            left = right
+        out = parts[0]
+        for p in parts[1:]:
+            out = ("and", out, p)
+        return out
+    if isinstance(n, ast.BinOp) and type(n.op) in _BIN_OPS:
+        return (_BIN_OPS[type(n.op)], _to_node(n.left, text), _to_node(n.right, text))
+    if isinstance(n, ast.Call) and isinstance(n.func, ast.Name) and n.func.id in _FUNCS and len(n.args) == 1:
+        return ("call", n.func.id, _to_node(n.args[0], text))
+    if isinstance(n, ast.Name):
+        return ("col", n.id)
+    if isinstance(n, ast.Constant) and isinstance(n.value, (int, float)) and not isinstance(n.value, bool):
+        return ("const", float(n.value))
+    raise RuleSyntaxError(f"Unsupported expression {ast.dump(n)} in rule: {text!r}")
+
+
+def _columns(node: Node) -> set[str]:
+    if node[0] == "col":
+        return {node[1]}
+    if node[0] == "const":
+        return set()
+    return set().union(*(_columns(c) for c in node[1:] if isinstance(c, tuple)))
+
+
+def compile_expr(expr: str) -> Node:
+    try:
+        tree = ast.parse(expr.strip(), mode="eval")
+    except SyntaxError as e:
+        raise RuleSyntaxError(f"Cannot parse rule expression {expr!r}: {e.msg}") from None
+    return _to_node(tree.body, expr)
+
+
+def compile_rule(text: str) -> CompiledRule:
+    """
+    Parse a rule such as
+
+        long: avg_compound > 0.05 and volume_z > 1.5; short: avg_compound < -0.05 and volume_z > 1.5
+
+    Clauses are separated by ';' or newlines. Expressions support column names,
+    numbers, + - * /, abs(), comparisons (chained too), and/or/not, parentheses.
+    """
+    clauses: dict[str, Node] = {}
+    for part in re.split(r"[;\n]", text):
+        if not part.strip():
+            continue
+        m = _CLAUSE.match(part)
+        if not m:
+            raise RuleSyntaxError(f"Expected 'long: <expr>' or 'short: <expr>', got {part.strip()!r}")
+        side = m.group(1).lower()
+        if side in clauses:
+            raise RuleSyntaxError(f"Duplicate '{side}' clause in rule: {text!r}")
+        clauses[side] = compile_expr(m.group(2))
+    if not clauses:
+        raise RuleSyntaxError(f"Rule has no long/short clause: {text!r}")
+
+    cols = set()
+    for node in clauses.values():
+        cols |= _columns(node)
+    return CompiledRule(
+        text=" ".join(text.split()),
+        long=clauses.get("long"),
+        short=clauses.get("short"),
+        columns=frozenset(cols),
+    )
+
+
+def read_rules_file(path: Path) -> list[str]:
+    """One rule per line ('#' starts a comment); clauses on a line are separated by ';'."""
+    rules = []
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        line = line.split("#", 1)[0].strip()
+        if line:
+            rules.append(line)
+    return rules
+
+
+class RuleBatch:
+    """
+    A batch of compiled rules evaluated together over the same columns.
+    Every distinct subexpression (by structure) is computed once per call.
+    """
+
+    def __init__(self, rules: list[str | CompiledRule]):
+        self.rules = [r if isinstance(r, CompiledRule) else compile_rule(r) for r in rules]
+        self.columns = frozenset().union(*(r.columns for r in self.rules)) if self.rules else frozenset()
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def _eval(self, node: Node, env: Mapping[str, np.ndarray], cache: dict) -> np.ndarray:
+        hit = cache.get(node)
+        if hit is not None:
+            return hit
+
+        kind = node[0]
+        if kind == "col":
+            if node[1] not in env:
+                raise KeyError(f"Rule references unknown column {node[1]!r}")
+            out = np.asarray(env[node[1]], dtype=float)
+        elif kind == "const":
+            out = np.float64(node[1])
+        elif kind == "not":
+            # NaN comparisons are False; negating must not turn them True.
+            out = self._known(node[1], env, cache) & np.logical_not(self._eval(node[1], env, cache))
+        elif kind == "neg":
+            out = np.negative(self._eval(node[1], env, cache))
+        elif kind == "call":
+            out = _FUNCS[node[1]](self._eval(node[2], env, cache))
+        elif kind == "!=":
+            left, right = self._eval(node[1], env, cache), self._eval(node[2], env, cache)
+            out = np.not_equal(left, right) & ~np.isnan(left) & ~np.isnan(right)
+        else:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                out = _APPLY[kind](self._eval(node[1], env, cache), self._eval(node[2], env, cache))
+        cache[node] = out
+        return out
+
+    def _known(self, node: Node, env: Mapping[str, np.ndarray], cache: dict) -> np.ndarray:
+        """True where every comparison under a boolean `node` has non-NaN operands."""
+        key = ("known", node)
+        hit = cache.get(key)
+        if hit is not None:
+            return hit
+
+        kind = node[0]
+        if kind in ("and", "or"):
+            out = self._known(node[1], env, cache) & self._known(node[2], env, cache)
+        elif kind == "not":
+            out = self._known(node[1], env, cache)
+        elif kind in _CMP_OPS.values():
+            out = ~np.isnan(self._eval(node[1], env, cache)) & ~np.isnan(self._eval(node[2], env, cache))
+        else:
+            out = ~np.isnan(self._eval(node, env, cache))  # a bare number used as a condition
+        cache[key] = out
+        return out
+
+    def evaluate(self, env: Mapping[str, np.ndarray], n_rows: int | None = None) -> np.ndarray:
+        """
+        int8 signals shaped (n_rules, n_rows): +1 long, -1 short, 0 flat.
+        As in `build_signals`, short wins when both clauses fire.
+        """
+        n = n_rows if n_rows is not None else (len(next(iter(env.values()))) if env else 0)
+        out = np.zeros((len(self.rules), n), dtype=np.int8)
+        cache: dict = {}
+        for i, rule in enumerate(self.rules):
+            if rule.long is not None:
+                out[i][np.broadcast_to(self._eval(rule.long, env, cache), (n,)).astype(bool)] = 1
+            if rule.short is not None:
+                out[i][np.broadcast_to(self._eval(rule.short, env, cache), (n,)).astype(bool)] = -1
+        return out
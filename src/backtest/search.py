@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import math
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.backtest.sweep import build_sweep_panel, config_grid, evaluate_configs, load_merged_table
+
+
+def halving_schedule(n_configs: int, n_dates: int, eta: int = 3, min_dates: int = 5) -> list[int]:
+    """
+    Number of leading dates evaluated at each rung, ending with the full history.
+    Each earlier rung sees 1/eta of the next one's dates, but never fewer than `min_dates`.
+    """
+    if n_configs <= 1 or n_dates < eta * max(1, min_dates):
+        return [n_dates]
+
+    # As many rungs as the config count needs, but no more than the history
+    # can support while the first slice still has `min_dates` dates.
+    n_rungs = min(
+        math.ceil(math.log(n_configs, eta)),
+        int(math.floor(math.log(n_dates / max(1, min_dates), eta))) + 1,
+    )
+    return [math.ceil(n_dates / (eta ** (n_rungs - 1 - r))) for r in range(max(1, n_rungs))]
+
+
+def successive_halving(
+    merged_table: pd.DataFrame | str | Path,
+    configs: pd.DataFrame | None = None,
+    eta: int = 3,
+    min_dates: int = 5,
+    metric: str = "sharpe_ann",
+    ret_col: str = "fwd_ret_1d",
+    periods_per_year: float = 252,
+) -> pd.DataFrame:
+    """
+    Adaptive alternative to the exhaustive grid in `run_sweep`.
+
+    Configs are first scored on a short leading slice of the history; only the
+    best 1/eta advance to the next (eta times longer) slice, and only the final
+    survivors are evaluated on the full history.
+
+    Returns one row per config with its metrics from the last rung it reached, plus:
+      rung          index of that rung (max rung == full history)
+      eval_dates    dates in that rung's slice
+      ticker_days   tradable ticker-days simulated for the config across all rungs
+    """
+    panel = build_sweep_panel(load_merged_table(merged_table), ret_col=ret_col)
+    if configs is None:
+        configs = config_grid()
+    configs = configs.reset_index(drop=True)
+    if eta < 2:
+        raise ValueError("eta must be >= 2")
+
+    schedule = halving_schedule(len(configs), panel.n_dates, eta=eta, min_dates=min_dates)
+
+    out = configs.copy()
+    out["rung"] = 0
+    out["eval_dates"] = 0
+    out["ticker_days"] = 0
+    survivors = np.arange(len(configs))
+
+    for rung, n_dates in enumerate(schedule):
+        sub = panel.head_dates(n_dates)
+        res = evaluate_configs(sub, configs.iloc[survivors], periods_per_year=periods_per_year)
+        for col in ("trades", "sharpe_ann", "max_drawdown", "total_return"):
+            out.loc[survivors, col] = res[col].to_numpy()
+        out.loc[survivors, "rung"] = rung
+        out.loc[survivors, "eval_dates"] = sub.n_dates
+        out.loc[survivors, "ticker_days"] += sub.n_rows
+
+        if rung == len(schedule) - 1:
+            break
+        keep = max(1, math.ceil(len(survivors) / eta))
+        # Stable sort: ties keep grid order, so the search is deterministic.
+        ranked = np.argsort(-res[metric].to_numpy(), kind="stable")
+        survivors = np.sort(survivors[ranked[:keep]])
+
+    out["trades"] = out["trades"].astype(int)
+    out["eval_rows_full"] = panel.n_rows
+    return out
+
+
+def halving_savings(df: pd.DataFrame) -> dict[str, int | float]:
+    """Ticker-days simulated by a successive-halving run vs an exhaustive sweep of the same configs."""
+    exhaustive = int(len(df) * int(df["eval_rows_full"].max())) if len(df) else 0
+    simulated = int(df["ticker_days"].sum()) if len(df) else 0
+    saved = exhaustive - simulated
+    return {
+        "ticker_days_exhaustive": exhaustive,
+        "ticker_days_simulated": simulated,
+        "ticker_days_saved": saved,
+        "saved_pct": round(100.0 * saved / exhaustive, 2) if exhaustive else 0.0,
+    }
@@ -3,8 +3,13 @@ from __future__ import annotations
 from dataclasses import dataclass
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
+from src import tracing
+from src.backtest.rules import CompiledRule, RuleBatch
+from src.storage.dtypes import apply_dtype_policy
+
 
 @dataclass(frozen=True)
 class SimResult:
@@ -15,7 +20,7 @@ class SimResult:
     out_portfolio_csv: Path
 
 
-def _annualized_sharpe(daily_rets: pd.Series) -> float:
+def _annualized_sharpe(daily_rets: pd.Series, periods_per_year: float = 252) -> float:
     r = pd.to_numeric(daily_rets, errors="coerce").dropna()
     if len(r) < 2:
         return 0.0
@@ -23,7 +28,7 @@ def _annualized_sharpe(daily_rets: pd.Series) -> float:
     sd = r.std(ddof=0)
     if sd == 0 or pd.isna(sd):
         return 0.0
-    return float((mu / sd) * (252**0.5))
+    return float((mu / sd) * (periods_per_year**0.5))
 
 
 def _max_drawdown(equity: pd.Series) -> float:
@@ -40,14 +45,23 @@ def build_signals(
     sent_thresh: float = 0.05,
     vol_thresh: float = 1.0,
     min_docs: int = 10,
+    rule: str | CompiledRule | None = None,
 ) -> pd.DataFrame:
     """
     Create a discrete signal per (ticker, date).
       +1 if avg_compound >= sent_thresh AND volume_z >= vol_thresh AND docs >= min_docs
       -1 if avg_compound <= -sent_thresh AND volume_z >= vol_thresh AND docs >= min_docs
        0 otherwise
+
+    If `rule` is given (see src/backtest/rules.py), it replaces the threshold rule.
     """
     out = df.copy()
+    if rule is not None:
+        batch = RuleBatch([rule])
+        env = {c: pd.to_numeric(out[c], errors="coerce").to_numpy(dtype=float) for c in batch.columns}
+        out["signal"] = batch.evaluate(env, n_rows=len(out))[0].astype(np.int64)
+        return out
+
     out["signal"] = 0
 
     long_mask = (
@@ -66,6 +80,7 @@ def build_signals(
     return out
 
 
+@tracing.traced(cat="simulate")
 def simulate_equal_weight_portfolio(
     merged_df: pd.DataFrame,
     out_dir: Path,
@@ -73,11 +88,17 @@ def simulate_equal_weight_portfolio(
     vol_thresh: float = 1.0,
     min_docs: int = 10,
     slippage_bps: float = 2.0,
+    rule: str | CompiledRule | None = None,
+    ret_col: str = "fwd_ret_1d",
+    periods_per_year: float = 252,
 ) -> SimResult:
     """
     Inputs: merged_df with columns at least:
       ticker, date, docs, avg_compound, volume_z, fwd_ret_1d
 
+    For intraday bars pass e.g. ret_col="fwd_ret_1b" and the bars-per-year
+    `periods_per_year`; the execution delay is then one bar.
+
     We:
       1) build signals on date t from features on date t
       2) apply a 1-day execution delay (signal executed next day):
@@ -90,37 +111,35 @@ def simulate_equal_weight_portfolio(
     """
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    df = merged_df.copy()
-    df["ticker"] = df["ticker"].astype(str).str.lower()
-    df["date"] = df["date"].astype(str)
+    df = apply_dtype_policy(merged_df)
 
     # Build base signals on the same day as the features
-    df = build_signals(df, sent_thresh=sent_thresh, vol_thresh=vol_thresh, min_docs=min_docs)
+    df = build_signals(df, sent_thresh=sent_thresh, vol_thresh=vol_thresh, min_docs=min_docs, rule=rule)
 
     # Apply 1-day delay per ticker: signal_exec(date d) = signal(date d-1)
     df = df.sort_values(["ticker", "date"]).reset_index(drop=True)
-    df["signal_exec"] = df.groupby("ticker")["signal"].shift(1).fillna(0).astype(int)
+    df["signal_exec"] = df.groupby("ticker", observed=True)["signal"].shift(1).fillna(0).astype(int)
 
     # Trade indicator: a non-zero executed signal counts as a trade for that ticker-day
     df["trade"] = (df["signal_exec"] != 0).astype(int)
 
     # PnL per ticker-day (using next-day return relative to the feature day)
     # If signal_exec is on day d, we use fwd_ret_1d from day d (close(d+1)/close(d)-1)
-    df["gross_pnl"] = df["signal_exec"] * df["fwd_ret_1d"]
+    df["gross_pnl"] = df["signal_exec"] * df[ret_col]
 
     # Slippage: subtract bps for each executed trade (per ticker-day)
     slip = slippage_bps / 10000.0
     df["net_pnl"] = df["gross_pnl"] - (df["trade"] * slip)
 
     # Portfolio daily return: equal-weight average across tickers that traded that day
-    traded = df[(df["trade"] == 1) & (df["fwd_ret_1d"].notna())].copy()
+    traded = df[(df["trade"] == 1) & (df[ret_col].notna())].copy()
     if traded.empty:
         out_path = out_dir / "portfolio_daily.csv"
         pd.DataFrame(columns=["date", "portfolio_ret", "n_positions"]).to_csv(out_path, index=False)
         return SimResult(0, 0, 0.0, 0.0, out_path)
 
     port = (
-        traded.groupby("date", as_index=False)
+        traded.groupby("date", as_index=False, observed=True)
         .agg(
             portfolio_ret=("net_pnl", "mean"),
             n_positions=("net_pnl", "size"),
@@ -131,7 +150,7 @@ def simulate_equal_weight_portfolio(
 
     port["equity"] = (1.0 + port["portfolio_ret"]).cumprod()
 
-    sharpe = _annualized_sharpe(port["portfolio_ret"])
+    sharpe = _annualized_sharpe(port["portfolio_ret"], periods_per_year=periods_per_year)
     mdd = _max_drawdown(port["equity"])
 
     out_path = out_dir / "portfolio_daily.csv"
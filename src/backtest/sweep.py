@@ -4,9 +4,16 @@ from dataclasses import dataclass
 from itertools import product
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
-from src.backtest.sim import simulate_equal_weight_portfolio
+from src import tracing
+from src.backtest.rules import CompiledRule, RuleBatch
+from src.storage.dtypes import KEY_COLUMNS
+from src.storage.frame_store import read_table
+
+# Max number of (config x row) cells materialized at once while building masks.
+_MAX_CELLS_PER_CHUNK = 4_000_000
 
 
 @dataclass(frozen=True)
@@ -21,6 +28,42 @@ class SweepRow:
     total_return: float
 
 
+@dataclass(frozen=True)
+class SweepPanel:
+    """
+    Merged table precomputed once for vectorized sweeps.
+
+    Rows are the tradable ticker-days (finite forward return), ordered by date.
+    `features` holds the *previous* row's feature values for the same ticker,
+    i.e. the 1-day execution delay of `simulate_equal_weight_portfolio` is
+    already applied: a signal built from features[name][i] trades ret[i].
+    """
+
+    dates: np.ndarray  # unique dates (str), ascending
+    date_starts: np.ndarray  # first row of each date block
+    features: dict[str, np.ndarray]
+    ret: np.ndarray
+
+    @property
+    def n_rows(self) -> int:
+        return int(len(self.ret))
+
+    @property
+    def n_dates(self) -> int:
+        return int(len(self.dates))
+
+    def head_dates(self, n_dates: int) -> SweepPanel:
+        """Restrict the panel to its first `n_dates` dates (views, no copies)."""
+        n_dates = max(0, min(int(n_dates), self.n_dates))
+        stop = int(self.date_starts[n_dates]) if n_dates < self.n_dates else self.n_rows
+        return SweepPanel(
+            dates=self.dates[:n_dates],
+            date_starts=self.date_starts[:n_dates],
+            features={k: v[:stop] for k, v in self.features.items()},
+            ret=self.ret[:stop],
+        )
+
+
 def _safe_float(x, default=0.0) -> float:
     try:
         return float(x)
@@ -28,64 +71,306 @@ def _safe_float(x, default=0.0) -> float:
         return float(default)
 
 
-def run_sweep(
-    merged_table_path: str | Path,
+def build_sweep_panel(merged_df: pd.DataFrame, ret_col: str = "fwd_ret_1d") -> SweepPanel:
+    """
+    Sort, lag and filter the merged table once (same steps as
+    `simulate_equal_weight_portfolio`, minus the per-config signal build).
+    """
+    df = merged_df.copy()
+    df["ticker"] = df["ticker"].astype(str).str.lower()
+    df["date"] = df["date"].astype(str)
+    df = df.sort_values(["ticker", "date"]).reset_index(drop=True)
+
+    feature_cols = [
+        c
+        for c in df.columns
+        if c not in KEY_COLUMNS and not c.startswith("fwd_ret") and pd.api.types.is_numeric_dtype(df[c])
+    ]
+    lagged = df.groupby("ticker", observed=True)[feature_cols].shift(1)
+
+    ret = pd.to_numeric(df[ret_col], errors="coerce").to_numpy(dtype=float)
+    keep = np.isfinite(ret)
+
+    dates = df["date"].to_numpy()[keep]
+    order = np.argsort(dates, kind="stable")
+    dates = dates[order]
+
+    if len(dates):
+        uniq, starts = np.unique(dates, return_index=True)
+    else:
+        uniq, starts = np.array([], dtype=object), np.array([], dtype=np.int64)
+
+    features = {c: lagged[c].to_numpy(dtype=float)[keep][order] for c in feature_cols}
+    return SweepPanel(
+        dates=uniq,
+        date_starts=starts.astype(np.int64),
+        features=features,
+        ret=ret[keep][order],
+    )
+
+
+def _chunk_size(n_rows: int) -> int:
+    return max(1, _MAX_CELLS_PER_CHUNK // max(1, n_rows))
+
+
+def _threshold_daily_stats(
+    panel: SweepPanel,
+    sent_thresh: np.ndarray,
+    vol_thresh: np.ndarray,
+    min_docs: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Per-date gross PnL sums and position counts for each threshold triple.
+    Returns (gross_sum, counts), both shaped (n_triples, n_dates).
+    """
+    n = len(sent_thresh)
+    gross = np.zeros((n, panel.n_dates), dtype=float)
+    counts = np.zeros((n, panel.n_dates), dtype=np.int64)
+    if panel.n_rows == 0 or n == 0:
+        return gross, counts
+
+    sent = panel.features["avg_compound"]
+    vol = panel.features["volume_z"]
+    docs = panel.features["docs"]
+
+    step = _chunk_size(panel.n_rows)
+    for lo in range(0, n, step):
+        hi = min(lo + step, n)
+        s = sent_thresh[lo:hi, None]
+        gate = (vol[None, :] >= vol_thresh[lo:hi, None]) & (docs[None, :] >= min_docs[lo:hi, None])
+        long_mask = gate & (sent[None, :] >= s)
+        short_mask = gate & (sent[None, :] <= -s)
+        # Short wins ties, exactly like build_signals (it is assigned last).
+        pos = np.where(short_mask, -1.0, long_mask.astype(float))
+        gross[lo:hi], counts[lo:hi] = _position_daily_stats(panel, pos)
+    return gross, counts
+
+
+def _position_daily_stats(panel: SweepPanel, pos: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Per-date gross PnL sums and position counts for (n, n_rows) positions."""
+    gross = np.add.reduceat(pos * panel.ret[None, :], panel.date_starts, axis=1)
+    counts = np.add.reduceat(pos != 0, panel.date_starts, axis=1).astype(np.int64)
+    return gross, counts
+
+
+def _daily_from_stats(gross: np.ndarray, counts: np.ndarray, slip: np.ndarray) -> np.ndarray:
+    active = counts > 0
+    mean_gross = np.where(active, gross / np.maximum(counts, 1), 0.0)
+    return np.where(active, mean_gross - slip[:, None], 0.0)
+
+
+def config_daily_returns(
+    panel: SweepPanel,
+    sent_thresh,
+    vol_thresh,
+    min_docs,
+    slippage_bps,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Equal-weight portfolio return per (config, date) for aligned 1-D config arrays.
+
+    Returns (daily, counts) shaped (n_configs, n_dates). Dates without positions
+    have daily == 0 and counts == 0. Threshold triples shared by several
+    slippage values are only evaluated once.
+    """
+    triples = np.column_stack(
+        [
+            np.asarray(sent_thresh, dtype=float),
+            np.asarray(vol_thresh, dtype=float),
+            np.asarray(min_docs, dtype=float),
+        ]
+    )
+    slip = np.asarray(slippage_bps, dtype=float) / 10000.0
+    if len(triples) == 0:
+        return np.zeros((0, panel.n_dates)), np.zeros((0, panel.n_dates), dtype=np.int64)
+
+    uniq, inverse = np.unique(triples, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    gross, counts = _threshold_daily_stats(panel, uniq[:, 0], uniq[:, 1], uniq[:, 2])
+
+    counts = counts[inverse]
+    return _daily_from_stats(gross[inverse], counts, slip), counts
+
+
+def _rule_daily_stats(panel: SweepPanel, batch: RuleBatch) -> tuple[np.ndarray, np.ndarray]:
+    missing = sorted(batch.columns - panel.features.keys())
+    if missing:
+        raise ValueError(f"Rules reference columns missing from the merged table: {missing}")
+
+    n = len(batch)
+    gross = np.zeros((n, panel.n_dates), dtype=float)
+    counts = np.zeros((n, panel.n_dates), dtype=np.int64)
+    if panel.n_rows == 0 or n == 0:
+        return gross, counts
+
+    signals = batch.evaluate(panel.features, n_rows=panel.n_rows)
+    step = _chunk_size(panel.n_rows)
+    for lo in range(0, n, step):
+        hi = min(lo + step, n)
+        gross[lo:hi], counts[lo:hi] = _position_daily_stats(panel, signals[lo:hi].astype(float))
+    return gross, counts
+
+
+def rule_daily_returns(
+    panel: SweepPanel,
+    rules: list[str | CompiledRule] | RuleBatch,
+    slippage_bps: float = 2.0,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Like `config_daily_returns`, for signal-rule expressions (src/backtest/rules.py).
+
+    Rules are evaluated on the panel's lagged features as one batch, so every
+    subexpression shared between rules is computed once. Returns (daily, counts)
+    shaped (n_rules, n_dates).
+    """
+    batch = rules if isinstance(rules, RuleBatch) else RuleBatch(list(rules))
+    gross, counts = _rule_daily_stats(panel, batch)
+    return _daily_from_stats(gross, counts, np.full(len(batch), slippage_bps / 10000.0)), counts
+
+
+def summarize_daily_returns(
+    daily: np.ndarray, counts: np.ndarray, periods_per_year: float = 252
+) -> dict[str, np.ndarray]:
+    """
+    Trades, annualized Sharpe, max drawdown and total return per config row,
+    using only dates with positions (same conventions as sim.py).
+    """
+    active = counts > 0
+    n_active = active.sum(axis=1)
+    n = np.maximum(n_active, 1)
+
+    mu = daily.sum(axis=1) / n
+    var = np.where(active, (daily - mu[:, None]) ** 2, 0.0).sum(axis=1) / n
+    sd = np.sqrt(var)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sharpe = np.where((n_active >= 2) & (sd > 0), (mu / sd) * (periods_per_year**0.5), 0.0)
+
+    equity = np.cumprod(1.0 + daily, axis=1)
+    running_max = np.maximum.accumulate(np.where(active, equity, 0.0), axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        dd = np.where(active, equity / running_max - 1.0, 0.0)
+    mdd = dd.min(axis=1) if dd.shape[1] else np.zeros(len(dd))
+    total_return = np.where(n_active > 0, equity[:, -1] - 1.0, 0.0) if equity.shape[1] else np.zeros(len(dd))
+
+    return {
+        "trades": counts.sum(axis=1),
+        "sharpe_ann": sharpe,
+        "max_drawdown": mdd,
+        "total_return": total_return,
+    }
+
+
+@tracing.traced(cat="sweep")
+def evaluate_configs(panel: SweepPanel, configs: pd.DataFrame, periods_per_year: float = 252) -> pd.DataFrame:
+    """
+    Evaluate every row of `configs` (sent_thresh, vol_thresh, min_docs, slippage_bps)
+    in memory and return one SweepRow-shaped record per config, in input order.
+    """
+    daily, counts = config_daily_returns(
+        panel,
+        configs["sent_thresh"].to_numpy(),
+        configs["vol_thresh"].to_numpy(),
+        configs["min_docs"].to_numpy(),
+        configs["slippage_bps"].to_numpy(),
+    )
+    stats = summarize_daily_returns(daily, counts, periods_per_year=periods_per_year)
+
+    return pd.DataFrame(
+        {
+            "sent_thresh": configs["sent_thresh"].astype(float).to_numpy(),
+            "vol_thresh": configs["vol_thresh"].astype(float).to_numpy(),
+            "min_docs": configs["min_docs"].astype(int).to_numpy(),
+            "slippage_bps": configs["slippage_bps"].astype(int).to_numpy(),
+            "trades": stats["trades"].astype(int),
+            "sharpe_ann": stats["sharpe_ann"].astype(float),
+            "max_drawdown": stats["max_drawdown"].astype(float),
+            "total_return": stats["total_return"].astype(float),
+        }
+    )
+
+
+def evaluate_rules(
+    panel: SweepPanel,
+    rules: list[str | CompiledRule],
+    slippage_bps_grid=(0, 2, 5),
+    periods_per_year: float = 252,
+) -> pd.DataFrame:
+    """
+    One record per (rule, slippage_bps), rule-major in input order.
+    Signals are evaluated once; slippage only shifts the daily returns.
+    """
+    batch = RuleBatch(list(rules))
+    gross, counts = _rule_daily_stats(panel, batch)
+    n = len(batch)
+
+    bps = np.repeat(np.asarray(slippage_bps_grid, dtype=float)[None, :], n, axis=0).reshape(-1)
+    rows = np.repeat(np.arange(n), len(slippage_bps_grid))
+    daily = _daily_from_stats(gross[rows], counts[rows], bps / 10000.0)
+    stats = summarize_daily_returns(daily, counts[rows], periods_per_year=periods_per_year)
+
+    return pd.DataFrame(
+        {
+            "rule": [batch.rules[i].text for i in rows],
+            "slippage_bps": bps.astype(int),
+            "trades": stats["trades"].astype(int),
+            "sharpe_ann": stats["sharpe_ann"].astype(float),
+            "max_drawdown": stats["max_drawdown"].astype(float),
+            "total_return": stats["total_return"].astype(float),
+        }
+    )
+
+
+def config_grid(
     sent_thresh_grid=(0.02, 0.05, 0.08, 0.10),
     vol_thresh_grid=(0.5, 1.0, 1.5, 2.0),
     min_docs_grid=(5, 10, 20),
     slippage_bps_grid=(0, 2, 5),
 ) -> pd.DataFrame:
-    merged_table_path = Path(merged_table_path)
-    df = pd.read_csv(merged_table_path)
-
-    rows: list[dict] = []
-
-    for sent_thresh, vol_thresh, min_docs, slippage_bps in product(
-        sent_thresh_grid, vol_thresh_grid, min_docs_grid, slippage_bps_grid
-    ):
-        res = simulate_equal_weight_portfolio(
-            merged_df=df,
-            out_dir=Path("report") / "sweep_tmp",  # it will overwrite portfolio_daily.csv each run (fine for now)
-            sent_thresh=float(sent_thresh),
-            vol_thresh=float(vol_thresh),
-            min_docs=int(min_docs),
-            slippage_bps=float(slippage_bps),
-        )
+    return pd.DataFrame(
+        list(product(sent_thresh_grid, vol_thresh_grid, min_docs_grid, slippage_bps_grid)),
+        columns=["sent_thresh", "vol_thresh", "min_docs", "slippage_bps"],
+    )
 
-        port = pd.read_csv(res.out_portfolio_csv)
-        # Some parameter combos might produce a file without 'equity' (e.g., no valid days).
-        # If equity is missing, rebuild it from portfolio_ret.
-        if "equity" not in port.columns:
-            if "portfolio_ret" in port.columns and len(port) > 0:
-                port["equity"] = (1.0 + port["portfolio_ret"].fillna(0.0)).cumprod()
-            else:
-                port["equity"] = []  # empty / no data
-
-        port = port.dropna(subset=["equity"])
-        total_return = float(port["equity"].iloc[-1] - 1.0) if len(port) else 0.0
-
-        rows.append(
-            dict(
-                sent_thresh=float(sent_thresh),
-                vol_thresh=float(vol_thresh),
-                min_docs=int(min_docs),
-                slippage_bps=int(slippage_bps),
-                trades=int(res.n_trades),
-                sharpe_ann=float(res.sharpe_annual),
-                max_drawdown=float(res.max_drawdown),
-                total_return=total_return,
-            )
-        )
 
-    return pd.DataFrame(rows)
+def load_merged_table(merged_table: pd.DataFrame | str | Path) -> pd.DataFrame:
+    if isinstance(merged_table, pd.DataFrame):
+        return merged_table
+    return read_table(Path(merged_table))
+
+
+def run_sweep(
+    merged_table: pd.DataFrame | str | Path,
+    sent_thresh_grid=(0.02, 0.05, 0.08, 0.10),
+    vol_thresh_grid=(0.5, 1.0, 1.5, 2.0),
+    min_docs_grid=(5, 10, 20),
+    slippage_bps_grid=(0, 2, 5),
+    ret_col: str = "fwd_ret_1d",
+    periods_per_year: float = 252,
+) -> pd.DataFrame:
+    """
+    Sweep simulator parameters over the full grid.
+
+    The merged table is sorted and lagged once; all configs are then evaluated
+    as broadcasted masks in memory (no per-config simulate call, no temp files).
+    Results match `simulate_equal_weight_portfolio` config by config.
+    `ret_col` / `periods_per_year` select the bar size (fwd_ret_1b and
+    bars_per_year for intraday tables).
+    """
+    panel = build_sweep_panel(load_merged_table(merged_table), ret_col=ret_col)
+    configs = config_grid(sent_thresh_grid, vol_thresh_grid, min_docs_grid, slippage_bps_grid)
+    return evaluate_configs(panel, configs, periods_per_year=periods_per_year)
 
 
 def write_sweep_report(df: pd.DataFrame, out_csv: Path, out_md: Path) -> None:
     out_csv.parent.mkdir(parents=True, exist_ok=True)
     df.to_csv(out_csv, index=False)
 
+    # Successive-halving output: only full-history survivors are comparable.
+    halving = "rung" in df.columns
+    ranked = df[df["rung"] == df["rung"].max()] if halving else df
+
     # Filter: ignore configs that barely trade (too noisy)
-    df2 = df.copy()
+    df2 = ranked.copy()
     df2["abs_sharpe"] = df2["sharpe_ann"].abs()
     df2 = df2.sort_values(["trades", "abs_sharpe"], ascending=[False, True])
 
@@ -100,6 +385,17 @@ def write_sweep_report(df: pd.DataFrame, out_csv: Path, out_md: Path) -> None:
     lines.append("")
     lines.append(f"- rows_tested: {len(df)}")
     lines.append(f"- trades_range: {int(df['trades'].min())} → {int(df['trades'].max())}")
+    if halving:
+        from src.backtest.search import halving_savings
+
+        saved = halving_savings(df)
+        lines.append("- search: successive halving")
+        lines.append(f"- rungs: {int(df['rung'].max()) + 1}")
+        lines.append(f"- full_history_survivors: {len(ranked)}")
+        lines.append(
+            f"- ticker_days_simulated: {saved['ticker_days_simulated']} "
+            f"(exhaustive: {saved['ticker_days_exhaustive']}, saved: {saved['ticker_days_saved']} / {saved['saved_pct']:.1f}%)"
+        )
     lines.append("")
     lines.append("## Top configs (by trades, then total return)")
     lines.append("")
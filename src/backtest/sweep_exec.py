@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from src import tracing
+from src.backtest.sweep import (
+    SweepPanel,
+    build_sweep_panel,
+    config_grid,
+    evaluate_configs,
+    load_merged_table,
+)
+
+CONFIG_COLS = ["sent_thresh", "vol_thresh", "min_docs", "slippage_bps"]
+
+# Set once per worker process by the pool initializer; shards only carry config rows.
+_WORKER_PANEL: SweepPanel | None = None
+_WORKER_PERIODS: float = 252
+
+
+@dataclass(frozen=True)
+class SweepRunStats:
+    configs_total: int
+    configs_run: int
+    configs_resumed: int
+    elapsed_sec: float
+    configs_per_sec: float
+
+
+def panel_fingerprint(panel: SweepPanel) -> str:
+    """Content hash of the panel, so a checkpoint is never resumed against different data."""
+    h = hashlib.sha1()
+    h.update(np.ascontiguousarray(panel.ret).tobytes())
+    h.update("\n".join(map(str, panel.dates)).encode("utf-8"))
+    for name in sorted(panel.features):
+        h.update(name.encode("utf-8"))
+        h.update(np.ascontiguousarray(panel.features[name]).tobytes())
+    return h.hexdigest()
+
+
+def _config_key(sent_thresh, vol_thresh, min_docs, slippage_bps) -> tuple:
+    return (round(float(sent_thresh), 10), round(float(vol_thresh), 10), int(min_docs), int(slippage_bps))
+
+
+def load_checkpoint(path: Path, fingerprint: str) -> pd.DataFrame:
+    """
+    Read completed configs from an append-only JSONL checkpoint.
+    The first line is a header with the panel fingerprint; a truncated last
+    line (interrupted write) is dropped from the file.
+    """
+    if not path.exists() or path.stat().st_size == 0:
+        return pd.DataFrame()
+
+    raw = path.read_bytes()
+    if not raw.endswith(b"\n"):
+        # Drop the partial record so the next append starts on a fresh line.
+        with path.open("r+b") as f:
+            f.truncate(raw.rfind(b"\n") + 1)
+        if b"\n" not in raw:
+            return pd.DataFrame()
+
+    rows = []
+    with path.open("r", encoding="utf-8") as f:
+        header = json.loads(f.readline() or "{}")
+        if header.get("panel") != fingerprint:
+            raise ValueError(
+                f"Checkpoint {path} was written for a different merged table. Delete it to start a fresh sweep."
+            )
+        for line in f:
+            if line.strip():
+                rows.append(json.loads(line))
+    return pd.DataFrame(rows)
+
+
+def _append_checkpoint(path: Path, df: pd.DataFrame) -> None:
+    lines = "".join(json.dumps(r) + "\n" for r in df.to_dict(orient="records"))
+    with path.open("a", encoding="utf-8") as f:
+        f.write(lines)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _init_worker(panel: SweepPanel, periods_per_year: float = 252) -> None:
+    global _WORKER_PANEL, _WORKER_PERIODS
+    _WORKER_PANEL = panel
+    _WORKER_PERIODS = periods_per_year
+
+
+def _run_shard(configs: pd.DataFrame) -> pd.DataFrame:
+    return evaluate_configs(_WORKER_PANEL, configs, periods_per_year=_WORKER_PERIODS)
+
+
+def _pool_context():
+    # fork shares the parent's panel pages copy-on-write; spawn pickles it once per worker.
+    methods = mp.get_all_start_methods()
+    return mp.get_context("fork" if "fork" in methods else "spawn")
+
+
+@tracing.traced(cat="sweep")
+def run_sweep_parallel(
+    merged_table: pd.DataFrame | str | Path,
+    checkpoint_path: Path | None = None,
+    workers: int = 1,
+    shard_size: int = 256,
+    sent_thresh_grid=(0.02, 0.05, 0.08, 0.10),
+    vol_thresh_grid=(0.5, 1.0, 1.5, 2.0),
+    min_docs_grid=(5, 10, 20),
+    slippage_bps_grid=(0, 2, 5),
+    progress: Callable[[str], None] | None = print,
+    ret_col: str = "fwd_ret_1d",
+    periods_per_year: float = 252,
+) -> tuple[pd.DataFrame, SweepRunStats]:
+    """
+    Sharded, resumable version of `run_sweep`.
+
+    The grid is split into shards of `shard_size` configs and evaluated across
+    `workers` processes. The panel is handed to each worker once (pool
+    initializer), not per shard. Completed shards are appended to
+    `checkpoint_path` (JSONL) and skipped on restart.
+    """
+    panel = build_sweep_panel(load_merged_table(merged_table), ret_col=ret_col)
+    grid = config_grid(sent_thresh_grid, vol_thresh_grid, min_docs_grid, slippage_bps_grid)
+
+    done = pd.DataFrame()
+    if checkpoint_path is not None:
+        checkpoint_path = Path(checkpoint_path)
+        checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        fingerprint = f"{panel_fingerprint(panel)}:{periods_per_year:g}"  # Sharpe depends on the bar size too
+        done = load_checkpoint(checkpoint_path, fingerprint)
+        if not checkpoint_path.exists() or checkpoint_path.stat().st_size == 0:
+            checkpoint_path.write_text(json.dumps({"panel": fingerprint}) + "\n", encoding="utf-8")
+
+    done_keys = {_config_key(*r) for r in done[CONFIG_COLS].itertuples(index=False)} if len(done) else set()
+    todo_mask = [_config_key(*r) not in done_keys for r in grid[CONFIG_COLS].itertuples(index=False)]
+    todo = grid[todo_mask].reset_index(drop=True)
+    shards = [todo.iloc[i : i + shard_size] for i in range(0, len(todo), max(1, shard_size))]
+
+    start = time.perf_counter()
+    results = [done] if len(done) else []
+    n_run = 0
+
+    def _collect(res: pd.DataFrame) -> None:
+        nonlocal n_run
+        if checkpoint_path is not None:
+            _append_checkpoint(checkpoint_path, res)
+        results.append(res)
+        n_run += len(res)
+        if progress is not None:
+            elapsed = time.perf_counter() - start
+            rate = n_run / elapsed if elapsed > 0 else 0.0
+            progress(f"[sweep] {n_run}/{len(todo)} configs ({len(done_keys)} resumed), {rate:,.0f} configs/sec")
+
+    if workers <= 1 or len(shards) <= 1:
+        for shard in shards:
+            _collect(evaluate_configs(panel, shard, periods_per_year=periods_per_year))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=_pool_context(),
+            initializer=_init_worker,
+            initargs=(panel, periods_per_year),
+        ) as pool:
+            futures = [pool.submit(_run_shard, shard) for shard in shards]
+            for fut in as_completed(futures):
+                _collect(fut.result())
+
+    elapsed = time.perf_counter() - start
+    out = (
+        pd.concat(results, ignore_index=True)
+        if results
+        else evaluate_configs(panel, grid, periods_per_year=periods_per_year)
+    )
+
+    # Return rows in grid order regardless of shard completion / resume order.
+    out["_key"] = [_config_key(*r) for r in out[CONFIG_COLS].itertuples(index=False)]
+    order = {_config_key(*r): i for i, r in enumerate(grid[CONFIG_COLS].itertuples(index=False))}
+    out = out[out["_key"].isin(order)].drop_duplicates("_key")
+    out = out.sort_values("_key", key=lambda s: s.map(order)).drop(columns="_key").reset_index(drop=True)
+
+    stats = SweepRunStats(
+        configs_total=len(grid),
+        configs_run=n_run,
+        configs_resumed=len(done_keys),
+        elapsed_sec=round(elapsed, 4),
+        configs_per_sec=round(n_run / elapsed, 2) if elapsed > 0 else 0.0,
+    )
+    return out, stats
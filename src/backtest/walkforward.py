@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src import tracing
+from src.backtest.sweep import (
+    build_sweep_panel,
+    config_daily_returns,
+    config_grid,
+    load_merged_table,
+    summarize_daily_returns,
+)
+
+
+@dataclass(frozen=True)
+class WalkForwardResult:
+    folds: pd.DataFrame  # one row per fold: windows, chosen config, train/test metrics
+    oos_daily: pd.DataFrame  # stitched out-of-sample portfolio (active dates only)
+    n_folds: int
+    oos_trades: int
+    oos_sharpe_ann: float
+    oos_max_drawdown: float
+    oos_total_return: float
+
+
+def fold_windows(n_dates: int, train_days: int, test_days: int, mode: str = "rolling") -> list[tuple[int, int, int, int]]:
+    """
+    (train_start, train_end, test_start, test_end) date-index windows, end-exclusive.
+    Test windows are consecutive and non-overlapping; rolling train windows keep
+    a fixed length, expanding ones always start at the first date.
+    """
+    if mode not in ("rolling", "expanding"):
+        raise ValueError(f"Unknown walk-forward mode: {mode}")
+    windows = []
+    test_start = train_days
+    while test_start < n_dates:
+        test_end = min(test_start + test_days, n_dates)
+        train_start = 0 if mode == "expanding" else test_start - train_days
+        windows.append((train_start, test_start, test_start, test_end))
+        test_start = test_end
+    return windows
+
+
+@tracing.traced(cat="sweep")
+def walk_forward(
+    merged_table: pd.DataFrame | str | Path,
+    configs: pd.DataFrame | None = None,
+    train_days: int = 20,
+    test_days: int = 5,
+    mode: str = "rolling",
+    metric: str = "sharpe_ann",
+    min_trades: int = 1,
+    ret_col: str = "fwd_ret_1d",
+    periods_per_year: float = 252,
+) -> WalkForwardResult:
+    """
+    Walk-forward optimization: in every fold pick the config with the best
+    train-window `metric` (among configs with >= `min_trades` train trades),
+    trade it over the following test window, and stitch the test windows into
+    one out-of-sample return series.
+
+    Per-config daily returns are computed once over the full history; folds
+    only slice columns of that matrix, so cost barely grows with fold count.
+    """
+    panel = build_sweep_panel(load_merged_table(merged_table), ret_col=ret_col)
+    if configs is None:
+        configs = config_grid()
+    configs = configs.reset_index(drop=True)
+
+    daily, counts = config_daily_returns(
+        panel,
+        configs["sent_thresh"].to_numpy(),
+        configs["vol_thresh"].to_numpy(),
+        configs["min_docs"].to_numpy(),
+        configs["slippage_bps"].to_numpy(),
+    )
+
+    fold_rows = []
+    oos_ret = np.zeros(panel.n_dates)
+    oos_counts = np.zeros(panel.n_dates, dtype=np.int64)
+    oos_fold = np.full(panel.n_dates, -1)
+
+    for k, (tr0, tr1, te0, te1) in enumerate(fold_windows(panel.n_dates, train_days, test_days, mode)):
+        train = summarize_daily_returns(daily[:, tr0:tr1], counts[:, tr0:tr1], periods_per_year)
+        score = np.where(train["trades"] >= min_trades, train[metric], -np.inf)
+        if not np.isfinite(score).any():
+            continue
+        best = int(np.argmax(score))
+
+        oos_ret[te0:te1] = daily[best, te0:te1]
+        oos_counts[te0:te1] = counts[best, te0:te1]
+        oos_fold[te0:te1] = k
+        test = summarize_daily_returns(
+            daily[best : best + 1, te0:te1], counts[best : best + 1, te0:te1], periods_per_year
+        )
+
+        fold_rows.append(
+            {
+                "fold": k,
+                "train_start": panel.dates[tr0],
+                "train_end": panel.dates[tr1 - 1],
+                "test_start": panel.dates[te0],
+                "test_end": panel.dates[te1 - 1],
+                **configs.iloc[best].to_dict(),
+                f"train_{metric}": float(train[metric][best]),
+                "train_trades": int(train["trades"][best]),
+                "test_trades": int(test["trades"][0]),
+                "test_total_return": float(test["total_return"][0]),
+            }
+        )
+
+    folds = pd.DataFrame(fold_rows)
+    stats = summarize_daily_returns(oos_ret[None, :], oos_counts[None, :], periods_per_year)
+
+    active = oos_counts > 0
+    oos = pd.DataFrame(
+        {
+            "date": panel.dates[active],
+            "portfolio_ret": oos_ret[active],
+            "n_positions": oos_counts[active],
+            "fold": oos_fold[active],
+        }
+    )
+    oos["equity"] = (1.0 + oos["portfolio_ret"]).cumprod()
+
+    return WalkForwardResult(
+        folds=folds,
+        oos_daily=oos,
+        n_folds=len(folds),
+        oos_trades=int(stats["trades"][0]),
+        oos_sharpe_ann=float(stats["sharpe_ann"][0]),
+        oos_max_drawdown=float(stats["max_drawdown"][0]),
+        oos_total_return=float(stats["total_return"][0]),
+    )
+
+
+def write_walkforward_report(
+    res: WalkForwardResult,
+    out_csv: Path,
+    out_md: Path,
+    train_days: int,
+    test_days: int,
+    mode: str,
+) -> None:
+    out_csv.parent.mkdir(parents=True, exist_ok=True)
+    res.oos_daily.to_csv(out_csv, index=False)
+
+    lines = [
+        "# Walk-Forward Optimization (Out-of-Sample)",
+        "",
+        "Each fold picks the best sweep config on the train window and trades it on the next test window.",
+        "",
+        f"- mode: {mode} (train_days={train_days}, test_days={test_days})",
+        f"- folds: {res.n_folds}",
+        f"- oos_trades: {res.oos_trades}",
+        f"- oos_total_return: {res.oos_total_return:.4f}",
+        f"- oos_sharpe_ann: {res.oos_sharpe_ann:.4f}",
+        f"- oos_max_drawdown: {res.oos_max_drawdown:.4f}",
+        "",
+        "## Folds",
+        "",
+    ]
+    if res.folds.empty:
+        lines.append("No folds: history is shorter than train_days + 1 dates.")
+    else:
+        lines.append(
+            "| fold | train | test | sent_thresh | vol_thresh | min_docs | slippage_bps | train_trades | test_trades | test_total_return |"
+        )
+        lines.append("|---:|---|---|---:|---:|---:|---:|---:|---:|---:|")
+        for _, r in res.folds.iterrows():
+            lines.append(
+                f"| {int(r['fold'])} | {r['train_start']} → {r['train_end']} | {r['test_start']} → {r['test_end']} | "
+                f"{r['sent_thresh']:.2f} | {r['vol_thresh']:.1f} | {int(r['min_docs'])} | {int(r['slippage_bps'])} | "
+                f"{int(r['train_trades'])} | {int(r['test_trades'])} | {r['test_total_return']:.4f} |"
+            )
+    lines.append("")
+    lines.append(f"Out-of-sample daily returns: {out_csv}")
+    lines.append("")
+
+    out_md.write_text("\n".join(lines), encoding="utf-8")
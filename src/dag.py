@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+from src import instrument
+
+STATE_VERSION = 1
+
+
+def _no_paths(ctx: Any) -> list[Path]:
+    return []
+
+
+def _no_params(ctx: Any) -> dict:
+    return {}
+
+
+@dataclass(frozen=True)
+class Stage:
+    """
+    One node of the pipeline graph.
+
+    `inputs`, `outputs` and `params` are functions of the run context. A stage
+    is skipped when the content hash of its inputs plus its params matches the
+    last successful run and all of its outputs still exist. `source` stages
+    (network fetches) always run; their own caches decide what is fresh.
+    `deps` only orders stages and names the upstream results a stage may take
+    from memory (`ctx.results`) instead of reloading them.
+    """
+
+    name: str
+    run: Callable[[Any], Any]
+    deps: tuple[str, ...] = ()
+    inputs: Callable[[Any], list[Path]] = _no_paths
+    outputs: Callable[[Any], list[Path]] = _no_paths
+    params: Callable[[Any], dict] = _no_params
+    source: bool = False
+
+
+@dataclass(frozen=True)
+class StageRun:
+    name: str
+    status: str  # "ran" or "skipped"
+    key: str
+    seconds: float
+
+
+class FileHasher:
+    """
+    sha256 of file contents, memoized on (size, mtime_ns) so files that have
+    not been touched since the last run are not read again.
+    """
+
+    def __init__(self, memo: dict | None = None):
+        self.memo: dict[str, list] = dict(memo or {})
+
+    def file(self, path: Path) -> str:
+        st = path.stat()
+        hit = self.memo.get(str(path))
+        if hit and hit[0] == st.st_size and hit[1] == st.st_mtime_ns:
+            return hit[2]
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        self.memo[str(path)] = [st.st_size, st.st_mtime_ns, digest]
+        return digest
+
+    def path(self, path: Path) -> str:
+        """Digest of a file, of every file under a directory, or 'missing'."""
+        path = Path(path)
+        if path.is_dir():
+            h = hashlib.sha256()
+            for p in sorted(q for q in path.rglob("*") if q.is_file()):
+                h.update(f"{p.relative_to(path).as_posix()}:{self.file(p)}\n".encode("utf-8"))
+            return h.hexdigest()
+        if path.exists():
+            return self.file(path)
+        return "missing"
+
+
+class StageGraph:
+    """Runs named stages in dependency order, skipping the ones whose inputs are unchanged."""
+
+    def __init__(self, stages: list[Stage], state_path: Path):
+        self.stages = {s.name: s for s in stages}
+        for s in stages:
+            unknown = [d for d in s.deps if d not in self.stages]
+            if unknown:
+                raise ValueError(f"Stage {s.name!r} depends on unknown stages {unknown}")
+        self.state_path = Path(state_path)
+
+    def order(self, targets: list[str]) -> list[str]:
+        """`targets` in topological order (deps outside `targets` are not added; they are read from disk)."""
+        unknown = [t for t in targets if t not in self.stages]
+        if unknown:
+            raise ValueError(f"Unknown stages {unknown}")
+        wanted, out, seen = set(targets), [], set()
+
+        def visit(name: str, path: tuple[str, ...]) -> None:
+            if name in path:
+                raise ValueError(f"Stage cycle: {' -> '.join((*path, name))}")
+            if name in seen:
+                return
+            for d in self.stages[name].deps:
+                visit(d, (*path, name))
+            seen.add(name)
+            if name in wanted:
+                out.append(name)
+
+        for t in targets:
+            visit(t, ())
+        return out
+
+    def stage_key(self, stage: Stage, ctx: Any, hasher: FileHasher) -> str:
+        payload = {
+            "stage": stage.name,
+            "params": stage.params(ctx),
+            "inputs": {str(p): hasher.path(p) for p in stage.inputs(ctx)},
+        }
+        blob = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha256(blob).hexdigest()
+
+    def _load_state(self) -> dict:
+        try:
+            state = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return {"version": STATE_VERSION, "stages": {}, "files": {}}
+        if state.get("version") != STATE_VERSION:
+            return {"version": STATE_VERSION, "stages": {}, "files": {}}
+        return state
+
+    def _save_state(self, state: dict, hasher: FileHasher) -> None:
+        state["files"] = hasher.memo
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_name(self.state_path.name + ".tmp")
+        tmp.write_text(json.dumps(state, indent=1, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.state_path)
+
+    def run(self, targets: list[str], ctx: Any, force: bool = False) -> list[StageRun]:
+        """
+        Run `targets`. Each stage's return value is stored in `ctx.results[name]`
+        for downstream stages. State is saved after every stage, so an aborted
+        run keeps the stages that finished.
+        """
+        state = self._load_state()
+        hasher = FileHasher(state.get("files"))
+        runs = []
+        for name in self.order(targets):
+            stage = self.stages[name]
+            key = "" if stage.source else self.stage_key(stage, ctx, hasher)
+            prev = state["stages"].get(name)
+            if (
+                not force
+                and not stage.source
+                and prev is not None
+                and prev.get("key") == key
+                and all(Path(p).exists() for p in stage.outputs(ctx))
+            ):
+                print(f"[{name}] up to date ({key[:12]}), skipped")
+                instrument.skipped(name)
+                runs.append(StageRun(name, "skipped", key, 0.0))
+                continue
+
+            if state["stages"].pop(name, None) is not None:
+                self._save_state(state, hasher)  # a failed re-run must not leave the old key behind
+            t0 = time.perf_counter()
+            with instrument.step(name):
+                ctx.results[name] = stage.run(ctx)
+            seconds = time.perf_counter() - t0
+            runs.append(StageRun(name, "ran", key, seconds))
+            if not stage.source:
+                state["stages"][name] = {
+                    "key": key,
+                    "outputs": [str(p) for p in stage.outputs(ctx)],
+                    "seconds": round(seconds, 4),
+                }
+                self._save_state(state, hasher)
+        return runs
@@ -5,9 +5,14 @@ from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List
 
+import numpy as np
 import pandas as pd
 
+from src import tracing
 from src.features.sentiment import score_title
+from src.features.sessions import SessionIndex, bucket_ids, bucket_labels, parse_timestamps_ns
+from src.storage.dtypes import apply_dtype_policy
+from src.storage.frame_store import write_table
 
 
 @dataclass(frozen=True)
@@ -15,6 +20,7 @@ class FeatureBuildResult:
     rows_written: int
     unique_days: int
     path: Path
+    unmapped: int = 0  # articles without a parseable date / known session, left out
 
 
 def _to_date(seendate: str) -> str:
@@ -50,12 +56,62 @@ def _to_date(seendate: str) -> str:
         return ""
 
 
-def articles_to_daily_features(ticker: str, articles: List[Dict[str, Any]]) -> pd.DataFrame:
+def burst_zscore(groups: np.ndarray, docs: np.ndarray, window: int = 5, min_periods: int = 2) -> np.ndarray:
+    """
+    z-score of each row's doc count vs the trailing `window` rows (inclusive,
+    population std) of the same group, for rows already sorted by group.
+    All groups at once from cumulative sums; the variance numerator
+    n*sum(x^2) - sum(x)^2 is exact integer arithmetic. 0 where the window has
+    fewer than `min_periods` rows or no variance.
+    """
+    n_rows = len(docs)
+    if n_rows == 0:
+        return np.zeros(0)
+    x = np.asarray(docs, dtype=np.int64)
+    rows = np.arange(n_rows)
+    new_group = np.r_[True, groups[1:] != groups[:-1]]
+    group_start = np.maximum.accumulate(np.where(new_group, rows, 0))
+    lo = np.maximum(rows - window + 1, group_start)
+
+    c1 = np.r_[0, np.cumsum(x)]
+    c2 = np.r_[0, np.cumsum(x * x)]
+    n = rows + 1 - lo
+    s1 = c1[rows + 1] - c1[lo]
+    s2 = c2[rows + 1] - c2[lo]
+    num = n * s2 - s1 * s1  # = n^2 * var
+
+    ok = (n >= min_periods) & (num > 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = (n * x - s1) / np.sqrt(num.astype(float))
+    return np.where(ok, z, 0.0)
+
+
+def articles_to_daily_features(
+    ticker: str,
+    articles: List[Dict[str, Any]],
+    sessions: SessionIndex | None = None,
+    bucket_minutes: int | None = None,
+) -> pd.DataFrame:
+    """
+    One scored row per article. `date` is the calendar date of `seendate`;
+    with `sessions`, the trading session the article is effective for; with
+    `bucket_minutes`, the UTC start of its N-minute bucket ('YYYY-MM-DD HH:MM').
+    """
+    if sessions is not None and bucket_minutes:
+        raise ValueError("Use either session alignment or intraday buckets, not both.")
+    titles = [a.get("title", "") or "" for a in articles]
+    seendates = [a.get("seendate", "") or "" for a in articles]
+    if not seendates:
+        days = []
+    elif sessions is not None:
+        days = sessions.session_dates(parse_timestamps_ns(seendates))
+    elif bucket_minutes:
+        days = bucket_labels(bucket_ids(parse_timestamps_ns(seendates), bucket_minutes), bucket_minutes)
+    else:
+        days = [_to_date(sd) for sd in seendates]
+
     rows = []
-    for a in articles:
-        title = a.get("title", "") or ""
-        seendate = a.get("seendate", "") or ""
-        day = _to_date(seendate)
+    for title, day in zip(titles, days):
         if not day:
             continue
 
@@ -79,21 +135,32 @@ def articles_to_daily_features(ticker: str, articles: List[Dict[str, Any]]) -> p
     return df
 
 
+@tracing.traced(cat="features")
 def build_and_save_daily_features(
     ticker_to_articles: Dict[str, List[Dict[str, Any]]],
     out_path: Path,
+    sessions: SessionIndex | None = None,
+    bucket_minutes: int | None = None,
+    csv_copy: Path | None = None,
 ) -> FeatureBuildResult:
     """
-    Produces daily aggregated features and writes to CSV.
-    Also adds a simple 'volume_z' burst score per ticker.
+    Produces daily aggregated features and writes them to `out_path`
+    (typed .frame or CSV by suffix; `csv_copy` adds a readable CSV export).
+    Also adds a simple 'volume_z' burst score per ticker. The table is stored
+    with the lean dtype policy (categorical keys, int32 day/docs, float32 features).
+
+    With `sessions`, articles are keyed by effective trading session instead
+    of calendar day, so every row lines up with a price date. With
+    `bucket_minutes`, rows are N-minute bars and volume_z is computed over bars.
     """
     all_rows = []
     for t, articles in ticker_to_articles.items():
-        all_rows.append(articles_to_daily_features(t, articles))
+        with tracing.span("score_ticker", cat="features", args={"ticker": t, "articles": len(articles)}):
+            all_rows.append(articles_to_daily_features(t, articles, sessions=sessions, bucket_minutes=bucket_minutes))
 
+    n_articles = sum(len(a) for a in ticker_to_articles.values())
     if not all_rows:
-        out_path.parent.mkdir(parents=True, exist_ok=True)
-        pd.DataFrame().to_csv(out_path, index=False)
+        write_table(pd.DataFrame(), out_path, csv_copy=csv_copy)
         return FeatureBuildResult(rows_written=0, unique_days=0, path=out_path)
 
     raw = pd.concat(all_rows, ignore_index=True)
@@ -110,20 +177,15 @@ def build_and_save_daily_features(
         .reset_index(drop=True)
     )
 
-    # Burst feature: z-score of docs vs rolling 5-day mean/std (per ticker)
-    daily["volume_z"] = 0.0
-    for t, g in daily.groupby("ticker", as_index=False):
-        idx = g.index
-        roll_mean = g["docs"].rolling(window=5, min_periods=2).mean()
-        roll_std = g["docs"].rolling(window=5, min_periods=2).std(ddof=0)
-        z = (g["docs"] - roll_mean) / roll_std.replace(0, pd.NA)
-        daily.loc[idx, "volume_z"] = z.fillna(0.0).astype(float)
+    # Burst feature: z-score of docs vs rolling 5-row mean/std (per ticker)
+    daily["volume_z"] = burst_zscore(daily["ticker"].to_numpy(), daily["docs"].to_numpy(), window=5, min_periods=2)
+    daily = apply_dtype_policy(daily)
 
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    daily.to_csv(out_path, index=False)
+    write_table(daily, out_path, csv_copy=csv_copy)
 
     return FeatureBuildResult(
         rows_written=len(daily),
         unique_days=int(daily["date"].nunique()) if len(daily) else 0,
         path=out_path,
+        unmapped=n_articles - len(raw),
     )
@@ -1,10 +1,15 @@
 from dataclasses import dataclass
-
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+from functools import lru_cache
 
 from src.features.text_cleaning import clean_text
 
-_analyzer = SentimentIntensityAnalyzer()
+
+@lru_cache(maxsize=1)
+def get_analyzer():
+    """The shared VADER analyzer, built (and its lexicon loaded) on first use."""
+    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+    return SentimentIntensityAnalyzer()
 
 
 @dataclass(frozen=True)
@@ -25,7 +30,7 @@ def score_title(title: str) -> SentimentScore:
     if not t:
         return SentimentScore(compound=0.0, pos=0.0, neu=1.0, neg=0.0)
 
-    s = _analyzer.polarity_scores(t)
+    s = get_analyzer().polarity_scores(t)
     return SentimentScore(
         compound=float(s["compound"]),
         pos=float(s["pos"]),
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CUTOFF = "16:00"
+DEFAULT_TZ = "America/New_York"
+# Weekdays appended after the last priced session, so news newer than the price
+# cache still lands on the session it will trade in (holidays are not known there).
+FUTURE_SESSIONS = 5
+
+
+@dataclass(frozen=True)
+class SessionIndex:
+    """
+    Trading sessions from the price calendar, built once.
+
+    `cutoffs_ns[i]` is the UTC epoch-ns of session i's cutoff (e.g. the 16:00
+    New York close). A timestamp belongs to the first session whose cutoff is
+    strictly after it, so weekend, holiday and after-close news roll forward
+    to the next session the market can react in. The last `n_projected`
+    sessions are weekdays past the price calendar. Timestamps at or before
+    `start_ns`, the cutoff of the weekday before the first session, predate
+    the calendar and are unmapped rather than piled into session 0.
+    """
+
+    sessions: np.ndarray  # (S,) datetime64[D], ascending
+    cutoffs_ns: np.ndarray  # (S,) int64
+    cutoff: str = DEFAULT_CUTOFF
+    tz: str = DEFAULT_TZ
+    n_projected: int = 0
+    start_ns: int = np.iinfo(np.int64).min
+
+    def __len__(self) -> int:
+        return int(len(self.sessions))
+
+    def locate(self, ts_ns: np.ndarray) -> np.ndarray:
+        """Session index per int64 UTC timestamp; -1 if unparsed, before the calendar or after its last session."""
+        ts_ns = np.asarray(ts_ns, dtype=np.int64)
+        idx = np.searchsorted(self.cutoffs_ns, ts_ns, side="right")
+        bad = (idx >= len(self.cutoffs_ns)) | (ts_ns <= self.start_ns)  # NaT is int64 min
+        return np.where(bad, -1, idx)
+
+    def session_dates(self, ts_ns: np.ndarray) -> np.ndarray:
+        """ISO session date per timestamp ('' where unmapped)."""
+        idx = self.locate(ts_ns)
+        labels = np.asarray(pd.DatetimeIndex(self.sessions).strftime("%Y-%m-%d"), dtype=object)
+        return np.where(idx >= 0, labels[np.maximum(idx, 0)] if len(labels) else "", "")
+
+
+def build_session_index(
+    dates, cutoff: str = DEFAULT_CUTOFF, tz: str = DEFAULT_TZ, future_sessions: int = FUTURE_SESSIONS
+) -> SessionIndex:
+    """
+    SessionIndex from any iterable of trading dates (duplicates are fine),
+    extended by `future_sessions` weekdays after the last one. News before the
+    close of the weekday preceding the first date is left unmapped.
+    """
+    days = np.unique(pd.to_datetime(pd.Index(dates), errors="coerce").dropna().to_numpy().astype("datetime64[D]"))
+    n_projected = future_sessions if len(days) else 0
+    if n_projected:
+        days = np.concatenate([days, np.busday_offset(days[-1], np.arange(1, n_projected + 1), roll="forward")])
+    hh_mm_ss = cutoff if cutoff.count(":") == 2 else f"{cutoff}:00"
+    lead = np.busday_offset(days[:1], -1, roll="backward")  # the session before the calendar starts
+    local = pd.DatetimeIndex(np.concatenate([lead, days])) + pd.Timedelta(hh_mm_ss)
+    cutoffs = local.tz_localize(tz).tz_convert("UTC").asi8.astype(np.int64)
+    return SessionIndex(
+        sessions=days,
+        cutoffs_ns=cutoffs[1:],
+        cutoff=cutoff,
+        tz=tz,
+        n_projected=n_projected,
+        start_ns=int(cutoffs[0]) if len(days) else np.iinfo(np.int64).min,
+    )
+
+
+def session_index_from_prices(
+    cache_dir: Path,
+    tickers: list[str] | None = None,
+    cutoff: str = DEFAULT_CUTOFF,
+    tz: str = DEFAULT_TZ,
+) -> SessionIndex:
+    """Union of the trading dates found in the cached price CSVs (all of them if `tickers` is None)."""
+    paths = (
+        [cache_dir / f"{t.lower()}.csv" for t in tickers] if tickers is not None else sorted(cache_dir.glob("*.csv"))
+    )
+    dates = []
+    for p in paths:
+        if p.exists():
+            dates.append(pd.read_csv(p, usecols=["Date"])["Date"])
+    if not dates:
+        raise FileNotFoundError(f"No cached prices in {cache_dir} to build a session calendar from.")
+    return build_session_index(pd.concat(dates, ignore_index=True), cutoff=cutoff, tz=tz)
+
+
+def parse_timestamps_ns(values) -> np.ndarray:
+    """
+    Vectorized parse of article timestamps to int64 UTC epoch-ns (NaT -> int64 min).
+    Handles GDELT's 20251227T143000Z, compact YYYYMMDDHHMMSS and ISO strings;
+    naive times are taken as UTC.
+    """
+    s = pd.Series(values, dtype="object").astype(str).str.strip()
+    out = pd.to_datetime(s, format="%Y%m%dT%H%M%SZ", utc=True, errors="coerce")
+    todo = out.isna()
+    if todo.any():
+        out[todo] = pd.to_datetime(s[todo], format="%Y%m%d%H%M%S", utc=True, errors="coerce")
+        todo = out.isna()
+    if todo.any():
+        out[todo] = pd.to_datetime(s[todo], format="mixed", utc=True, errors="coerce")
+    return pd.DatetimeIndex(out).asi8
+
+
+def bucket_ids(ts_ns: np.ndarray, bucket_minutes: int) -> np.ndarray:
+    """Integer N-minute bucket id per UTC epoch-ns timestamp (NaT -> -1)."""
+    ts_ns = np.asarray(ts_ns, dtype=np.int64)
+    ids = ts_ns // (int(bucket_minutes) * 60 * 1_000_000_000)
+    return np.where(ts_ns == np.iinfo(np.int64).min, -1, ids)
+
+
+def bucket_labels(ids: np.ndarray, bucket_minutes: int) -> np.ndarray:
+    """'YYYY-MM-DD HH:MM' (UTC bucket start) per bucket id; sorts like the ids. -1 -> ''."""
+    ids = np.asarray(ids, dtype=np.int64)
+    starts = pd.to_datetime(np.maximum(ids, 0) * int(bucket_minutes) * 60, unit="s")
+    return np.where(ids >= 0, np.asarray(starts.strftime("%Y-%m-%d %H:%M"), dtype=object), "")
+
+
+def label_bucket_ids(labels, bucket_minutes: int) -> np.ndarray:
+    """Inverse of `bucket_labels` (unparseable -> -1)."""
+    ts = pd.DatetimeIndex(pd.to_datetime(pd.Series(labels, dtype="object"), utc=True, errors="coerce")).asi8
+    return bucket_ids(ts, bucket_minutes)
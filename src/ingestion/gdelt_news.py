@@ -5,8 +5,9 @@ from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Any, Dict, List, Tuple
+from urllib.parse import quote
 
-import requests
+from src import instrument, tracing
 
 
 @dataclass(frozen=True)
@@ -48,7 +49,41 @@ def build_gdelt_doc_url(
     }
 
     # Encode query params safely
-    return base + "?" + "&".join(f"{k}={requests.utils.quote(v)}" for k, v in params.items())
+    return base + "?" + "&".join(f"{k}={quote(v)}" for k, v in params.items())
+
+
+def news_cache_path(key: str, cache_dir: Path, lookback_days: int = 7, max_records: int = 250) -> Path:
+    """Cache file for one query; the name includes key + lookback window + record cap."""
+    safe_key = key.strip().lower().replace("/", "_")
+    return cache_dir / f"{safe_key}_{lookback_days}d_{max_records}r.json"
+
+
+def fetch_gdelt_payload(
+    key: str,
+    query: str,
+    start_dt: datetime,
+    end_dt: datetime,
+    max_records: int = 250,
+    timeout_sec: int = 30,
+) -> Any:
+    """One uncached GDELT request for articles seen in [start_dt, end_dt]; returns the parsed JSON payload."""
+    url = build_gdelt_doc_url(query=query, start_dt=start_dt, end_dt=end_dt, max_records=max_records)
+
+    import requests  # imported on the first real request, so cache-hit runs never load it
+
+    instrument.count(instrument.HTTP_REQUESTS)
+    with tracing.span("gdelt_get", cat="ingestion", args={"key": key}):
+        resp = requests.get(url, timeout=timeout_sec)
+    resp.raise_for_status()
+
+    content_type = resp.headers.get("Content-Type", "")
+    if "json" not in content_type.lower():
+        snippet = (resp.text or "")[:300]
+        raise ValueError(
+            f"GDELT returned non-JSON (status={resp.status_code}, content_type='{content_type}'). "
+            f"First 300 chars: {snippet!r}"
+        )
+    return resp.json()
 
 
 def load_or_download_gdelt_articles(
@@ -68,37 +103,22 @@ def load_or_download_gdelt_articles(
     """
     cache_dir.mkdir(parents=True, exist_ok=True)
 
-    # Cache file name includes key + lookback window
-    safe_key = key.strip().lower().replace("/", "_")
-    cache_path = cache_dir / f"{safe_key}_{lookback_days}d_{max_records}r.json"
+    cache_path = news_cache_path(key, cache_dir, lookback_days=lookback_days, max_records=max_records)
 
     # Cache hit: file exists + non-empty
     if cache_path.exists() and cache_path.stat().st_size > 0:
         payload = json.loads(cache_path.read_text(encoding="utf-8"))
         articles = payload.get("articles", []) if isinstance(payload, dict) else []
+        instrument.count(instrument.CACHE_HITS)
         return articles, NewsIngestResult(
             key=key, docs=len(articles), cache_hit=True, path=cache_path
         )
 
+    instrument.count(instrument.CACHE_MISSES)
+
     end_dt = _utc_now()
     start_dt = end_dt - timedelta(days=lookback_days)
-
-    url = build_gdelt_doc_url(
-        query=query, start_dt=start_dt, end_dt=end_dt, max_records=max_records
-    )
-
-    resp = requests.get(url, timeout=timeout_sec)
-    resp.raise_for_status()
-
-    content_type = resp.headers.get("Content-Type", "")
-    if "json" not in content_type.lower():
-        snippet = (resp.text or "")[:300]
-        raise ValueError(
-            f"GDELT returned non-JSON (status={resp.status_code}, content_type='{content_type}'). "
-            f"First 300 chars: {snippet!r}"
-        )
-
-    payload = resp.json()
+    payload = fetch_gdelt_payload(key, query, start_dt, end_dt, max_records=max_records, timeout_sec=timeout_sec)
 
     # Cache raw payload for reproducibility
     cache_path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
@@ -6,6 +6,8 @@ from typing import Tuple
 
 import pandas as pd
 
+from src import instrument, tracing
+
 
 @dataclass(frozen=True)
 class PriceIngestResult:
@@ -38,10 +40,14 @@ def load_or_download_daily_prices(
     if cache_path.exists() and cache_path.stat().st_size > 0:
         df = pd.read_csv(cache_path)
         df = _clean_prices_df(df)
+        instrument.count(instrument.CACHE_HITS)
         return df, PriceIngestResult(ticker=ticker, rows=len(df), cache_hit=True, path=cache_path)
 
+    instrument.count(instrument.CACHE_MISSES)
+    instrument.count(instrument.HTTP_REQUESTS)
     url = stooq_daily_url(ticker)
-    df = pd.read_csv(url)
+    with tracing.span("stooq_get", cat="ingestion", args={"ticker": ticker}):
+        df = pd.read_csv(url)
     df = _clean_prices_df(df)
 
     # Cache to disk
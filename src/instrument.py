@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import csv
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator
+
+from src import tracing
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Counters the ingestion code reports; anything else passed to count() is kept too.
+HTTP_REQUESTS = "http_requests"
+CACHE_HITS = "cache_hits"
+CACHE_MISSES = "cache_misses"
+
+
+def peak_rss_mb() -> float | None:
+    """Peak resident set size of this process so far (None where unsupported)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KiB elsewhere
+
+
+@dataclass
+class StepRecord:
+    name: str  # "simulate", or "simulate/monte_carlo" for a sub-step
+    status: str = "ran"
+    seconds: float = 0.0
+    rows_in: int | None = None
+    rows_out: int | None = None
+    peak_heap_mb: float | None = None
+    peak_rss_mb: float | None = None
+    counters: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def rows_per_sec(self) -> float | None:
+        rows = self.rows_out if self.rows_out is not None else self.rows_in
+        if rows is None or self.seconds <= 0:
+            return None
+        return rows / self.seconds
+
+
+class Instrumentation:
+    """
+    Collects one StepRecord per stage and sub-step of a run.
+
+    Steps nest: counters and heap peaks of a sub-step also count towards the
+    enclosing steps. The Python heap peak comes from tracemalloc, which slows
+    allocation-heavy stages several-fold, so it is opt-in (`trace_heap`).
+
+    Each step is also a trace span when tracing is on.
+    """
+
+    def __init__(self, trace_heap: bool = False):
+        self.trace_heap = trace_heap
+        self.records: list[StepRecord] = []
+        self.totals: dict[str, int] = {}
+        self._stack: list[tuple[StepRecord, float]] = []  # (record, running heap peak in bytes)
+        self._started_tracing = False
+        self._t0 = time.perf_counter()
+
+    def start(self) -> None:
+        self._t0 = time.perf_counter()
+        if self.trace_heap and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    def stop(self) -> None:
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._t0
+
+    @contextmanager
+    def step(self, name: str) -> Iterator[StepRecord]:
+        rec = StepRecord(name=f"{self._stack[-1][0].name}/{name}" if self._stack else name)
+        self.records.append(rec)
+        heap_tracing = tracemalloc.is_tracing()
+        if heap_tracing:
+            if self._stack:  # keep the parent's peak before resetting the shared counter
+                parent, peak = self._stack[-1]
+                self._stack[-1] = (parent, max(peak, tracemalloc.get_traced_memory()[1]))
+            tracemalloc.reset_peak()
+        self._stack.append((rec, 0.0))
+        t0 = time.perf_counter()
+        try:
+            with tracing.span(rec.name, cat="step" if len(self._stack) > 1 else "stage"):
+                yield rec
+        finally:
+            rec.seconds = time.perf_counter() - t0
+            _, peak = self._stack.pop()
+            if heap_tracing and tracemalloc.is_tracing():
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+                rec.peak_heap_mb = peak / (1024 * 1024)
+                if self._stack:
+                    parent, parent_peak = self._stack[-1]
+                    self._stack[-1] = (parent, max(parent_peak, peak))
+            rec.peak_rss_mb = peak_rss_mb()
+
+    def skipped(self, name: str) -> StepRecord:
+        rec = StepRecord(name=name, status="skipped", peak_rss_mb=peak_rss_mb())
+        self.records.append(rec)
+        return rec
+
+    def count(self, key: str, n: int = 1) -> None:
+        self.totals[key] = self.totals.get(key, 0) + n
+        for rec, _ in self._stack:
+            rec.counters[key] = rec.counters.get(key, 0) + n
+
+    def rows(self, rows_in: int | None = None, rows_out: int | None = None) -> None:
+        """Row counts for the innermost open step."""
+        if not self._stack:
+            return
+        rec = self._stack[-1][0]
+        if rows_in is not None:
+            rec.rows_in = int(rows_in)
+        if rows_out is not None:
+            rec.rows_out = int(rows_out)
+
+    def cache_hit_rate_pct(self) -> float | None:
+        lookups = self.totals.get(CACHE_HITS, 0) + self.totals.get(CACHE_MISSES, 0)
+        return round(100.0 * self.totals.get(CACHE_HITS, 0) / lookups, 2) if lookups else None
+
+    def peak_heap_mb(self) -> float | None:
+        peaks = [r.peak_heap_mb for r in self.records if r.peak_heap_mb is not None]
+        return max(peaks) if peaks else None
+
+    def summary_table(self) -> str:
+        head = f"{'step':<28} {'status':<8} {'sec':>8} {'rows_in':>9} {'rows_out':>9} {'rows/s':>10} {'heap_MB':>8} {'rss_MB':>8} {'http':>5} {'cache':>7}"
+        lines = [head, "-" * len(head)]
+
+        def fmt(v, spec: str) -> str:
+            return "" if v is None else format(v, spec)
+
+        for r in self.records:
+            hits, misses = r.counters.get(CACHE_HITS, 0), r.counters.get(CACHE_MISSES, 0)
+            cache = f"{hits}/{hits + misses}" if hits + misses else ""
+            lines.append(
+                f"{r.name:<28} {r.status:<8} {r.seconds:>8.3f} {fmt(r.rows_in, 'd'):>9} {fmt(r.rows_out, 'd'):>9} "
+                f"{fmt(r.rows_per_sec, ',.0f'):>10} {fmt(r.peak_heap_mb, '.1f'):>8} {fmt(r.peak_rss_mb, '.1f'):>8} "
+                f"{r.counters.get(HTTP_REQUESTS, 0) or '':>5} {cache:>7}"
+            )
+        return "\n".join(lines)
+
+
+STEP_COLUMNS = [
+    "run_id",
+    "step",
+    "status",
+    "seconds",
+    "rows_in",
+    "rows_out",
+    "rows_per_sec",
+    "peak_heap_mb",
+    "peak_rss_mb",
+    "http_requests",
+    "cache_hits",
+    "cache_misses",
+]
+
+
+def _round(v: float | None, nd: int = 4):
+    return None if v is None else round(v, nd)
+
+
+def step_rows(inst: Instrumentation, run_id: str) -> list[dict]:
+    """One row per step of this run (None where a step did not report a value)."""
+    return [
+        {
+            "run_id": run_id,
+            "step": r.name,
+            "status": r.status,
+            "seconds": _round(r.seconds),
+            "rows_in": r.rows_in,
+            "rows_out": r.rows_out,
+            "rows_per_sec": _round(r.rows_per_sec, 1),
+            "peak_heap_mb": _round(r.peak_heap_mb, 2),
+            "peak_rss_mb": _round(r.peak_rss_mb, 1),
+            "http_requests": r.counters.get(HTTP_REQUESTS, 0),
+            "cache_hits": r.counters.get(CACHE_HITS, 0),
+            "cache_misses": r.counters.get(CACHE_MISSES, 0),
+        }
+        for r in inst.records
+    ]
+
+
+def write_step_metrics(inst: Instrumentation, run_id: str, out_path: Path) -> Path:
+    """Append one row per step of this run (blank cells for missing values)."""
+    return append_csv_rows(step_rows(inst, run_id), out_path, STEP_COLUMNS)
+
+
+def append_csv_rows(rows: list[dict], out_path: Path, columns: list[str]) -> Path:
+    """
+    Append rows to a CSV, adding any new columns to the header (older rows get
+    blanks). Existing rows are rewritten only when the header grows.
+    """
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    if out_path.exists() and out_path.stat().st_size > 0:
+        with open(out_path, newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            header = list(reader.fieldnames or [])
+            missing = [c for c in columns if c not in header]
+            old = list(reader) if missing else None
+        if missing:
+            header += missing
+            with open(out_path, "w", newline="", encoding="utf-8") as f:
+                w = csv.DictWriter(f, fieldnames=header)
+                w.writeheader()
+                w.writerows(old)
+    else:
+        header = list(columns)
+        with open(out_path, "w", newline="", encoding="utf-8") as f:
+            csv.DictWriter(f, fieldnames=header).writeheader()
+    with open(out_path, "a", newline="", encoding="utf-8") as f:
+        csv.DictWriter(f, fieldnames=header, extrasaction="ignore").writerows(rows)
+    return out_path
+
+
+# The run's collector, so ingestion and backtest code can report without threading it through.
+_ACTIVE: Instrumentation | None = None
+
+
+def activate(inst: Instrumentation | None) -> None:
+    global _ACTIVE
+    _ACTIVE = inst
+
+
+def active() -> Instrumentation | None:
+    return _ACTIVE
+
+
+def step(name: str):
+    """Time a sub-step of the current stage (no-op when no run is being instrumented)."""
+    return _ACTIVE.step(name) if _ACTIVE is not None else nullcontext()
+
+
+def skipped(name: str) -> None:
+    if _ACTIVE is not None:
+        _ACTIVE.skipped(name)
+
+
+def count(key: str, n: int = 1) -> None:
+    if _ACTIVE is not None:
+        _ACTIVE.count(key, n)
+
+
+def rows(rows_in: int | None = None, rows_out: int | None = None) -> None:
+    if _ACTIVE is not None:
+        _ACTIVE.rows(rows_in=rows_in, rows_out=rows_out)
@@ -1,26 +1,37 @@
 from __future__ import annotations
 
 import argparse
+import csv
 import json
 import time
-from dataclasses import dataclass
-from datetime import date
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, timezone
 from pathlib import Path
 
-from src.backtest.eval import build_eval_table, run_signal_eval, write_day5_report, write_merged_csv
-from src.backtest.sim import simulate_equal_weight_portfolio
-from src.features.daily_features import build_and_save_daily_features
-from src.ingestion.gdelt_news import load_or_download_gdelt_articles
-from src.ingestion.stooq_prices import load_or_download_daily_prices
+# Heavy dependencies (pandas, requests, VADER, the backtest modules) are imported
+# inside the stages that use them, so --help and cache-hit stages start fast.
+from src import instrument, tracing
+from src.dag import Stage, StageGraph
+from src.ingestion.gdelt_news import news_cache_path
+from src.instrument import Instrumentation, append_csv_rows, step_rows, write_step_metrics
+from src.storage.registry import REGISTRY_PATH, RunRegistry, new_run_id
 
 
 @dataclass
 class RunMetrics:
     tickers_targeted: int = 0
     pipeline_runtime_sec: float = 0.0
-    cache_hit_rate_pct: float = 0.0
+    cache_hit_rate_pct: float | None = None  # price/news cache lookups that hit, None if there were none
     news_docs_fetched: int = 0
     price_rows_fetched: int = 0
+    events_detected: int | None = None
+    trades: int | None = None
+    ic_1d: float | None = None
+    sharpe: float | None = None
+    max_drawdown: float | None = None
+    http_requests: int = 0
+    peak_rss_mb: float | None = None
+    peak_heap_mb: float | None = None
 
 
 DEFAULT_TICKERS = [
@@ -72,7 +83,22 @@ def parse_args() -> argparse.Namespace:
     p = argparse.ArgumentParser(description="Market sentiment project pipeline.")
     p.add_argument(
         "--stage",
-        choices=["scaffold", "prices", "news", "features", "eval", "simulate", "sweep", "demo"],
+        choices=[
+            "scaffold",
+            "prices",
+            "news",
+            "features",
+            "eval",
+            "simulate",
+            "sweep",
+            "walkforward",
+            "ic",
+            "events",
+            "dashboard",
+            "demo",
+            "watch",
+            "serve",
+        ],
         default="scaffold",
         help="Which stage to run.",
     )
@@ -98,12 +124,218 @@ def parse_args() -> argparse.Namespace:
         default=None,
         help="Path to JSON config file (e.g., config/defaults.json). CLI flags override config values.",
     )
+    p.add_argument(
+        "--align",
+        choices=["calendar", "session"],
+        default="calendar",
+        help="Features stage: key news by calendar day, or by the trading session it is effective for.",
+    )
+    p.add_argument(
+        "--session-cutoff", default="16:00", help="Session alignment: local cutoff time (news at/after rolls forward)."
+    )
+    p.add_argument(
+        "--bucket-minutes",
+        type=int,
+        default=None,
+        help="Intraday mode: N-minute news bars (features/eval/simulate); returns come from data/prices_intraday.",
+    )
+    p.add_argument("--session-tz", default="America/New_York", help="Session alignment: exchange time zone.")
+    p.add_argument(
+        "--no-csv",
+        action="store_true",
+        help="Skip the human-readable CSV copies of intermediate tables (stages hand off typed .frame files).",
+    )
+    p.add_argument(
+        "--engine",
+        choices=["pandas", "dense"],
+        default="pandas",
+        help="Simulation core: long-format pandas (1-day holds) or dense dates x tickers matrices.",
+    )
+    p.add_argument("--hold-days", type=int, default=1, help="Dense engine: holding period in days.")
+    p.add_argument("--max-gross", type=float, default=1.0, help="Dense engine: gross exposure cap.")
+    p.add_argument("--max-net", type=float, default=None, help="Dense engine: net exposure cap.")
+    p.add_argument(
+        "--sizing",
+        choices=["equal", "inverse_vol", "vol_target"],
+        default="equal",
+        help="Dense engine: position sizing (equal weight, inverse volatility, or portfolio vol target).",
+    )
+    p.add_argument("--target-vol", type=float, default=0.10, help="Dense engine: annualized vol target.")
+    p.add_argument("--max-weight", type=float, default=None, help="Dense engine: per-position |weight| cap.")
+    p.add_argument("--vol-window", type=int, default=20, help="Dense engine: rolling volatility window (days).")
+    p.add_argument("--workers", type=int, default=1, help="Worker processes for the sweep / Monte Carlo.")
+    p.add_argument(
+        "--chart-workers",
+        type=int,
+        default=0,
+        help="Charts: processes for redrawing figures (0 = one per stale figure, up to the CPU count).",
+    )
+    p.add_argument(
+        "--mc-sims", type=int, default=0, help="Simulate stage: random-signal Monte Carlo runs (0 = off)."
+    )
+    p.add_argument("--mc-budget-mb", type=float, default=256.0, help="Monte Carlo: memory budget per batch.")
+    p.add_argument(
+        "--ic-horizons", default="1,2,3,5,10", help="IC stage: comma-separated forward horizons (trading days)."
+    )
+    p.add_argument(
+        "--ic-perms", type=int, default=1000, help="Eval stage: joint permutations for the IC matrix p-values."
+    )
+    p.add_argument("--ic-window", type=int, default=20, help="IC stage: rolling window in dates.")
+    p.add_argument("--event-pre", type=int, default=1, help="Event study: sessions before the event day.")
+    p.add_argument("--event-post", type=int, default=5, help="Event study: sessions after the event day.")
+    p.add_argument("--est-window", type=int, default=120, help="Event study: market-model estimation window.")
+    p.add_argument("--train-days", type=int, default=20, help="Walk-forward: dates per train window.")
+    p.add_argument("--test-days", type=int, default=5, help="Walk-forward: dates per test window.")
+    p.add_argument(
+        "--wf-mode", choices=["rolling", "expanding"], default="rolling", help="Walk-forward train window type."
+    )
+    p.add_argument(
+        "--search",
+        choices=["grid", "halving"],
+        default="grid",
+        help="Sweep search mode: exhaustive grid or successive halving over growing time slices.",
+    )
+    p.add_argument("--eta", type=int, default=3, help="Successive halving: keep the best 1/eta configs per rung.")
+    p.add_argument(
+        "--sweep-checkpoint",
+        default=None,
+        help="Append-only JSONL file for sweep results; an interrupted sweep resumes from it.",
+    )
+    p.add_argument(
+        "--rule",
+        default=None,
+        help="Simulate stage: signal rule replacing the thresholds, "
+        "e.g. 'long: avg_compound > 0.05 and volume_z > 1.5; short: avg_compound < -0.05 and volume_z > 1.5'.",
+    )
+    p.add_argument(
+        "--rules-file",
+        default=None,
+        help="Sweep stage: file with one signal rule per line, evaluated as a batch instead of the threshold grid.",
+    )
+    p.add_argument(
+        "--trace-heap",
+        action="store_true",
+        help="Record each stage's peak Python heap with tracemalloc (off by default: it slows stages several-fold).",
+    )
+    p.add_argument(
+        "--profile",
+        nargs="?",
+        const="both",
+        choices=["cprofile", "sample", "both"],
+        default=None,
+        help="Profile the run (cProfile .pstats and/or a wall-clock sampler's collapsed stacks) into "
+        "report/profiles/<run>/. Up-to-date stages are skipped, so add --force to profile them.",
+    )
+    p.add_argument("--profile-interval-ms", type=float, default=5.0, help="Sampling profiler interval.")
+    p.add_argument(
+        "--trace",
+        nargs="?",
+        const=str(TRACE_FILE),
+        default=None,
+        metavar="PATH",
+        help=f"Write a Chrome trace-event JSON of the run's spans (default {TRACE_FILE}); "
+        "open it in chrome://tracing or ui.perfetto.dev.",
+    )
+    p.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-run stages even if their inputs and settings are unchanged since the last run.",
+    )
+    p.add_argument(
+        "--watch-interval", type=float, default=900.0, help="Watch mode: seconds between GDELT polls per ticker."
+    )
+    p.add_argument("--watch-concurrency", type=int, default=2, help="Watch mode: GDELT requests in flight at once.")
+    p.add_argument(
+        "--watch-ticks", type=int, default=0, help="Watch mode: stop after this many poll rounds (0 = until SIGTERM)."
+    )
+    p.add_argument("--serve-host", default="127.0.0.1", help="Serve mode: address to bind.")
+    p.add_argument("--serve-port", type=int, default=8765, help="Serve mode: port to bind (0 = any free port).")
 
 
     return p.parse_args()
 
 
+MERGED_TABLE = Path("data") / "intermediate" / "merged_table.frame"
+MERGED_TABLE_CSV = Path("report") / "day6_merged_table.csv"
+
+
+def features_path(args: argparse.Namespace) -> Path:
+    name = f"bar_features_{args.bucket_minutes}m" if args.bucket_minutes else "daily_features"
+    return Path("data") / "features" / f"{name}.frame"
+
+
+def csv_copy(args: argparse.Namespace, path: Path) -> Path | None:
+    """Human-readable CSV next to a binary stage table, unless --no-csv."""
+    return None if args.no_csv else path.with_suffix(".csv")
+
+
+def write_merged_table(args: argparse.Namespace, eval_df) -> Path:
+    from src.storage.frame_store import write_table
+
+    write_table(eval_df, MERGED_TABLE, csv_copy=None if args.no_csv else MERGED_TABLE_CSV)
+    return MERGED_TABLE
+
+
+def merged_table_path() -> Path:
+    """Typed merged table from the simulate stage; falls back to the tracked CSV from older runs."""
+    if MERGED_TABLE.exists() or not MERGED_TABLE_CSV.exists():
+        return MERGED_TABLE
+    return MERGED_TABLE_CSV
+
+
+def load_eval_table(args: argparse.Namespace, tickers: list[str], horizons: tuple[int, ...] = (1, 3)):
+    from src.backtest.eval import build_eval_table
+
+    if args.bucket_minutes:
+        return build_eval_table(
+            tickers=tickers,
+            features_path=features_path(args),
+            prices_cache_dir=Path("data") / "prices_intraday",
+            bucket_minutes=args.bucket_minutes,
+        )
+    return build_eval_table(
+        tickers=tickers,
+        features_path=features_path(args),
+        prices_cache_dir=Path("data") / "prices",
+        horizons=horizons,
+    )
+
+
+def return_columns(args: argparse.Namespace) -> tuple[str, str]:
+    return ("fwd_ret_1b", "fwd_ret_3b") if args.bucket_minutes else ("fwd_ret_1d", "fwd_ret_3d")
+
+
+def require_daily_bars(args: argparse.Namespace, stage: str) -> None:
+    """Stages built on daily prices and day horizons refuse intraday mode rather than silently ignore it."""
+    if args.bucket_minutes:
+        raise ValueError(f"--stage {stage} runs on daily bars only; drop --bucket-minutes.")
+
+
+def periods_per_year(args: argparse.Namespace) -> float:
+    from src.backtest.returns import bars_per_year
+
+    return bars_per_year(args.bucket_minutes) if args.bucket_minutes else 252
+
+
+def report_memory(stage: str, table: str, df) -> None:
+    """Print the in-memory size of a stage table and upsert it into report/memory_report.csv."""
+    from src.storage.dtypes import memory_row, write_memory_report
+
+    row = memory_row(stage, table, df)
+    write_memory_report([row], Path("report") / "memory_report.csv")
+    print(
+        f"Memory ({stage}/{table}): {row['rows']} rows, {row['bytes'] / 1e6:.2f} MB "
+        f"(object/float64 layout: {row['object_float64_bytes'] / 1e6:.2f} MB)"
+    )
+
+
+def parse_horizons(text: str) -> tuple[int, ...]:
+    return tuple(int(h) for h in text.split(",") if h.strip())
+
+
 def run_prices_stage(tickers: list[str]) -> RunMetrics:
+    from src.ingestion.stooq_prices import load_or_download_daily_prices
+
     metrics = RunMetrics()
     metrics.tickers_targeted = len(tickers)
 
@@ -115,7 +347,8 @@ def run_prices_stage(tickers: list[str]) -> RunMetrics:
 
     for t in tickers:
         try:
-            _df, result = load_or_download_daily_prices(ticker=t, cache_dir=cache_dir)
+            with tracing.span("load_prices", cat="ingestion", args={"ticker": t}):
+                _df, result = load_or_download_daily_prices(ticker=t, cache_dir=cache_dir)
         except Exception as e:
             print(f"- {t}: FAILED: {e}")
             continue
@@ -127,15 +360,14 @@ def run_prices_stage(tickers: list[str]) -> RunMetrics:
 
     metrics.price_rows_fetched = total_rows
     metrics.cache_hit_rate_pct = round((cache_hits / successes) * 100.0, 2) if successes else 0.0
-
-
-    metrics.price_rows_fetched = total_rows
-    metrics.cache_hit_rate_pct = round((cache_hits / len(tickers)) * 100.0, 2) if tickers else 0.0
     return metrics
 
 
-def run_news_stage(tickers: list[str], lookback_days: int, max_records: int) -> RunMetrics:
+def run_news_stage(tickers: list[str], lookback_days: int, max_records: int) -> tuple[RunMetrics, dict[str, list]]:
+    from src.ingestion.gdelt_news import load_or_download_gdelt_articles
+
     metrics = RunMetrics()
+    ticker_to_articles: dict[str, list] = {}
     metrics.tickers_targeted = len(tickers)
 
     cache_dir = Path("data") / "news"
@@ -145,17 +377,19 @@ def run_news_stage(tickers: list[str], lookback_days: int, max_records: int) ->
     for t in tickers:
         query = TICKER_TO_QUERY.get(t.lower(), t)  # fallback to ticker if unknown
         try:
-            articles, result = load_or_download_gdelt_articles(
-                key=t,
-                query=query,
-                cache_dir=cache_dir,
-                lookback_days=lookback_days,
-                max_records=max_records,
-            )
+            with tracing.span("load_news", cat="ingestion", args={"ticker": t}):
+                articles, result = load_or_download_gdelt_articles(
+                    key=t,
+                    query=query,
+                    cache_dir=cache_dir,
+                    lookback_days=lookback_days,
+                    max_records=max_records,
+                )
         except Exception as e:
             print(f"- {t}: query='{query}' FAILED: {e}")
             continue  # skip this ticker and move on
 
+        ticker_to_articles[t] = articles
         total_docs += result.docs
         cache_hits += 1 if result.cache_hit else 0
 
@@ -164,7 +398,833 @@ def run_news_stage(tickers: list[str], lookback_days: int, max_records: int) ->
         )
 
     metrics.news_docs_fetched = total_docs
-    return metrics
+    return metrics, ticker_to_articles
+
+
+def run_simulation(
+    args: argparse.Namespace,
+    eval_df,
+    sent_thresh: float,
+    vol_thresh: float,
+    min_docs: int,
+    slippage_bps: float,
+):
+    from src.backtest.dense import simulate_dense_portfolio
+    from src.backtest.returns import load_returns_matrix
+    from src.backtest.sim import simulate_equal_weight_portfolio
+
+    if args.engine != "dense" and (args.sizing != "equal" or args.max_weight is not None):
+        raise ValueError("--sizing / --max-weight need --engine dense.")
+    if args.engine == "dense":
+        price_returns = None
+        # Daily closes size by vol and price the no-news dates of multi-day holds.
+        if (args.sizing != "equal" or args.hold_days > 1) and not args.bucket_minutes:
+            tickers = sorted(eval_df["ticker"].astype(str).str.lower().unique())
+            price_returns = load_returns_matrix(tickers, cache_dir=Path("data") / "prices")
+        return simulate_dense_portfolio(
+            merged_df=eval_df,
+            out_dir=Path("report"),
+            sent_thresh=sent_thresh,
+            vol_thresh=vol_thresh,
+            min_docs=min_docs,
+            slippage_bps=slippage_bps,
+            hold_days=args.hold_days,
+            max_gross=args.max_gross,
+            max_net=args.max_net,
+            rule=args.rule,
+            sizing=args.sizing,
+            target_vol=args.target_vol,
+            max_weight=args.max_weight,
+            vol_window=args.vol_window,
+            price_returns=price_returns,
+            ret_col=return_columns(args)[0],
+            periods_per_year=periods_per_year(args),
+        )
+    return simulate_equal_weight_portfolio(
+        merged_df=eval_df,
+        out_dir=Path("report"),
+        sent_thresh=sent_thresh,
+        vol_thresh=vol_thresh,
+        min_docs=min_docs,
+        slippage_bps=slippage_bps,
+        rule=args.rule,
+        ret_col=return_columns(args)[0],
+        periods_per_year=periods_per_year(args),
+    )
+
+
+@dataclass
+class RunContext:
+    """Resolved settings for one pipeline run, plus in-memory stage results (see src/dag.py)."""
+
+    args: argparse.Namespace
+    tickers: list[str]
+    lookback_days: int
+    max_records: int
+    sent_thresh: float
+    vol_thresh: float
+    min_docs: int
+    slippage_bps: float
+    metrics: RunMetrics = field(default_factory=RunMetrics)
+    results: dict = field(default_factory=dict)
+    run_id: str = ""
+    registry: RunRegistry | None = None  # set for graph runs; stages record their results in it
+
+
+STAGE_STATE = Path("data") / ".stage_state.json"
+METRICS_FILE = Path("METRICS.csv")
+STEP_METRICS = Path("report") / "stage_metrics.csv"
+PROFILE_DIR = Path("report") / "profiles"
+TRACE_FILE = Path("report") / "trace.json"
+LATEST_SIGNALS = Path("report") / "latest_signals.json"
+WATCH_METRICS = Path("report") / "watch_metrics.csv"
+METRICS_COLUMNS = [
+    "day",
+    "date",
+    "tickers",
+    "news_docs",
+    "events_detected",
+    "trades",
+    "pipeline_runtime_sec",
+    "cache_hit_rate_pct",
+    "ic_1d",
+    "sharpe",
+    "max_drawdown",
+    "run_id",
+    "stage",
+    "price_rows",
+    "http_requests",
+    "peak_rss_mb",
+    "peak_heap_mb",
+]
+DEMO_STAGES = ["prices", "news", "features", "eval", "simulate", "charts", "sweep", "latest", "dashboard"]
+
+
+def run_params(ctx: RunContext) -> dict:
+    """Everything needed to reproduce a run: the resolved settings plus every CLI flag."""
+    return {
+        "tickers": ctx.tickers,
+        "lookback_days": ctx.lookback_days,
+        "max_records": ctx.max_records,
+        "sent_thresh": ctx.sent_thresh,
+        "vol_thresh": ctx.vol_thresh,
+        "min_docs": ctx.min_docs,
+        "slippage_bps": ctx.slippage_bps,
+        "args": vars(ctx.args),
+    }
+
+
+def append_run_metrics(metrics: RunMetrics, stage: str, run_id: str, out_path: Path) -> Path:
+    """
+    One row per run in the project metrics log. `day` advances with the
+    calendar date, like the hand-kept rows before it; blank = not measured.
+    """
+    today = date.today().isoformat()
+    last_day, last_date = 0, None
+    if out_path.exists():
+        with open(out_path, newline="", encoding="utf-8") as f:
+            for r in csv.DictReader(f):
+                last_date = r.get("date") or last_date
+                last_day = int(r["day"]) if (r.get("day") or "").isdigit() else last_day
+    day = last_day if today == last_date else last_day + 1
+
+    def blank(v, nd: int = 4):
+        return "" if v is None else (round(v, nd) if isinstance(v, float) else v)
+
+    row = {
+        "day": day,
+        "date": today,
+        "tickers": metrics.tickers_targeted,
+        "news_docs": metrics.news_docs_fetched,
+        "events_detected": blank(metrics.events_detected),
+        "trades": blank(metrics.trades),
+        "pipeline_runtime_sec": metrics.pipeline_runtime_sec,
+        "cache_hit_rate_pct": blank(metrics.cache_hit_rate_pct),
+        "ic_1d": blank(metrics.ic_1d),
+        "sharpe": blank(metrics.sharpe),
+        "max_drawdown": blank(metrics.max_drawdown),
+        "run_id": run_id,
+        "stage": stage,
+        "price_rows": metrics.price_rows_fetched,
+        "http_requests": metrics.http_requests,
+        "peak_rss_mb": blank(metrics.peak_rss_mb, 1),
+        "peak_heap_mb": blank(metrics.peak_heap_mb, 2),
+    }
+    return append_csv_rows([row], out_path, METRICS_COLUMNS)
+
+
+def price_files(ctx: RunContext) -> list[Path]:
+    cache_dir = Path("data") / ("prices_intraday" if ctx.args.bucket_minutes else "prices")
+    return [cache_dir / f"{t.lower()}.csv" for t in ctx.tickers]
+
+
+def news_files(ctx: RunContext) -> list[Path]:
+    return [
+        news_cache_path(t, Path("data") / "news", lookback_days=ctx.lookback_days, max_records=ctx.max_records)
+        for t in ctx.tickers
+    ]
+
+
+def with_csv(ctx: RunContext, path: Path) -> list[Path]:
+    copy = csv_copy(ctx.args, path)
+    return [path] if copy is None else [path, copy]
+
+
+def load_articles(ctx: RunContext) -> dict[str, list]:
+    from src.ingestion.gdelt_news import load_or_download_gdelt_articles
+
+    ticker_to_articles = {}
+    for t in ctx.tickers:
+        query = TICKER_TO_QUERY.get(t.lower(), t)
+        with tracing.span("load_news", cat="ingestion", args={"ticker": t}):
+            articles, _ = load_or_download_gdelt_articles(
+                key=t,
+                query=query,
+                cache_dir=Path("data") / "news",
+                lookback_days=ctx.lookback_days,
+                max_records=ctx.max_records,
+            )
+        ticker_to_articles[t] = articles
+    return ticker_to_articles
+
+
+def stage_prices(ctx: RunContext) -> None:
+    ctx.metrics.price_rows_fetched = run_prices_stage(ctx.tickers).price_rows_fetched
+    instrument.rows(rows_out=ctx.metrics.price_rows_fetched)
+
+
+def stage_news(ctx: RunContext) -> dict[str, list]:
+    news_metrics, ticker_to_articles = run_news_stage(
+        ctx.tickers, lookback_days=ctx.lookback_days, max_records=ctx.max_records
+    )
+    ctx.metrics.news_docs_fetched = news_metrics.news_docs_fetched
+    instrument.rows(rows_out=news_metrics.news_docs_fetched)
+    return ticker_to_articles
+
+
+def stage_features(ctx: RunContext):
+    from src.features.daily_features import build_and_save_daily_features
+    from src.features.sessions import session_index_from_prices
+    from src.storage.frame_store import read_table
+
+    args = ctx.args
+    # Articles the news stage already loaded in this run are reused, not read again.
+    ticker_to_articles = ctx.results.get("news")
+    if ticker_to_articles is None:
+        with instrument.step("load_articles"):
+            ticker_to_articles = load_articles(ctx)
+    n_docs = sum(len(v) for v in ticker_to_articles.values())
+
+    sessions = None
+    if args.align == "session":
+        sessions = session_index_from_prices(Path("data") / "prices", cutoff=args.session_cutoff, tz=args.session_tz)
+        print(
+            f"Session calendar: {len(sessions)} sessions ({sessions.n_projected} projected past the prices), "
+            f"cutoff {args.session_cutoff} {args.session_tz}"
+        )
+
+    with instrument.step("score_and_aggregate"):
+        result = build_and_save_daily_features(
+            ticker_to_articles=ticker_to_articles,
+            out_path=features_path(args),
+            csv_copy=csv_copy(args, features_path(args)),
+            sessions=sessions,
+            bucket_minutes=args.bucket_minutes,
+        )
+        instrument.rows(rows_in=n_docs, rows_out=result.rows_written)
+    instrument.rows(rows_in=n_docs, rows_out=result.rows_written)
+    report_memory("features", "features", read_table(result.path))
+
+    ctx.metrics.news_docs_fetched = n_docs
+    print(f"\nWrote daily features: rows={result.rows_written}, unique_days={result.unique_days}, path={result.path}")
+    if result.unmapped:
+        print(f"Skipped {result.unmapped} articles with no parseable date or session (newer than the calendar?)")
+    return result
+
+
+def eval_horizons(args: argparse.Namespace) -> tuple[int, ...]:
+    return tuple(sorted({1, 3, *parse_horizons(args.ic_horizons)}))
+
+
+def stage_eval(ctx: RunContext):
+    from src.backtest.eval import run_signal_eval, write_day5_report
+    from src.backtest.ic import ic_matrix
+
+    args = ctx.args
+    with instrument.step("build_eval_table"):
+        eval_df = load_eval_table(args, ctx.tickers, horizons=eval_horizons(args))
+        instrument.rows(rows_out=len(eval_df))
+    instrument.rows(rows_out=len(eval_df))
+    report_memory("eval", "eval_table", eval_df)
+
+    with instrument.step("signal_eval"):
+        res = run_signal_eval(eval_df, ret_cols=return_columns(args))
+        instrument.rows(rows_in=len(eval_df))
+    with instrument.step("ic_matrix"):
+        ic_table = ic_matrix(eval_df, n_perm=args.ic_perms)
+        instrument.rows(rows_in=len(eval_df), rows_out=len(ic_table))
+    ic_matrix_path = Path("report") / "ic_matrix.csv"
+    ic_table.to_csv(ic_matrix_path, index=False, float_format="%.6g")
+
+    # Write a GitHub-trackable report (small markdown file)
+    report_path = Path("report") / "day5_results.md"
+    write_day5_report(res, eval_df, report_path, ic_table=ic_table)
+    print(f"Wrote {ic_matrix_path}")
+
+    if ctx.registry is not None:
+        ctx.registry.record_eval(ctx.run_id, res)
+    ctx.metrics.events_detected = int(res.events_n)
+    ctx.metrics.ic_1d = float(res.ic_spearman_1d)
+    print(f"\nWrote report: {report_path}")
+    print(f"IC (Spearman, 1D): {res.ic_spearman_1d:.4f}  |  perm p-value: {res.ic_perm_pvalue:.4f}")
+    print(
+        "Event study (burst days): "
+        f"n={res.events_n}, "
+        f"mean_1d={res.event_mean_1d:.6f} (CI [{res.event_mean_1d_ci_lo:.6f}, {res.event_mean_1d_ci_hi:.6f}]), "
+        f"mean_3d={res.event_mean_3d:.6f} (CI [{res.event_mean_3d_ci_lo:.6f}, {res.event_mean_3d_ci_hi:.6f}])"
+    )
+    return eval_df
+
+
+def stage_simulate(ctx: RunContext):
+    from src.backtest.montecarlo import mc_report_lines, monte_carlo_null, write_mc_null_csv
+
+    args = ctx.args
+    sent_thresh, vol_thresh, min_docs, slippage_bps = ctx.sent_thresh, ctx.vol_thresh, ctx.min_docs, ctx.slippage_bps
+
+    eval_df = ctx.results.get("eval")
+    if eval_df is None:
+        with instrument.step("build_eval_table"):
+            eval_df = load_eval_table(args, ctx.tickers)
+            instrument.rows(rows_out=len(eval_df))
+    else:
+        # Same table the eval stage just built; keep only the return columns simulate uses.
+        keep = [c for c in eval_df.columns if not c.startswith("fwd_ret") or c in return_columns(args)]
+        eval_df = eval_df[keep]
+    report_memory("simulate", "merged_table", eval_df)
+
+    # Save merged table for transparency (small enough to track for now)
+    merged_path = write_merged_table(args, eval_df)
+
+    with instrument.step(f"simulate_{args.engine}"):
+        sim = run_simulation(args, eval_df, sent_thresh, vol_thresh, min_docs, slippage_bps)
+        instrument.rows(rows_in=len(eval_df))
+    instrument.rows(rows_in=len(eval_df))
+
+    mc_lines: list[str] = []
+    if args.mc_sims > 0 and args.bucket_minutes:
+        print("Monte Carlo null skipped: it runs on daily bars only.")
+    elif args.mc_sims > 0:
+        with instrument.step("monte_carlo"):
+            mc = monte_carlo_null(
+                eval_df,
+                sent_thresh=sent_thresh,
+                vol_thresh=vol_thresh,
+                min_docs=min_docs,
+                slippage_bps=slippage_bps,
+                hold_days=args.hold_days if args.engine == "dense" else 1,
+                n_sims=args.mc_sims,
+                memory_budget_mb=args.mc_budget_mb,
+                workers=args.workers,
+                rule=args.rule,
+                delay="date" if args.engine == "dense" else "row",
+            )
+            instrument.rows(rows_out=mc.n_sims)
+        mc_path = Path("report") / "mc_null.csv"
+        write_mc_null_csv(mc, mc_path)
+        mc_lines = [*mc_report_lines(mc), f"- null_distribution: {mc_path}", ""]
+        print(f"Monte Carlo: sims={mc.n_sims}, Sharpe p-value={mc.p_value_sharpe:.4f}")
+
+    # Write a small markdown report (GitHub-tracked)
+    report_path = Path("report") / "day6_backtest.md"
+    report_path.write_text(
+        "\n".join(
+            [
+                "# Day 6 — Simple Trading Simulation",
+                "",
+                "Strategy:",
+                "- Build daily signal from news features.",
+                "- Long if sentiment >= threshold on burst days; short if <= -threshold on burst days.",
+                "- Execute with a 1-day delay (more realistic).",
+                "- Equal-weight portfolio across tickers with positions that day.",
+                "",
+                "Parameters:",
+                f"- sent_thresh: {sent_thresh}",
+                f"- vol_thresh: {vol_thresh}",
+                f"- min_docs: {min_docs}",
+                f"- slippage_bps: {slippage_bps}",
+                *([f"- rule: {args.rule}"] if args.rule else []),
+                f"- engine: {args.engine}"
+                + (
+                    f" (hold_days={args.hold_days}, max_gross={args.max_gross}, max_net={args.max_net}, "
+                    f"sizing={args.sizing}, target_vol={args.target_vol}, max_weight={args.max_weight})"
+                    if args.engine == "dense"
+                    else ""
+                ),
+                "",
+                "Results:",
+                f"- signal_days (raw): {sim.n_signal_days}",
+                f"- trades (executed): {sim.n_trades}",
+                f"- sharpe_annual: {sim.sharpe_annual:.4f}",
+                f"- max_drawdown: {sim.max_drawdown:.4f}",
+                "",
+                *mc_lines,
+                "Files:",
+                f"- merged_table: {merged_path}",
+                f"- portfolio_daily: {sim.out_portfolio_csv}",
+                "",
+            ]
+        ),
+        encoding="utf-8",
+    )
+
+    if ctx.registry is not None:
+        ctx.registry.record_sim(ctx.run_id, sim)
+    ctx.metrics.trades = int(sim.n_trades)
+    ctx.metrics.sharpe = float(sim.sharpe_annual)
+    ctx.metrics.max_drawdown = float(sim.max_drawdown)
+    print(f"\nWrote report: {report_path}")
+    print(f"Trades: {sim.n_trades}")
+    print(f"Sharpe (annualized): {sim.sharpe_annual:.4f}")
+    print(f"Max drawdown: {sim.max_drawdown:.4f}")
+    return eval_df
+
+
+def merged_table_input(ctx: RunContext):
+    """The merged table simulate just built in this run, else its file."""
+    merged = ctx.results.get("simulate")
+    return merged if merged is not None else merged_table_path()
+
+
+def sweep_outputs(ctx: RunContext) -> list[Path]:
+    if ctx.args.rules_file:
+        return [Path("report") / "rule_sweep.csv"]
+    return [Path("report") / "day8_sweep.csv", Path("report") / "day8_sweep.md"]
+
+
+def stage_sweep(ctx: RunContext) -> None:
+    from src.backtest.rules import read_rules_file
+    from src.backtest.search import halving_savings, successive_halving
+    from src.backtest.sweep import build_sweep_panel, evaluate_rules, load_merged_table, run_sweep, write_sweep_report
+    from src.backtest.sweep_exec import run_sweep_parallel
+
+    args = ctx.args
+    merged = merged_table_input(ctx)
+    bars = {"ret_col": return_columns(args)[0], "periods_per_year": periods_per_year(args)}
+    out_csv = Path("report") / "day8_sweep.csv"
+    out_md = Path("report") / "day8_sweep.md"
+    if args.rules_file:
+        rules = read_rules_file(Path(args.rules_file))
+        t0 = time.perf_counter()
+        panel = build_sweep_panel(load_merged_table(merged), ret_col=bars["ret_col"])
+        df = evaluate_rules(panel, rules, periods_per_year=bars["periods_per_year"])
+        elapsed = time.perf_counter() - t0
+        out_csv = Path("report") / "rule_sweep.csv"
+        out_csv.parent.mkdir(parents=True, exist_ok=True)
+        df.to_csv(out_csv, index=False)
+        print(f"Evaluated {len(rules)} rules x {df['slippage_bps'].nunique()} slippage levels in {elapsed:.3f}s")
+        print(f"Wrote {out_csv}")
+    elif args.search == "halving":
+        df = successive_halving(merged, eta=args.eta, **bars)
+        saved = halving_savings(df)
+        print(
+            f"Successive halving: simulated {saved['ticker_days_simulated']} ticker-days "
+            f"vs {saved['ticker_days_exhaustive']} exhaustive ({saved['saved_pct']:.1f}% saved)"
+        )
+    elif args.workers > 1 or args.sweep_checkpoint:
+        df, sweep_stats = run_sweep_parallel(
+            merged,
+            checkpoint_path=Path(args.sweep_checkpoint) if args.sweep_checkpoint else None,
+            workers=args.workers,
+            **bars,
+        )
+        print(f"Sweep: {sweep_stats}")
+    else:
+        df = run_sweep(merged, **bars)
+    if not args.rules_file:
+        write_sweep_report(df, out_csv=out_csv, out_md=out_md)
+        print(f"Wrote {out_csv}")
+        print(f"Wrote {out_md}")
+    if ctx.registry is not None:
+        kind = "rules" if args.rules_file else ("halving" if args.search == "halving" else "grid")
+        ctx.registry.record_sweep(ctx.run_id, df.to_dict("records"), kind=kind)
+    instrument.rows(rows_out=len(df))  # configs (or rules x slippage levels) evaluated
+
+
+def stage_ic(ctx: RunContext) -> None:
+    from src.backtest.eval import build_eval_table
+    from src.backtest.ic import compute_ic_report, write_ic_report
+
+    require_daily_bars(ctx.args, "ic")
+    eval_df = build_eval_table(
+        tickers=ctx.tickers,
+        features_path=features_path(ctx.args),
+        prices_cache_dir=Path("data") / "prices",
+        horizons=parse_horizons(ctx.args.ic_horizons),
+    )
+    ic_report = compute_ic_report(eval_df, window=ctx.args.ic_window)
+    out_ts = Path("report") / "ic_timeseries.csv"
+    out_decay = Path("report") / "ic_decay.csv"
+    write_ic_report(ic_report, out_timeseries=out_ts, out_decay=out_decay)
+    print(f"Wrote {out_ts}")
+    print(f"Wrote {out_decay}")
+    for _, r in ic_report.decay.iterrows():
+        print(f"- {int(r['horizon_days'])}d: mean_ic={r['mean_ic']:.4f} (t={r['ic_t']:.2f}, days={int(r['days'])})")
+    instrument.rows(rows_in=len(eval_df), rows_out=len(ic_report.timeseries))
+
+
+def stage_events(ctx: RunContext) -> None:
+    from src.backtest.eval import build_eval_table
+    from src.backtest.event_study import market_model_event_study, write_event_study_csv
+    from src.backtest.returns import load_returns_matrix
+
+    args = ctx.args
+    require_daily_bars(args, "events")
+    prices_cache_dir = Path("data") / "prices"
+    eval_df = build_eval_table(
+        tickers=ctx.tickers,
+        features_path=features_path(args),
+        prices_cache_dir=prices_cache_dir,
+    )
+    dates, ret_tickers, rets = load_returns_matrix(ctx.tickers, prices_cache_dir)
+    es = market_model_event_study(
+        eval_df,
+        dates,
+        ret_tickers,
+        rets,
+        market_ticker="spy.us",
+        pre=args.event_pre,
+        post=args.event_post,
+        est_window=args.est_window,
+        min_obs=max(2, args.est_window // 2),
+    )
+    out_path = Path("report") / "event_study_car.csv"
+    write_event_study_csv(es, out_path)
+    print(f"Wrote {out_path}")
+    print(
+        f"Market-model event study: n={es.n_events} (dropped {es.n_dropped}), "
+        f"CAR[-{args.event_pre},+{args.event_post}]={es.car_final:.6f} "
+        f"(95% CI [{es.car_final_ci_lo:.6f}, {es.car_final_ci_hi:.6f}])"
+    )
+    ctx.metrics.events_detected = int(es.n_events)
+    instrument.rows(rows_in=len(eval_df), rows_out=es.n_events)
+
+
+def stage_walkforward(ctx: RunContext) -> None:
+    from src.backtest.walkforward import walk_forward, write_walkforward_report
+
+    args = ctx.args
+    out_csv = Path("report") / "walkforward_oos.csv"
+    out_md = Path("report") / "walkforward.md"
+    wf = walk_forward(
+        merged_table_input(ctx),
+        train_days=args.train_days,
+        test_days=args.test_days,
+        mode=args.wf_mode,
+        ret_col=return_columns(args)[0],
+        periods_per_year=periods_per_year(args),
+    )
+    write_walkforward_report(
+        wf, out_csv=out_csv, out_md=out_md, train_days=args.train_days, test_days=args.test_days, mode=args.wf_mode
+    )
+    print(f"Wrote {out_md}")
+    print(
+        f"Walk-forward: folds={wf.n_folds}, oos_trades={wf.oos_trades}, "
+        f"oos_sharpe={wf.oos_sharpe_ann:.4f}, oos_total_return={wf.oos_total_return:.4f}"
+    )
+    instrument.rows(rows_out=wf.n_folds)
+
+
+def stage_charts(ctx: RunContext) -> None:
+    from src.viz.make_charts import main as charts_main
+
+    report = charts_main(workers=ctx.args.chart_workers, force=ctx.args.force)
+    instrument.rows(rows_out=report.count("drawn"))
+
+
+def stage_latest(ctx: RunContext) -> None:
+    from src.reporting.latest_results import write_latest_results
+
+    latest_path = write_latest_results(ctx.tickers)
+    print(f"Wrote {latest_path}")
+
+
+def stage_dashboard(ctx: RunContext) -> None:
+    from src.viz.dashboard import build_dashboard
+
+    out = build_dashboard(
+        features_path=features_path(ctx.args),
+        signal_params=live_signal_params(ctx),
+        portfolio_csv=Path("report") / "portfolio_daily.csv",
+    )
+    print(f"Wrote {out} (open it in a browser; no server needed)")
+
+
+def live_signal_params(ctx: RunContext) -> dict:
+    """build_signals arguments for the live views (watch, serve, dashboard)."""
+    return {
+        "sent_thresh": ctx.sent_thresh,
+        "vol_thresh": ctx.vol_thresh,
+        "min_docs": ctx.min_docs,
+        "rule": ctx.args.rule,
+    }
+
+
+def run_watch(ctx: RunContext) -> None:
+    """
+    --stage watch: a long-running process that starts from the news cache and
+    keeps signals in report/latest_signals.json fresh (see src/watch.py).
+    """
+    import asyncio
+
+    from src.ingestion.gdelt_news import fetch_gdelt_payload, load_or_download_gdelt_articles
+    from src.watch import WatchDaemon
+
+    def fetch(ticker: str, query: str, start_dt, end_dt) -> list:
+        payload = fetch_gdelt_payload(ticker, query, start_dt, end_dt, max_records=ctx.max_records)
+        return payload.get("articles", []) if isinstance(payload, dict) else []
+
+    args = ctx.args
+    daemon = WatchDaemon(
+        tickers=ctx.tickers,
+        queries=TICKER_TO_QUERY,
+        fetch=fetch,
+        out_path=LATEST_SIGNALS,
+        metrics_path=WATCH_METRICS,
+        price_dir=Path("data") / "prices",
+        interval_sec=args.watch_interval,
+        concurrency=args.watch_concurrency,
+        lookback_days=ctx.lookback_days,
+        signal_params=live_signal_params(ctx),
+    )
+    for t in ctx.tickers:
+        try:
+            articles, result = load_or_download_gdelt_articles(
+                key=t,
+                query=TICKER_TO_QUERY.get(t.lower(), t),
+                cache_dir=Path("data") / "news",
+                lookback_days=ctx.lookback_days,
+                max_records=ctx.max_records,
+            )
+        except Exception as e:
+            print(f"- {t}: no cached news to start from ({e}); polling the full lookback")
+            continue
+        as_of = datetime.fromtimestamp(result.path.stat().st_mtime, tz=timezone.utc)
+        daemon.seed(t, articles, as_of=as_of)
+        ctx.metrics.news_docs_fetched += len(articles)
+
+    def report(m) -> None:
+        lag = "" if m.refresh_lag_sec is None else f"{m.refresh_lag_sec:.0f}s"
+        print(
+            f"[watch] tick {m.tick}: queue={m.queue_depth} lag={lag} polls={m.polls} "
+            f"new_articles={m.new_articles} errors={m.fetch_errors} -> {LATEST_SIGNALS}"
+        )
+
+    print(f"Watching {len(ctx.tickers)} tickers every {args.watch_interval:.0f}s (SIGTERM to stop)")
+    asyncio.run(daemon.run(ticks=args.watch_ticks, on_tick=report))
+    ctx.metrics.tickers_targeted = len(ctx.tickers)
+    print(f"Watch stopped after {daemon.tick} ticks; wrote {LATEST_SIGNALS} and {WATCH_METRICS}")
+
+
+def run_serve(ctx: RunContext) -> None:
+    """
+    --stage serve: HTTP API over the features table and its signals, hot-swapped
+    when a new table lands (see src/serve.py). Stops on SIGTERM / Ctrl-C.
+    """
+    import signal
+    import threading
+
+    from src.serve import SignalServer
+
+    args = ctx.args
+    path = features_path(args)
+    server = SignalServer((args.serve_host, args.serve_port), path, live_signal_params(ctx))
+    server.start_watcher()
+    # shutdown() waits for serve_forever to return, so it cannot run on the serving thread itself.
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+    host, port = server.server_address[:2]
+    print(f"Serving {server.snapshot.rows} rows from {path} on http://{host}:{port}")
+    print("GET /signals, /signal/<ticker>[?date=], /history/<ticker>[?start=&end=], /health, /metrics")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    ctx.metrics.tickers_targeted = len(server.snapshot.dates)
+    print(f"Stopped; served {sum(v['count'] for v in server.histogram.to_dict().values())} requests")
+
+
+def build_stage_graph() -> StageGraph:
+    """
+    The pipeline as a graph: each stage names what it reads, what it writes and
+    the settings that change its result. Paths are relative to the working dir.
+    """
+    report = Path("report")
+
+    def a(ctx: RunContext) -> argparse.Namespace:
+        return ctx.args
+
+    def signal_params(ctx: RunContext) -> dict:
+        return {
+            "sent_thresh": ctx.sent_thresh,
+            "vol_thresh": ctx.vol_thresh,
+            "min_docs": ctx.min_docs,
+            "slippage_bps": ctx.slippage_bps,
+            "rule": a(ctx).rule,
+        }
+
+    def chart_params(ctx: RunContext) -> dict:
+        from src.viz.make_charts import event_study_source
+
+        # The event-study figure is drawn from the registry's latest eval row, not from a file.
+        return {"event_study": event_study_source(REGISTRY_PATH)}
+
+    def latest_params(ctx: RunContext) -> dict:
+        from src.reporting.latest_results import latest_rows
+
+        # The summary is written from registry rows; the run ids alone do not change it.
+        ev, best = ({k: v for k, v in (row or {}).items() if k != "run_id"} for row in latest_rows(REGISTRY_PATH))
+        return {"tickers": ctx.tickers, "eval": ev, "best_sweep": best}
+
+    def dashboard_params(ctx: RunContext) -> dict:
+        # The heatmap shows the latest grid/halving sweep in the registry, whichever stage wrote it.
+        registry = RunRegistry.open_existing(REGISTRY_PATH)
+        sweep_run = None
+        if registry is not None:
+            with registry:
+                sweep_run = registry.latest_sweep_run()
+        return {**live_signal_params(ctx), "sweep_run": sweep_run}
+
+    stages = [
+        Stage("prices", stage_prices, source=True, outputs=price_files),
+        Stage("news", stage_news, source=True, outputs=news_files),
+        Stage(
+            "features",
+            stage_features,
+            deps=("news",),
+            inputs=lambda ctx: news_files(ctx) + (price_files(ctx) if a(ctx).align == "session" else []),
+            outputs=lambda ctx: with_csv(ctx, features_path(a(ctx))),
+            params=lambda ctx: {
+                "tickers": ctx.tickers,
+                "align": a(ctx).align,
+                "session": [a(ctx).session_cutoff, a(ctx).session_tz],
+                "bucket_minutes": a(ctx).bucket_minutes,
+            },
+        ),
+        Stage(
+            "eval",
+            stage_eval,
+            deps=("features", "prices"),
+            inputs=lambda ctx: [features_path(a(ctx)), *price_files(ctx)],
+            outputs=lambda ctx: [report / "day5_results.md", report / "ic_matrix.csv"],
+            params=lambda ctx: {
+                "tickers": ctx.tickers,
+                "horizons": eval_horizons(a(ctx)),
+                "ic_perms": a(ctx).ic_perms,
+                "bucket_minutes": a(ctx).bucket_minutes,
+            },
+        ),
+        Stage(
+            "simulate",
+            stage_simulate,
+            deps=("eval",),
+            inputs=lambda ctx: [features_path(a(ctx)), *price_files(ctx)],
+            outputs=lambda ctx: [
+                MERGED_TABLE,
+                *([] if a(ctx).no_csv else [MERGED_TABLE_CSV]),
+                report / "portfolio_daily.csv",
+                report / "day6_backtest.md",
+                *([report / "mc_null.csv"] if a(ctx).mc_sims > 0 else []),
+            ],
+            params=lambda ctx: {
+                **signal_params(ctx),
+                "tickers": ctx.tickers,
+                "bucket_minutes": a(ctx).bucket_minutes,
+                "engine": a(ctx).engine,
+                "dense": [a(ctx).hold_days, a(ctx).max_gross, a(ctx).max_net],
+                "sizing": [a(ctx).sizing, a(ctx).target_vol, a(ctx).max_weight, a(ctx).vol_window],
+                "mc": [a(ctx).mc_sims, a(ctx).mc_budget_mb],
+            },
+        ),
+        Stage(
+            "charts",
+            stage_charts,
+            deps=("simulate", "eval"),
+            inputs=lambda ctx: [report / "portfolio_daily.csv", MERGED_TABLE],
+            outputs=lambda ctx: [report / "figures"],
+            params=chart_params,
+        ),
+        Stage(
+            "sweep",
+            stage_sweep,
+            deps=("simulate",),
+            inputs=lambda ctx: [merged_table_path(), *([Path(a(ctx).rules_file)] if a(ctx).rules_file else [])],
+            outputs=sweep_outputs,
+            params=lambda ctx: {
+                "search": a(ctx).search,
+                "eta": a(ctx).eta,
+                "rules_file": a(ctx).rules_file,
+                "bucket_minutes": a(ctx).bucket_minutes,
+            },
+        ),
+        Stage(
+            "latest",
+            stage_latest,
+            deps=("eval", "sweep", "charts"),
+            outputs=lambda ctx: [report / "latest_results.md"],
+            params=latest_params,
+        ),
+        Stage(
+            "dashboard",
+            stage_dashboard,
+            deps=("features", "simulate", "sweep"),
+            inputs=lambda ctx: [
+                features_path(a(ctx)),
+                report / "portfolio_daily.csv",
+                Path(__file__).parent / "viz" / "dashboard_template.html",
+            ],
+            outputs=lambda ctx: [Path("dashboard") / "index.html", Path("dashboard") / "tickers"],
+            params=dashboard_params,
+        ),
+        Stage(
+            "walkforward",
+            stage_walkforward,
+            deps=("simulate",),
+            inputs=lambda ctx: [merged_table_path()],
+            outputs=lambda ctx: [report / "walkforward_oos.csv", report / "walkforward.md"],
+            params=lambda ctx: {
+                "train_days": a(ctx).train_days,
+                "test_days": a(ctx).test_days,
+                "mode": a(ctx).wf_mode,
+                "bucket_minutes": a(ctx).bucket_minutes,
+            },
+        ),
+        Stage(
+            "ic",
+            stage_ic,
+            deps=("features",),
+            inputs=lambda ctx: [features_path(a(ctx)), *price_files(ctx)],
+            outputs=lambda ctx: [report / "ic_timeseries.csv", report / "ic_decay.csv"],
+            params=lambda ctx: {
+                "tickers": ctx.tickers,
+                "horizons": a(ctx).ic_horizons,
+                "window": a(ctx).ic_window,
+            },
+        ),
+        Stage(
+            "events",
+            stage_events,
+            deps=("features",),
+            inputs=lambda ctx: [features_path(a(ctx)), *price_files(ctx)],
+            outputs=lambda ctx: [report / "event_study_car.csv"],
+            params=lambda ctx: {
+                "tickers": ctx.tickers,
+                "window": [a(ctx).event_pre, a(ctx).event_post, a(ctx).est_window],
+            },
+        ),
+    ]
+    return StageGraph(stages, state_path=STAGE_STATE)
 
 
 def main() -> None:
@@ -202,216 +1262,78 @@ def main() -> None:
     start = time.time()
 
     tickers = [t.strip() for t in args.tickers.split(",") if t.strip()]
+    ctx = RunContext(
+        args=args,
+        tickers=tickers,
+        lookback_days=lookback_days,
+        max_records=max_records,
+        sent_thresh=sent_thresh,
+        vol_thresh=vol_thresh,
+        min_docs=min_docs,
+        slippage_bps=slippage_bps,
+    )
 
-    if args.stage == "prices":
-        metrics = run_prices_stage(tickers)
-    elif args.stage == "demo":
-        # Runs the full flow in a sensible order, using current args.
-        _ = run_prices_stage(tickers)
-        _ = run_news_stage(tickers, lookback_days=lookback_days, max_records=max_records)
-
-        # features
-        ticker_to_articles = {}
-        for t in tickers:
-            query = TICKER_TO_QUERY.get(t.lower(), t)
-            articles, _ = load_or_download_gdelt_articles(
-                key=t,
-                query=query,
-                cache_dir=Path("data") / "news",
-                lookback_days=lookback_days,
-                max_records=max_records,
-            )
-            ticker_to_articles[t] = articles
-
-        result = build_and_save_daily_features(
-            ticker_to_articles=ticker_to_articles,
-            out_path=Path("data") / "features" / "daily_features.csv",
-        )
-        print(
-            f"\nWrote daily features: rows={result.rows_written}, unique_days={result.unique_days}, path={result.path}"
-        )
-
-        # eval
-        features_path = Path("data") / "features" / "daily_features.csv"
-        prices_cache_dir = Path("data") / "prices"
-        eval_df = build_eval_table(tickers=tickers, features_path=features_path, prices_cache_dir=prices_cache_dir)
-        res = run_signal_eval(eval_df)
-        report_path = Path("report") / "day5_results.md"
-        write_day5_report(res, eval_df, report_path)
-        print(f"\nWrote report: {report_path}")
-
-        # simulate
-        merged_path = Path("report") / "day6_merged_table.csv"
-        write_merged_csv(eval_df, merged_path)
-        sim = simulate_equal_weight_portfolio(
-            merged_df=eval_df,
-            out_dir=Path("report"),
-            sent_thresh=sent_thresh,
-            vol_thresh=vol_thresh,
-            min_docs=min_docs,
-            slippage_bps=slippage_bps,
-        )
-        report_path = Path("report") / "day6_backtest.md"
-        # keep your existing report-writing block or reuse it here
-        print(f"\nWrote report: {report_path}")
-
-        # charts
-        from src.viz.make_charts import main as charts_main
-        charts_main()
-        from src.backtest.sweep import run_sweep, write_sweep_report
-        from src.reporting.latest_results import write_latest_results
-
-        sweep_df = run_sweep(Path("report") / "day6_merged_table.csv")
-        write_sweep_report(
-            sweep_df,
-            out_csv=Path("report") / "day8_sweep.csv",
-            out_md=Path("report") / "day8_sweep.md",
-        )
-
-        latest_path = write_latest_results(tickers)
-        print(f"Wrote {latest_path}")
-
-        metrics = RunMetrics(tickers_targeted=len(tickers), cache_hit_rate_pct=0.0, news_docs_fetched=0, price_rows_fetched=0)
-    elif args.stage == "news":
-        metrics = run_news_stage(tickers, lookback_days=lookback_days, max_records=max_records)
-    elif args.stage == "features":
-        ticker_to_articles = {}
-        for t in tickers:
-            query = TICKER_TO_QUERY.get(t.lower(), t)
-            articles, _ = load_or_download_gdelt_articles(
-                key=t,
-                query=query,
-                cache_dir=Path("data") / "news",
-                lookback_days=lookback_days,
-                max_records=max_records,
-
-            )
-            ticker_to_articles[t] = articles
-
-        result = build_and_save_daily_features(
-            ticker_to_articles=ticker_to_articles,
-            out_path=Path("data") / "features" / "daily_features.csv",
-        )
-
-        # Put something meaningful in metrics for display
-        metrics = RunMetrics(tickers_targeted=len(tickers))
-        metrics.news_docs_fetched = sum(len(v) for v in ticker_to_articles.values())
-        metrics.cache_hit_rate_pct = 100.0  # should be, if cached; we’ll verify via output speed
-        print(
-            f"\nWrote daily features: rows={result.rows_written}, unique_days={result.unique_days}, path={result.path}"
-        )
-    elif args.stage == "eval":
-        features_path = Path("data") / "features" / "daily_features.csv"
-        prices_cache_dir = Path("data") / "prices"
-
-        eval_df = build_eval_table(
-            tickers=tickers,
-            features_path=features_path,
-            prices_cache_dir=prices_cache_dir,
-        )
-
-        res = run_signal_eval(eval_df)
-
-        # Write a GitHub-trackable report (small markdown file)
-        report_path = Path("report") / "day5_results.md"
-        write_day5_report(res, eval_df, report_path)
-
-        metrics = RunMetrics(tickers_targeted=len(tickers))
-        metrics.news_docs_fetched = int(len(eval_df))  # rows in merged table (proxy)
-        metrics.cache_hit_rate_pct = 100.0
-        print(f"\nWrote report: {report_path}")
-        print(
-            f"IC (Spearman, 1D): {res.ic_spearman_1d:.4f}  |  perm p-value: {res.ic_perm_pvalue:.4f}"
-        )
-        print(
-            "Event study (burst days): "
-            f"n={res.events_n}, "
-            f"mean_1d={res.event_mean_1d:.6f} (CI [{res.event_mean_1d_ci_lo:.6f}, {res.event_mean_1d_ci_hi:.6f}]), "
-            f"mean_3d={res.event_mean_3d:.6f} (CI [{res.event_mean_3d_ci_lo:.6f}, {res.event_mean_3d_ci_hi:.6f}])"
-        )
-
-    elif args.stage == "simulate":
-        features_path = Path("data") / "features" / "daily_features.csv"
-        prices_cache_dir = Path("data") / "prices"
-
-        eval_df = build_eval_table(
-            tickers=tickers,
-            features_path=features_path,
-            prices_cache_dir=prices_cache_dir,
-        )
-
-        # Save merged table for transparency (small enough to track for now)
-        merged_path = Path("report") / "day6_merged_table.csv"
-        write_merged_csv(eval_df, merged_path)
-
-        sim = simulate_equal_weight_portfolio(
-            merged_df=eval_df,
-            out_dir=Path("report"),
-            sent_thresh=sent_thresh,
-            vol_thresh=vol_thresh,
-            min_docs=min_docs,
-            slippage_bps=slippage_bps,
-        )
+    if args.stage == "scaffold":
+        metrics = RunMetrics(tickers_targeted=0)
+        metrics.pipeline_runtime_sec = round(time.time() - start, 4)
+    elif args.stage in ("watch", "serve"):
+        if args.stage == "watch":
+            run_watch(ctx)
+        else:
+            run_serve(ctx)
+        metrics = ctx.metrics
+        metrics.pipeline_runtime_sec = round(time.time() - start, 4)
+    else:
+        run_id = new_run_id()
+        inst = Instrumentation(trace_heap=args.trace_heap)
+        instrument.activate(inst)
+        inst.start()
+        trace_path = Path(args.trace) if args.trace else None
+        if trace_path is not None:
+            tracing.start(trace_path.with_name(f".{trace_path.name}.parts-{run_id}"))
+        registry = RunRegistry(REGISTRY_PATH)
+        registry.begin_run(run_id, args.stage, run_params(ctx))
+        ctx.run_id, ctx.registry = run_id, registry
+        try:
+            # Runs the full flow in a sensible order for demo; otherwise just the one stage.
+            targets = DEMO_STAGES if args.stage == "demo" else [args.stage]
+            graph = build_stage_graph()
+            if args.profile:
+                from src.profiling import profiled  # only imported when asked for
 
-        # Write a small markdown report (GitHub-tracked)
-        report_path = Path("report") / "day6_backtest.md"
-        report_path.write_text(
-            "\n".join(
-                [
-                    "# Day 6 — Simple Trading Simulation",
-                    "",
-                    "Strategy:",
-                    "- Build daily signal from news features.",
-                    "- Long if sentiment >= threshold on burst days; short if <= -threshold on burst days.",
-                    "- Execute with a 1-day delay (more realistic).",
-                    "- Equal-weight portfolio across tickers with positions that day.",
-                    "",
-                    "Parameters:",
-                    f"- sent_thresh: {sent_thresh}",
-                    f"- vol_thresh: {vol_thresh}",
-                    f"- min_docs: {min_docs}",
-                    f"- slippage_bps: {slippage_bps}",
-                    "",
-                    "Results:",
-                    f"- signal_days (raw): {sim.n_signal_days}",
-                    f"- trades (executed): {sim.n_trades}",
-                    f"- sharpe_annual: {sim.sharpe_annual:.4f}",
-                    f"- max_drawdown: {sim.max_drawdown:.4f}",
-                    "",
-                    "Files:",
-                    f"- merged_table: {merged_path}",
-                    f"- portfolio_daily: {sim.out_portfolio_csv}",
-                    "",
-                ]
-            ),
-            encoding="utf-8",
-        )
+                out_dir = PROFILE_DIR / f"{run_id}_{args.stage}"
+                with profiled(args.profile, out_dir, name=args.stage, interval=args.profile_interval_ms / 1000.0):
+                    runs = graph.run(targets, ctx, force=args.force)
+            else:
+                runs = graph.run(targets, ctx, force=args.force)
+        except BaseException:
+            registry.finish_run(run_id, "failed", round(time.time() - start, 4))
+            registry.close()
+            raise
+        finally:
+            inst.stop()
+            instrument.activate(None)
+            if trace_path is not None:
+                print(f"\nTrace written to {tracing.stop(trace_path)}")
+        skipped = [r.name for r in runs if r.status == "skipped"]
+        if skipped and args.stage == "demo":
+            print(f"\nUp to date: {', '.join(skipped)} (use --force to re-run)")
 
-        metrics = RunMetrics(tickers_targeted=len(tickers))
-        metrics.cache_hit_rate_pct = 100.0
-        print(f"\nWrote report: {report_path}")
-        print(f"Trades: {sim.n_trades}")
-        print(f"Sharpe (annualized): {sim.sharpe_annual:.4f}")
-        print(f"Max drawdown: {sim.max_drawdown:.4f}")
-    elif args.stage == "sweep":
-        merged_path = Path("report") / "day6_merged_table.csv"
-        out_csv = Path("report") / "day8_sweep.csv"
-        out_md = Path("report") / "day8_sweep.md"
-        df = run_sweep(merged_path)
-        write_sweep_report(df, out_csv=out_csv, out_md=out_md)
-        print(f"Wrote {out_csv}")
-        print(f"Wrote {out_md}")
-        metrics = RunMetrics(
-            tickers_targeted=len(tickers),
-            pipeline_runtime_sec=0.0,
-            cache_hit_rate_pct=0.0,
-            news_docs_fetched=0,
-            price_rows_fetched=0,
-        )
-    else:
-        metrics = RunMetrics(tickers_targeted=0)
+        metrics = ctx.metrics
+        metrics.tickers_targeted = len(tickers)
+        metrics.pipeline_runtime_sec = round(time.time() - start, 4)
+        metrics.cache_hit_rate_pct = inst.cache_hit_rate_pct()
+        metrics.http_requests = inst.totals.get(instrument.HTTP_REQUESTS, 0)
+        metrics.peak_rss_mb = instrument.peak_rss_mb()
+        metrics.peak_heap_mb = inst.peak_heap_mb()
 
-    metrics.pipeline_runtime_sec = round(time.time() - start, 4)
+        write_step_metrics(inst, run_id, STEP_METRICS)
+        append_run_metrics(metrics, args.stage, run_id, METRICS_FILE)
+        with registry:
+            registry.record_timings(run_id, step_rows(inst, run_id))
+            registry.finish_run(run_id, "ok", metrics.pipeline_runtime_sec, asdict(metrics))
+        print("\n" + inst.summary_table())
+        print(f"\nAppended run {run_id} to {METRICS_FILE} (steps: {STEP_METRICS}) and {REGISTRY_PATH}")
 
     print("\n✅ Market Sentiment Pipeline")
     print(f"Date: {date.today().isoformat()}")
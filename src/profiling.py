@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import cProfile
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+PROFILE_MODES = ("cprofile", "sample", "both")
+
+# Repo root; frames under it are "ours" when attributing time.
+ROOT = Path(__file__).resolve().parents[1]
+OWN_PREFIX = str(ROOT / "src")
+
+
+def _short_file(filename: str) -> str:
+    p = Path(filename)
+    try:
+        return p.resolve().relative_to(ROOT).as_posix()
+    except (ValueError, OSError):
+        return "/".join(p.parts[-2:])
+
+
+def _label(code) -> str:
+    return f"{code.co_name} ({_short_file(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    Wall-clock sampling profiler: a daemon thread snapshots the target
+    thread's Python stack every `interval` seconds and counts identical stacks
+    (collapsed format, root first). Time blocked in I/O or C code is sampled
+    too, which cProfile under-reports.
+    """
+
+    def __init__(self, interval: float = 0.005, thread_id: int | None = None):
+        self.interval = interval
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._labels: dict = {}  # code object -> label, so each is formatted once
+
+    def _sample(self) -> None:
+        frame = sys._current_frames().get(self.thread_id)
+        parts = []
+        while frame is not None:
+            code = frame.f_code
+            label = self._labels.get(code)
+            if label is None:
+                label = self._labels[code] = _label(code)
+            parts.append(label)
+            frame = frame.f_back
+        if parts:
+            self.stacks[";".join(reversed(parts))] += 1
+            self.samples += 1
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._loop, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def write_collapsed(self, path: Path) -> Path:
+        """One 'frame;frame;frame count' line per distinct stack (flamegraph.pl / speedscope input)."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        lines = [f"{stack} {n}" for stack, n in self.stacks.most_common()]
+        path.write_text("\n".join(lines) + ("\n" if lines else ""), encoding="utf-8")
+        return path
+
+    def top_own(self, n: int = 15) -> list[tuple[str, int]]:
+        """Our frames by inclusive sample count (each frame counted once per stack)."""
+        counts: Counter[str] = Counter()
+        for stack, k in self.stacks.items():
+            for frame in set(stack.split(";")):
+                if "(src/" in frame:
+                    counts[frame] += k
+        return counts.most_common(n)
+
+
+@dataclass(frozen=True)
+class ProfileRun:
+    out_dir: Path
+    pstats_path: Path | None
+    collapsed_path: Path | None
+
+
+def top_own_functions(stats: pstats.Stats, n: int = 15) -> list[tuple[str, int, float, float]]:
+    """(function, calls, tottime, cumtime) for functions defined under src/, by cumulative time."""
+    rows = []
+    for (filename, line, func), (_cc, nc, tt, ct, _callers) in stats.stats.items():
+        if filename.startswith(OWN_PREFIX):
+            rows.append((f"{func} ({_short_file(filename)}:{line})", nc, tt, ct))
+    rows.sort(key=lambda r: r[3], reverse=True)
+    return rows[:n]
+
+
+def profile_report_lines(run: ProfileRun, stats: pstats.Stats | None, sampler: StackSampler | None) -> list[str]:
+    lines = [f"Profile written to {run.out_dir}"]
+    if stats is not None:
+        lines += ["", "Top src/ functions by cumulative time (cProfile):", f"{'cum_s':>9} {'own_s':>9} {'calls':>9}  function"]
+        lines += [f"{ct:>9.3f} {tt:>9.3f} {nc:>9}  {name}" for name, nc, tt, ct in top_own_functions(stats)]
+    if sampler is not None and sampler.samples:
+        lines += ["", f"Top src/ functions by wall-clock samples ({sampler.samples} samples @ {sampler.interval * 1000:.0f} ms):"]
+        lines += [
+            f"{100.0 * k / sampler.samples:>8.1f}% {k * sampler.interval:>9.2f}s  {name}"
+            for name, k in sampler.top_own()
+        ]
+    return lines
+
+
+@contextmanager
+def profiled(mode: str, out_dir: Path, name: str, interval: float = 0.005) -> Iterator[None]:
+    """
+    Profile the enclosed block: cProfile -> `<name>.pstats`, sampler ->
+    `<name>.collapsed`, both under `out_dir`. Top functions from our code are
+    printed at the end. Only the calling thread is profiled; worker processes
+    (e.g. --workers > 1) are not.
+    """
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"Unknown profile mode {mode!r}; expected one of {PROFILE_MODES}")
+    out_dir.mkdir(parents=True, exist_ok=True)
+    prof = cProfile.Profile() if mode in ("cprofile", "both") else None
+    sampler = StackSampler(interval=interval) if mode in ("sample", "both") else None
+
+    t0 = time.perf_counter()
+    if sampler is not None:
+        sampler.start()
+    if prof is not None:
+        prof.enable()
+    try:
+        yield
+    finally:
+        if prof is not None:
+            prof.disable()
+        if sampler is not None:
+            sampler.stop()
+        elapsed = time.perf_counter() - t0
+
+        stats, pstats_path, collapsed_path = None, None, None
+        if prof is not None:
+            pstats_path = out_dir / f"{name}.pstats"
+            prof.dump_stats(str(pstats_path))
+            stats = pstats.Stats(prof)
+        if sampler is not None:
+            collapsed_path = sampler.write_collapsed(out_dir / f"{name}.collapsed")
+        run = ProfileRun(out_dir=out_dir, pstats_path=pstats_path, collapsed_path=collapsed_path)
+        print("\n" + "\n".join([*profile_report_lines(run, stats, sampler), f"(profiled {elapsed:.2f}s)"]))
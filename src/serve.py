@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import bisect
+import json
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+from src.backtest.sim import build_signals
+from src.storage.frame_store import read_table
+
+ROW_FIELDS = ("ticker", "date", "signal", "avg_compound", "docs", "volume_z")
+
+# Upper bounds (microseconds) of the latency histogram buckets; one overflow bucket follows.
+LATENCY_BUCKETS_US = (50, 100, 250, 500, 1_000, 2_500, 5_000, 10_000, 50_000)
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """
+    Latest features and signals, indexed for serving: per ticker, its dates
+    (sorted) and the matching rows already encoded as JSON, so a request is a
+    dict lookup, a bisect and a join.
+    """
+
+    version: int
+    source: str
+    mtime_ns: int
+    loaded_at: str
+    rows: int
+    dates: dict[str, list[str]]
+    encoded: dict[str, list[bytes]]
+    latest_all: bytes
+
+    def info(self) -> dict:
+        return {
+            "version": self.version,
+            "source": self.source,
+            "loaded_at": self.loaded_at,
+            "rows": self.rows,
+            "tickers": len(self.dates),
+        }
+
+
+def build_snapshot(
+    features: pd.DataFrame, signal_params: dict, source: str = "", mtime_ns: int = 0, version: int = 1
+) -> Snapshot:
+    dates: dict[str, list[str]] = {}
+    encoded: dict[str, list[bytes]] = {}
+    if len(features):
+        sig = build_signals(features, **signal_params)
+        sig = pd.DataFrame(
+            {
+                "ticker": sig["ticker"].astype(str).str.lower(),
+                "date": sig["date"].astype(str),
+                "signal": sig["signal"].astype(int),
+                "avg_compound": sig["avg_compound"].astype(float).round(6),
+                "docs": sig["docs"].astype(int),
+                "volume_z": sig["volume_z"].astype(float).round(6),
+            }
+        ).sort_values(["ticker", "date"], kind="stable")
+        for ticker, g in sig.groupby("ticker", sort=True):
+            recs = g[list(ROW_FIELDS)].to_dict("records")
+            dates[ticker] = [r["date"] for r in recs]
+            encoded[ticker] = [json.dumps(r).encode("utf-8") for r in recs]
+    latest_all = b"[" + b",".join(rows[-1] for rows in encoded.values()) + b"]"
+    return Snapshot(
+        version=version,
+        source=source,
+        mtime_ns=mtime_ns,
+        loaded_at=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        rows=sum(len(v) for v in dates.values()),
+        dates=dates,
+        encoded=encoded,
+        latest_all=latest_all,
+    )
+
+
+def load_snapshot(path: Path, signal_params: dict, version: int = 1) -> Snapshot:
+    path = Path(path)
+    mtime_ns = path.stat().st_mtime_ns
+    return build_snapshot(read_table(path), signal_params, source=str(path), mtime_ns=mtime_ns, version=version)
+
+
+def _json(obj) -> bytes:
+    return json.dumps(obj).encode("utf-8")
+
+
+def route_request(snap: Snapshot, target: str) -> tuple[str, int, bytes]:
+    """
+    (route name, HTTP status, JSON body) for a GET target:
+
+      /signals                               latest row per ticker
+      /signal/<ticker>                       latest row for one ticker
+      /signal/<ticker>?date=YYYY-MM-DD       latest row on or before that date
+      /history/<ticker>?start=...&end=...    rows in [start, end] (either bound optional)
+    """
+    url = urlsplit(target)
+    parts = [p for p in url.path.split("/") if p]
+    if parts == ["signals"]:
+        return "signals", 200, snap.latest_all
+    if len(parts) != 2 or parts[0] not in ("signal", "history"):
+        return "not_found", 404, _json({"error": f"unknown path {url.path}"})
+
+    route, ticker = parts[0], parts[1].lower()
+    dates = snap.dates.get(ticker)
+    if dates is None:
+        return route, 404, _json({"error": f"unknown ticker {ticker}"})
+    rows = snap.encoded[ticker]
+    q = parse_qs(url.query)
+
+    if route == "signal":
+        i = len(dates) if "date" not in q else bisect.bisect_right(dates, q["date"][0])
+        if i == 0:
+            return route, 404, _json({"error": f"no {ticker} row on or before {q['date'][0]}"})
+        return route, 200, rows[i - 1]
+
+    lo = bisect.bisect_left(dates, q["start"][0]) if "start" in q else 0
+    hi = bisect.bisect_right(dates, q["end"][0]) if "end" in q else len(dates)
+    return route, 200, b"[" + b",".join(rows[lo:hi]) + b"]"
+
+
+class LatencyHistogram:
+    """Request latencies per route in fixed buckets (LATENCY_BUCKETS_US)."""
+
+    def __init__(self):
+        self.counts: dict[str, list[int]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, route: str, seconds: float) -> None:
+        i = bisect.bisect_left(LATENCY_BUCKETS_US, seconds * 1e6)
+        with self._lock:
+            counts = self.counts.get(route)
+            if counts is None:
+                counts = self.counts[route] = [0] * (len(LATENCY_BUCKETS_US) + 1)
+            counts[i] += 1
+
+    def quantile_us(self, route: str, q: float) -> float | None:
+        """Upper bound of the bucket holding quantile `q` (inf for the overflow bucket)."""
+        counts = self.counts.get(route)
+        total = sum(counts) if counts else 0
+        if not total:
+            return None
+        need, seen = q * total, 0
+        for i, c in enumerate(counts):
+            seen += c
+            if seen >= need:
+                return float(LATENCY_BUCKETS_US[i]) if i < len(LATENCY_BUCKETS_US) else float("inf")
+        return float("inf")
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            counts = {route: list(c) for route, c in self.counts.items()}
+        labels = [f"le_{b}us" for b in LATENCY_BUCKETS_US] + ["overflow"]
+        return {
+            route: {
+                "count": sum(c),
+                "p50_us": self.quantile_us(route, 0.50),
+                "p99_us": self.quantile_us(route, 0.99),
+                "buckets": dict(zip(labels, c)),
+            }
+            for route, c in counts.items()
+        }
+
+
+class SignalHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive: clients reuse one connection
+    disable_nagle_algorithm = True  # headers and body go out as separate small writes
+    server: SignalServer
+
+    def do_GET(self) -> None:
+        t0 = time.perf_counter()
+        server = self.server
+        if self.path == "/metrics":
+            route, status, body = "metrics", 200, _json(server.metrics())
+        elif self.path == "/health":
+            route, status, body = "health", 200, _json(server.snapshot.info())
+        else:
+            route, status, body = route_request(server.snapshot, self.path)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        server.histogram.observe(route, time.perf_counter() - t0)
+
+    def log_message(self, format, *args) -> None:  # one line per request would dominate the cost
+        pass
+
+
+class SignalServer(ThreadingHTTPServer):
+    """
+    Serves the latest features/signals from an in-memory Snapshot. A watcher
+    thread checks `features_path` every `poll_sec` and, when a new file has
+    landed, builds the next snapshot off to the side and swaps it in with one
+    assignment; requests in flight keep the snapshot they started with.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], features_path: Path, signal_params: dict, poll_sec: float = 1.0):
+        self.features_path = Path(features_path)
+        self.signal_params = dict(signal_params)
+        self.poll_sec = poll_sec
+        self.snapshot = load_snapshot(self.features_path, self.signal_params)
+        self.histogram = LatencyHistogram()
+        self.swaps = 0
+        self.reload_errors = 0
+        self._stop_watch = threading.Event()
+        self._watcher: threading.Thread | None = None
+        super().__init__(address, SignalHandler)
+
+    def reload_if_changed(self) -> bool:
+        try:
+            mtime_ns = self.features_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if mtime_ns == self.snapshot.mtime_ns:
+            return False
+        try:
+            snap = load_snapshot(self.features_path, self.signal_params, version=self.snapshot.version + 1)
+        except Exception as e:  # keep serving the old snapshot; retried on the next poll
+            self.reload_errors += 1
+            print(f"[serve] reload of {self.features_path} failed: {e}")
+            return False
+        self.snapshot = snap
+        self.swaps += 1
+        return True
+
+    def _watch(self) -> None:
+        while not self._stop_watch.wait(self.poll_sec):
+            self.reload_if_changed()
+
+    def start_watcher(self) -> None:
+        self._watcher = threading.Thread(target=self._watch, name="snapshot-watcher", daemon=True)
+        self._watcher.start()
+
+    def metrics(self) -> dict:
+        return {
+            "snapshot": self.snapshot.info(),
+            "swaps": self.swaps,
+            "reload_errors": self.reload_errors,
+            "latency": self.histogram.to_dict(),
+        }
+
+    def server_close(self) -> None:
+        self._stop_watch.set()
+        super().server_close()
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+KEY_COLUMNS = ("ticker", "date", "day")
+COUNT_COLUMNS = ("docs", "n_positions")
+
+
+def _is_return(col: str) -> bool:
+    return col.startswith("fwd_ret") or col.endswith("_ret")
+
+
+def day_ordinals(dates: pd.Series) -> np.ndarray:
+    """int32 days since 1970-01-01 for 'YYYY-MM-DD' (or 'YYYY-MM-DD HH:MM') labels; -1 if unparseable."""
+    if isinstance(dates.dtype, pd.CategoricalDtype):
+        cats = pd.Series(dates.cat.categories)
+        per_cat = np.append(day_ordinals(cats), -1)  # code -1 (missing) -> last slot
+        return per_cat[dates.cat.codes.to_numpy()].astype(np.int32)
+    d = pd.to_datetime(dates.astype(str).str.slice(0, 10), format="%Y-%m-%d", errors="coerce")
+    days = d.to_numpy().astype("datetime64[D]")
+    return np.where(np.isnat(days), -1, days.astype(np.int64)).astype(np.int32)
+
+
+def sorted_category(s: pd.Series, lower: bool = False) -> pd.Series:
+    """Categorical with string categories in lexicographic order (so sorting by codes sorts by value)."""
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        cats = s.cat.categories.astype(str)
+        cats = cats.str.lower() if lower else cats
+        if cats.is_unique:
+            s = s.cat.rename_categories(cats)
+            return s.cat.reorder_categories(sorted(cats)) if not cats.is_monotonic_increasing else s
+    values = s.astype(str).str.lower() if lower else s.astype(str)
+    return values.astype(pd.CategoricalDtype(sorted(values.dropna().unique())))
+
+
+def apply_dtype_policy(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Memory-lean dtypes for feature / merged tables:
+      ticker, date  -> categorical (sorted string categories)
+      day           -> int32 day ordinal (added from `date` if missing)
+      docs          -> int32
+      other floats  -> float32, except return columns (fwd_ret_*, *_ret) which keep float64
+    """
+    out = df.copy()
+    if "ticker" in out.columns:
+        out["ticker"] = sorted_category(out["ticker"], lower=True)
+    if "date" in out.columns:
+        out["date"] = sorted_category(out["date"])
+        out["day"] = day_ordinals(out["date"])
+    for col in out.columns:
+        if col in KEY_COLUMNS:
+            continue
+        s = out[col]
+        if col in COUNT_COLUMNS and pd.api.types.is_numeric_dtype(s) and not s.isna().any():
+            out[col] = s.astype(np.int32)
+        elif pd.api.types.is_float_dtype(s) and not _is_return(col):
+            out[col] = s.astype(np.float32)
+    return out
+
+
+def object_equivalent_bytes(df: pd.DataFrame) -> int:
+    """
+    Estimated deep memory of `df` with object-string keys and 64-bit numerics
+    (the pre-policy layout), computed from category counts without materializing it.
+    """
+    n = len(df)
+    total = 0
+    for col in df.columns:
+        s = df[col]
+        if col == "day":
+            continue  # not present before the policy
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            counts = s.cat.codes.value_counts()
+            sizes = np.array([sys.getsizeof(str(c)) for c in s.cat.categories] + [sys.getsizeof(np.nan)])
+            total += 8 * n + int((counts.to_numpy() * sizes[counts.index.to_numpy()]).sum())
+        elif s.dtype == object:
+            total += int(s.memory_usage(index=False, deep=True))
+        else:
+            total += 8 * n
+    return total
+
+
+def memory_row(stage: str, table: str, df: pd.DataFrame) -> dict:
+    return {
+        "stage": stage,
+        "table": table,
+        "rows": int(len(df)),
+        "bytes": int(df.memory_usage(index=False, deep=True).sum()),
+        "object_float64_bytes": object_equivalent_bytes(df),
+    }
+
+
+def write_memory_report(rows: list[dict], out_path: Path) -> pd.DataFrame:
+    """Upsert (stage, table) rows into a small CSV report and return it."""
+    new = pd.DataFrame(rows)
+    if out_path.exists():
+        old = pd.read_csv(out_path)
+        keys = set(zip(new["stage"], new["table"]))
+        old = old[[(s, t) not in keys for s, t in zip(old["stage"], old["table"])]]
+        new = pd.concat([old, new], ignore_index=True)
+    new["saved_pct"] = (100.0 * (1.0 - new["bytes"] / new["object_float64_bytes"].where(new["object_float64_bytes"] > 0))).round(1)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    new.to_csv(out_path, index=False)
+    return new
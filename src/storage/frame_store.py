@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import json
+import os
+import struct
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+MAGIC = b"MSFRAME\x00"
+VERSION = 1
+ALIGN = 64
+FRAME_SUFFIX = ".frame"
+
+# magic, version, reserved, header length
+_PREAMBLE = struct.Struct("<8sHHI")
+
+
+def _pad(n: int) -> int:
+    return (-n) % ALIGN
+
+
+def _encode_column(s: pd.Series) -> tuple[dict, np.ndarray]:
+    """Schema entry + raw little-endian block for one column."""
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        cats = [str(c) for c in s.cat.categories]
+        codes = s.cat.codes.to_numpy().astype("<i4")
+        return {"kind": "string", "categories": cats, "categorical": True}, codes
+    if pd.api.types.is_datetime64_any_dtype(s.dtype):
+        tz = str(s.dt.tz) if getattr(s.dt, "tz", None) is not None else None
+        values = (s.dt.tz_convert("UTC").dt.tz_localize(None) if tz else s).astype("datetime64[ns]")
+        return {"kind": "datetime", "tz": tz}, values.to_numpy().view("<i8")
+    if pd.api.types.is_bool_dtype(s.dtype) and not s.isna().any():
+        return {"kind": "bool"}, s.to_numpy(dtype=bool)
+    if pd.api.types.is_numeric_dtype(s.dtype):
+        arr = s.to_numpy()
+        if arr.dtype.kind not in "iuf":  # nullable extension types with missing values
+            arr = s.to_numpy(dtype=float, na_value=np.nan)
+        return {"kind": "numeric"}, arr.astype(arr.dtype.newbyteorder("<"), copy=False)
+
+    # Strings / objects: dictionary-encoded, missing -> -1.
+    codes, uniques = pd.factorize(s, sort=True)
+    return {"kind": "string", "categories": [str(u) for u in uniques]}, codes.astype("<i4")
+
+
+def write_frame(df: pd.DataFrame, path: Path, meta: dict | None = None) -> Path:
+    """
+    Write `df` as a typed binary frame:
+
+        MAGIC | version | header_len | JSON schema | 64-byte aligned column blocks
+
+    Numeric, bool and datetime columns are raw arrays; strings are stored as
+    int32 codes into a sorted category list kept in the schema. The file is
+    written to a temp name and renamed, so readers never see a partial file.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    columns, blocks = [], []
+    for name in df.columns:
+        entry, block = _encode_column(df[name])
+        entry.update({"name": str(name), "dtype": block.dtype.str})
+        columns.append(entry)
+        blocks.append(np.ascontiguousarray(block))
+
+    # Offsets are relative to the start of the data section.
+    offset = 0
+    for entry, block in zip(columns, blocks):
+        entry["offset"] = offset
+        entry["nbytes"] = int(block.nbytes)
+        offset += block.nbytes + _pad(block.nbytes)
+
+    header = json.dumps({"n_rows": int(len(df)), "columns": columns, "meta": meta or {}}).encode("utf-8")
+    head_len = _PREAMBLE.size + len(header)
+
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(_PREAMBLE.pack(MAGIC, VERSION, 0, len(header)))
+        f.write(header)
+        f.write(b"\x00" * _pad(head_len))
+        for block in blocks:
+            f.write(block.tobytes())
+            f.write(b"\x00" * _pad(block.nbytes))
+    os.replace(tmp, path)
+    return path
+
+
+def read_schema(path: Path) -> tuple[dict, int]:
+    """(schema, data_start) of a frame file; raises ValueError on a foreign or newer file."""
+    with open(path, "rb") as f:
+        pre = f.read(_PREAMBLE.size)
+        if len(pre) < _PREAMBLE.size:
+            raise ValueError(f"{path} is too short to be a frame file.")
+        magic, version, _reserved, header_len = _PREAMBLE.unpack(pre)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a frame file (bad magic).")
+        if version > VERSION:
+            raise ValueError(f"{path} has frame version {version}; this code reads up to {VERSION}.")
+        schema = json.loads(f.read(header_len).decode("utf-8"))
+    head_len = _PREAMBLE.size + header_len
+    return schema, head_len + _pad(head_len)
+
+
+def read_frame(path: Path, columns: list[str] | None = None, mmap: bool = True) -> pd.DataFrame:
+    """
+    Load a frame file. With `mmap`, numeric columns are copy-on-write views of
+    the mapped file (no parse, no copy until written); string columns are
+    rebuilt from their codes, as categoricals if they were written as such.
+    """
+    path = Path(path)
+    schema, data_start = read_schema(path)
+    n = int(schema["n_rows"])
+    entries = schema["columns"]
+    if columns is not None:
+        wanted = set(columns)
+        entries = [e for e in entries if e["name"] in wanted]
+
+    if mmap and path.stat().st_size > data_start:
+        buf = np.memmap(path, dtype=np.uint8, mode="c")
+    else:
+        buf = np.frombuffer(path.read_bytes(), dtype=np.uint8)
+
+    data = {}
+    for e in entries:
+        arr = np.frombuffer(buf, dtype=np.dtype(e["dtype"]), count=n, offset=data_start + e["offset"])
+        kind = e["kind"]
+        if kind == "string" and e.get("categorical"):
+            data[e["name"]] = pd.Categorical.from_codes(np.asarray(arr, dtype=np.int32), categories=e["categories"])
+        elif kind == "string":
+            cats = np.asarray(e["categories"], dtype=object)
+            values = np.empty(n, dtype=object)
+            ok = arr >= 0
+            values[ok] = cats[arr[ok]] if len(cats) else None
+            values[~ok] = np.nan
+            data[e["name"]] = values
+        elif kind == "datetime":
+            s = pd.Series(arr.view("datetime64[ns]"), copy=False)
+            data[e["name"]] = s.dt.tz_localize("UTC").dt.tz_convert(e["tz"]) if e.get("tz") else s
+        else:
+            data[e["name"]] = arr if mmap else arr.copy()
+    return pd.DataFrame(data, columns=[e["name"] for e in entries], copy=False)
+
+
+def is_frame_path(path: Path) -> bool:
+    return Path(path).suffix == FRAME_SUFFIX
+
+
+def read_table(path: Path, columns: list[str] | None = None) -> pd.DataFrame:
+    """Read a stage table by suffix: typed `.frame` file, else CSV."""
+    path = Path(path)
+    if is_frame_path(path):
+        return read_frame(path, columns=columns)
+    return pd.read_csv(path, usecols=columns)
+
+
+def write_table(df: pd.DataFrame, path: Path, csv_copy: Path | None = None) -> Path:
+    """
+    Write a stage table by suffix (`.frame` or CSV). `csv_copy` additionally
+    exports a human-readable CSV.
+    """
+    path = Path(path)
+    if is_frame_path(path):
+        write_frame(df, path)
+    else:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        df.to_csv(path, index=False)
+    if csv_copy is not None:
+        Path(csv_copy).parent.mkdir(parents=True, exist_ok=True)
+        df.to_csv(csv_copy, index=False)
+    return path
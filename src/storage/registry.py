@@ -0,0 +1,330 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sqlite3
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterable
+
+REGISTRY_PATH = Path("data") / "runs.sqlite"
+SCHEMA_VERSION = 1
+
+# Result columns, in EvalResult / SimResult field order (the dataclasses stay in src/backtest).
+EVAL_COLUMNS = [
+    "merged_rows",
+    "ic_spearman_1d",
+    "ic_perm_pvalue",
+    "events_n",
+    "event_mean_1d",
+    "event_mean_3d",
+    "event_mean_1d_ci_lo",
+    "event_mean_1d_ci_hi",
+    "event_mean_3d_ci_lo",
+    "event_mean_3d_ci_hi",
+]
+SIM_COLUMNS = ["n_signal_days", "n_trades", "sharpe_annual", "max_drawdown"]
+SWEEP_COLUMNS = [
+    "rule",
+    "sent_thresh",
+    "vol_thresh",
+    "min_docs",
+    "slippage_bps",
+    "rung",
+    "trades",
+    "total_return",
+    "sharpe_ann",
+    "max_drawdown",
+]
+TIMING_COLUMNS = [
+    "step",
+    "status",
+    "seconds",
+    "rows_in",
+    "rows_out",
+    "peak_heap_mb",
+    "peak_rss_mb",
+    "http_requests",
+    "cache_hits",
+    "cache_misses",
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    stage TEXT NOT NULL,
+    status TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    runtime_sec REAL,
+    params TEXT NOT NULL,
+    metrics TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_started ON runs (started_at);
+CREATE INDEX IF NOT EXISTS runs_stage_started ON runs (stage, started_at);
+
+CREATE TABLE IF NOT EXISTS eval_results (
+    run_id TEXT PRIMARY KEY REFERENCES runs (run_id) ON DELETE CASCADE,
+    merged_rows INTEGER,
+    ic_spearman_1d REAL,
+    ic_perm_pvalue REAL,
+    events_n INTEGER,
+    event_mean_1d REAL,
+    event_mean_3d REAL,
+    event_mean_1d_ci_lo REAL,
+    event_mean_1d_ci_hi REAL,
+    event_mean_3d_ci_lo REAL,
+    event_mean_3d_ci_hi REAL
+);
+
+CREATE TABLE IF NOT EXISTS sim_results (
+    run_id TEXT PRIMARY KEY REFERENCES runs (run_id) ON DELETE CASCADE,
+    n_signal_days INTEGER,
+    n_trades INTEGER,
+    sharpe_annual REAL,
+    max_drawdown REAL,
+    portfolio_csv TEXT
+);
+
+CREATE TABLE IF NOT EXISTS sweep_rows (
+    run_id TEXT NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+    idx INTEGER NOT NULL,
+    kind TEXT NOT NULL,  -- grid, halving or rules
+    rule TEXT,
+    sent_thresh REAL,
+    vol_thresh REAL,
+    min_docs INTEGER,
+    slippage_bps REAL,
+    rung INTEGER,
+    trades INTEGER,
+    total_return REAL,
+    sharpe_ann REAL,
+    max_drawdown REAL,
+    PRIMARY KEY (run_id, idx)
+);
+CREATE INDEX IF NOT EXISTS sweep_best ON sweep_rows (run_id, trades DESC, total_return DESC);
+
+CREATE TABLE IF NOT EXISTS stage_timings (
+    run_id TEXT NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+    idx INTEGER NOT NULL,
+    step TEXT NOT NULL,
+    status TEXT NOT NULL,
+    seconds REAL,
+    rows_in INTEGER,
+    rows_out INTEGER,
+    peak_heap_mb REAL,
+    peak_rss_mb REAL,
+    http_requests INTEGER,
+    cache_hits INTEGER,
+    cache_misses INTEGER,
+    PRIMARY KEY (run_id, idx)
+);
+CREATE INDEX IF NOT EXISTS timings_step ON stage_timings (step, run_id);
+"""
+
+# One row per run with its headline results; the basis of list_runs / compare_runs.
+RUN_SUMMARY = """
+SELECT r.run_id, r.stage, r.status, r.started_at, r.runtime_sec,
+       e.ic_spearman_1d, e.ic_perm_pvalue, e.events_n,
+       s.n_trades, s.sharpe_annual, s.max_drawdown,
+       (SELECT COUNT(*) FROM sweep_rows w WHERE w.run_id = r.run_id) AS sweep_rows
+FROM runs r
+LEFT JOIN eval_results e ON e.run_id = r.run_id
+LEFT JOIN sim_results s ON s.run_id = r.run_id
+"""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def new_run_id() -> str:
+    """Local start time to the microsecond plus a random suffix: unique across concurrent runs, still sortable."""
+    return f"{datetime.now().strftime('%Y%m%dT%H%M%S%f')}-{uuid.uuid4().hex[:6]}"
+
+
+def _value(v: Any) -> Any:
+    """numpy/pandas scalars -> plain Python for sqlite3; NaN -> NULL."""
+    if v is None:
+        return None
+    if hasattr(v, "item"):
+        v = v.item()
+    if isinstance(v, float) and v != v:
+        return None
+    return v
+
+
+class RunRegistry:
+    """
+    SQLite record of pipeline runs: parameters, eval / simulation results,
+    sweep rows and per-step timings, keyed by run_id. Reports and charts read
+    the latest results from here instead of parsing the markdown reports.
+    """
+
+    def __init__(self, path: Path = REGISTRY_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")  # readers (reports, serve) do not block the writer
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            with self.conn:
+                self.conn.executescript(SCHEMA)
+                self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    @classmethod
+    def open_existing(cls, path: Path = REGISTRY_PATH) -> RunRegistry | None:
+        """The registry at `path`, or None if no run has created it yet."""
+        return cls(path) if Path(path).exists() else None
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> RunRegistry:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ---- writes ----
+
+    def begin_run(self, run_id: str, stage: str, params: dict) -> None:
+        """Raises sqlite3.IntegrityError if `run_id` is already taken, rather than overwriting that run."""
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO runs (run_id, stage, status, started_at, params) VALUES (?, ?, 'running', ?, ?)",
+                (run_id, stage, _now(), json.dumps(params, sort_keys=True, default=str)),
+            )
+
+    def finish_run(self, run_id: str, status: str, runtime_sec: float, metrics: dict | None = None) -> None:
+        with self.conn:
+            self.conn.execute(
+                "UPDATE runs SET status = ?, finished_at = ?, runtime_sec = ?, metrics = ? WHERE run_id = ?",
+                (status, _now(), runtime_sec, json.dumps(metrics or {}, sort_keys=True, default=str), run_id),
+            )
+
+    def record_eval(self, run_id: str, result: Any) -> None:
+        cols = ["run_id", *EVAL_COLUMNS]
+        vals = [run_id, *(_value(getattr(result, c)) for c in EVAL_COLUMNS)]
+        with self.conn:
+            self.conn.execute(
+                f"INSERT OR REPLACE INTO eval_results ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})", vals
+            )
+
+    def record_sim(self, run_id: str, result: Any) -> None:
+        cols = ["run_id", *SIM_COLUMNS, "portfolio_csv"]
+        vals = [run_id, *(_value(getattr(result, c)) for c in SIM_COLUMNS), str(result.out_portfolio_csv)]
+        with self.conn:
+            self.conn.execute(
+                f"INSERT OR REPLACE INTO sim_results ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})", vals
+            )
+
+    def record_sweep(self, run_id: str, rows: Iterable[dict], kind: str) -> int:
+        """Sweep result rows (e.g. `df.to_dict("records")`); columns outside SWEEP_COLUMNS are ignored."""
+        cols = ["run_id", "idx", "kind", *SWEEP_COLUMNS]
+        records = [(run_id, i, kind, *(_value(r.get(c)) for c in SWEEP_COLUMNS)) for i, r in enumerate(rows)]
+        with self.conn:
+            self.conn.execute("DELETE FROM sweep_rows WHERE run_id = ?", (run_id,))
+            self.conn.executemany(
+                f"INSERT INTO sweep_rows ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})", records
+            )
+        return len(records)
+
+    def record_timings(self, run_id: str, rows: Iterable[dict]) -> None:
+        cols = ["run_id", "idx", *TIMING_COLUMNS]
+        records = [(run_id, i, *(_value(r.get(c)) for c in TIMING_COLUMNS)) for i, r in enumerate(rows)]
+        with self.conn:
+            self.conn.execute("DELETE FROM stage_timings WHERE run_id = ?", (run_id,))
+            self.conn.executemany(
+                f"INSERT INTO stage_timings ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})", records
+            )
+
+    # ---- reads ----
+
+    def latest_eval(self) -> dict | None:
+        """EvalResult fields of the most recent run that evaluated, plus its run_id."""
+        row = self.conn.execute(
+            "SELECT e.* FROM eval_results e JOIN runs r USING (run_id) ORDER BY r.started_at DESC, r.rowid DESC LIMIT 1"
+        ).fetchone()
+        return dict(row) if row is not None else None
+
+    def latest_sim(self) -> dict | None:
+        row = self.conn.execute(
+            "SELECT s.* FROM sim_results s JOIN runs r USING (run_id) ORDER BY r.started_at DESC, r.rowid DESC LIMIT 1"
+        ).fetchone()
+        return dict(row) if row is not None else None
+
+    def latest_sweep_run(self, kinds: tuple[str, ...] = ("grid", "halving")) -> str | None:
+        row = self.conn.execute(
+            f"SELECT r.run_id FROM runs r WHERE EXISTS (SELECT 1 FROM sweep_rows w WHERE w.run_id = r.run_id "
+            f"AND w.kind IN ({', '.join('?' * len(kinds))})) ORDER BY r.started_at DESC, r.rowid DESC LIMIT 1",
+            kinds,
+        ).fetchone()
+        return row[0] if row is not None else None
+
+    def best_sweep_row(self, run_id: str | None = None) -> dict | None:
+        """Most-trading config of a sweep (ties: higher total return), from the latest grid sweep by default."""
+        run_id = run_id or self.latest_sweep_run()
+        if run_id is None:
+            return None
+        row = self.conn.execute(
+            "SELECT * FROM sweep_rows WHERE run_id = ? ORDER BY trades DESC, total_return DESC, idx LIMIT 1",
+            (run_id,),
+        ).fetchone()
+        return dict(row) if row is not None else None
+
+    def sweep_rows(self, run_id: str) -> list[dict]:
+        return [dict(r) for r in self.conn.execute("SELECT * FROM sweep_rows WHERE run_id = ? ORDER BY idx", (run_id,))]
+
+    def timings(self, run_id: str) -> list[dict]:
+        return [
+            dict(r) for r in self.conn.execute("SELECT * FROM stage_timings WHERE run_id = ? ORDER BY idx", (run_id,))
+        ]
+
+    def list_runs(self, limit: int = 20, stage: str | None = None) -> list[dict]:
+        """Newest runs first, one summary row each."""
+        where, args = ("WHERE r.stage = ?", [stage]) if stage else ("", [])
+        sql = f"{RUN_SUMMARY} {where} ORDER BY r.started_at DESC, r.rowid DESC LIMIT ?"
+        return [dict(r) for r in self.conn.execute(sql, [*args, limit])]
+
+    def compare_runs(self, run_ids: list[str]) -> list[dict]:
+        sql = f"{RUN_SUMMARY} WHERE r.run_id IN ({', '.join('?' * len(run_ids))}) ORDER BY r.started_at"
+        return [dict(r) for r in self.conn.execute(sql, run_ids)]
+
+
+def format_runs(rows: list[dict]) -> str:
+    cols = ["run_id", "stage", "status", "runtime_sec", "ic_spearman_1d", "ic_perm_pvalue", "events_n",
+            "n_trades", "sharpe_annual", "max_drawdown", "sweep_rows"]  # fmt: skip
+
+    def cell(v) -> str:
+        if v is None:
+            return ""
+        return f"{v:.4f}" if isinstance(v, float) else str(v)
+
+    table = [cols, *([cell(r[c]) for c in cols] for r in rows)]
+    widths = [max(len(row[i]) for row in table) for i in range(len(cols))]
+    lines = ["  ".join(v.ljust(w) for v, w in zip(row, widths)).rstrip() for row in table]
+    return "\n".join([lines[0], "  ".join("-" * w for w in widths), *lines[1:]])
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="List or compare registered pipeline runs.")
+    p.add_argument("--db", default=str(REGISTRY_PATH), help="Registry database.")
+    p.add_argument("--limit", type=int, default=20, help="Newest N runs.")
+    p.add_argument("--stage", default=None, help="Only runs of this --stage.")
+    p.add_argument("--compare", nargs="+", metavar="RUN_ID", help="Show these runs side by side instead.")
+    args = p.parse_args()
+
+    registry = RunRegistry.open_existing(Path(args.db))
+    if registry is None:
+        print(f"No registry at {args.db}; run the pipeline first.")
+        return
+    with registry:
+        rows = registry.compare_runs(args.compare) if args.compare else registry.list_runs(args.limit, args.stage)
+    print(format_runs(rows))
+
+
+if __name__ == "__main__":
+    main()
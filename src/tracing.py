@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import functools
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+# Worker processes find the trace through these (spawned workers re-import this module).
+TRACE_DIR_ENV = "MSS_TRACE_DIR"
+TRACE_PID_ENV = "MSS_TRACE_MAIN_PID"
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "cat", "args", "t0")
+
+    def __init__(self, tracer: Tracer, name: str, cat: str, args: dict | None):
+        self.tracer, self.name, self.cat, self.args = tracer, name, cat, args
+
+    def __enter__(self):
+        self.tracer._depth_change(+1)
+        self.t0 = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        t1 = time.perf_counter_ns()
+        self.tracer._complete(self.name, self.cat, self.t0, t1, self.args)
+        self.tracer._depth_change(-1)
+        return False
+
+
+class Tracer:
+    """
+    Collects Chrome trace "complete" events (ph "X": name, start, duration,
+    pid, tid). Timestamps come from perf_counter, which is system-wide, so
+    events from worker processes line up with the parent's.
+
+    The main process keeps its events in memory. Worker processes (forked or
+    spawned) append theirs to `parts_dir/trace-<pid>.jsonl` whenever their
+    outermost span closes; `write` merges everything into one trace file.
+    """
+
+    def __init__(self, parts_dir: Path, main_pid: int | None = None):
+        self.parts_dir = Path(parts_dir)
+        self.main_pid = main_pid if main_pid is not None else os.getpid()
+        self.pid = os.getpid()
+        self.events: list[dict] = []
+        self.thread_names: dict[int, str] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _own_pid(self) -> int:
+        pid = os.getpid()
+        if pid != self.pid:  # forked: drop the parent's events inherited with the memory image
+            self.pid, self.events, self.thread_names = pid, [], {}
+            self._local = threading.local()
+        return pid
+
+    def _depth_change(self, step: int) -> None:
+        pid = self._own_pid()  # first, so a forked worker starts from depth 0
+        depth = getattr(self._local, "depth", 0) + step
+        self._local.depth = depth
+        if depth == 0 and pid != self.main_pid:
+            self.flush_part()
+
+    def _complete(self, name: str, cat: str, t0: int, t1: int, args: dict | None) -> None:
+        pid = self._own_pid()
+        tid = threading.get_native_id()
+        if tid not in self.thread_names:
+            self.thread_names[tid] = threading.current_thread().name
+        ev = {"name": name, "cat": cat, "ph": "X", "ts": t0 / 1000.0, "dur": (t1 - t0) / 1000.0, "pid": pid, "tid": tid}
+        if args:
+            ev["args"] = args
+        self.events.append(ev)  # list.append is atomic under the GIL
+
+    def span(self, name: str, cat: str = "pipeline", args: dict | None = None) -> _Span:
+        return _Span(self, name, cat, args)
+
+    def _metadata(self, pid: int, thread_names: dict[int, str]) -> list[dict]:
+        label = "pipeline" if pid == self.main_pid else f"worker {pid}"
+        meta = [{"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": label}}]
+        meta += [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": tname}}
+            for tid, tname in thread_names.items()
+        ]
+        return meta
+
+    def flush_part(self) -> None:
+        """Append this process's pending events to its part file."""
+        with self._lock:
+            events, self.events = self.events, []
+            names, self.thread_names = self.thread_names, {}
+        if not events:
+            return
+        self.parts_dir.mkdir(parents=True, exist_ok=True)
+        lines = "".join(json.dumps(e) + "\n" for e in [*self._metadata(self.pid, names), *events])
+        with open(self.parts_dir / f"trace-{self.pid}.jsonl", "a", encoding="utf-8") as f:
+            f.write(lines)
+
+    def write(self, out_path: Path) -> Path:
+        """Merge in-memory and worker part events into one Chrome trace JSON file; part files are removed."""
+        events = [*self._metadata(self.pid, self.thread_names), *self.events]
+        parts = sorted(self.parts_dir.glob("trace-*.jsonl")) if self.parts_dir.exists() else []
+        for part in parts:
+            with open(part, encoding="utf-8") as f:
+                events += [json.loads(line) for line in f if line.strip()]
+            part.unlink()
+        merged, seen = [], set()
+        for e in events:
+            if e["ph"] == "M":  # each worker flush repeats its process/thread names
+                key = (e["name"], e["pid"], e["tid"])
+                if key in seen:
+                    continue
+                seen.add(key)
+            merged.append(e)
+        if self.parts_dir.exists() and not any(self.parts_dir.iterdir()):
+            self.parts_dir.rmdir()
+
+        out_path = Path(out_path)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = out_path.with_name(out_path.name + ".tmp")
+        tmp.write_text(json.dumps({"traceEvents": merged, "displayTimeUnit": "ms"}), encoding="utf-8")
+        os.replace(tmp, out_path)
+        return out_path
+
+
+def _from_env() -> Tracer | None:
+    parts = os.environ.get(TRACE_DIR_ENV)
+    if not parts:
+        return None
+    return Tracer(Path(parts), main_pid=int(os.environ.get(TRACE_PID_ENV, "0")) or None)
+
+
+_TRACER: Tracer | None = _from_env()
+
+
+def span(name: str, cat: str = "pipeline", args: dict | None = None):
+    """
+    `with span("score", cat="features", args={"ticker": t}):` records one
+    trace event; a shared no-op object when tracing is off.
+    """
+    if _TRACER is None:
+        return _NOOP
+    return _TRACER.span(name, cat, args)
+
+
+def traced(name: str | None = None, cat: str = "pipeline"):
+    """Decorator form of `span`, named after the function by default."""
+
+    def deco(fn):
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*a, **kw):
+            if _TRACER is None:
+                return fn(*a, **kw)
+            with _TRACER.span(label, cat):
+                return fn(*a, **kw)
+
+        return wrapper
+
+    return deco
+
+
+def enabled() -> bool:
+    return _TRACER is not None
+
+
+def start(parts_dir: Path) -> Tracer:
+    """Start tracing in this process and in any worker processes it starts from now on."""
+    global _TRACER
+    _TRACER = Tracer(parts_dir)
+    os.environ[TRACE_DIR_ENV] = str(parts_dir)
+    os.environ[TRACE_PID_ENV] = str(os.getpid())
+    return _TRACER
+
+
+def stop(out_path: Path) -> Path | None:
+    """Stop tracing and write the merged trace; None if tracing was not on."""
+    global _TRACER
+    tracer, _TRACER = _TRACER, None
+    os.environ.pop(TRACE_DIR_ENV, None)
+    os.environ.pop(TRACE_PID_ENV, None)
+    if tracer is None:
+        return None
+    return tracer.write(out_path)
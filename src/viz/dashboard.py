@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import json
+import re
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src import tracing
+from src.backtest.sim import build_signals
+from src.storage.frame_store import read_table
+from src.storage.registry import REGISTRY_PATH, RunRegistry
+from src.viz.make_charts import downsample_minmax, load_equity_curve
+
+DASHBOARD_DIR = Path("dashboard")
+TEMPLATE = Path(__file__).with_name("dashboard_template.html")
+CHUNK_DIR = "tickers"  # under DASHBOARD_DIR
+
+# Longer ticker timelines are averaged into this many buckets; the page never draws more points.
+TICKER_MAX_POINTS = 1_000
+EQUITY_MAX_POINTS = 2_000
+DECIMALS = 4
+EPOCH = pd.Timestamp("1970-01-01")
+
+
+def _epoch_days(dates: pd.Series) -> np.ndarray:
+    return ((pd.to_datetime(dates.astype(str)) - EPOCH).dt.days).to_numpy(dtype=np.int64)
+
+
+def _rounded(values) -> list:
+    """Floats rounded for the wire; NaN -> null."""
+    arr = np.round(np.asarray(values, dtype=np.float64), DECIMALS)
+    return [None if v != v else v for v in arr.tolist()]
+
+
+def chunk_name(ticker: str) -> str:
+    return re.sub(r"[^a-z0-9._-]", "_", ticker.lower()) + ".js"
+
+
+def aggregate_timelines(
+    features: pd.DataFrame, signal_params: dict, max_points: int = TICKER_MAX_POINTS
+) -> pd.DataFrame:
+    """
+    One row per (ticker, bucket): a ticker's days split into at most
+    `max_points` consecutive buckets (one day each when it has fewer) with
+    doc-weighted sentiment, peak volume_z, total docs and the net signal.
+    """
+    sig = build_signals(features, **signal_params)
+    df = pd.DataFrame(
+        {
+            "ticker": sig["ticker"].astype(str).str.lower(),
+            "day": _epoch_days(sig["date"]),
+            "docs": sig["docs"].astype(np.int64),
+            "avg_compound": sig["avg_compound"].astype(np.float64),
+            "volume_z": sig["volume_z"].astype(np.float64),
+            "signal": sig["signal"].astype(np.int64),
+        }
+    ).sort_values(["ticker", "day"], kind="stable")
+    pos = df.groupby("ticker", sort=False).cumcount().to_numpy()
+    n = df.groupby("ticker", sort=False)["day"].transform("size").to_numpy()
+    df["bucket"] = pos * np.minimum(n, max_points) // n
+    df["weighted"] = df["avg_compound"] * df["docs"]
+
+    out = df.groupby(["ticker", "bucket"], sort=True).agg(
+        day=("day", "first"),
+        docs=("docs", "sum"),
+        weighted=("weighted", "sum"),
+        mean_compound=("avg_compound", "mean"),
+        volume_z=("volume_z", "max"),
+        signal=("signal", "sum"),
+    )
+    out["avg_compound"] = np.where(out["docs"] > 0, out["weighted"] / out["docs"].clip(lower=1), out["mean_compound"])
+    out["signal"] = np.sign(out["signal"])
+    return out.reset_index()[["ticker", "day", "docs", "avg_compound", "volume_z", "signal"]]
+
+
+def ticker_chunk(ticker: str, g: pd.DataFrame) -> dict:
+    """Columnar, delta-coded days: the compact wire format the page decodes."""
+    days = g["day"].to_numpy()
+    return {
+        "t": ticker,
+        "d": np.diff(days, prepend=0).tolist(),  # first entry is the absolute epoch day
+        "s": _rounded(g["avg_compound"]),
+        "v": _rounded(g["volume_z"]),
+        "n": g["docs"].astype(int).tolist(),
+        "g": g["signal"].astype(int).tolist(),
+    }
+
+
+def sweep_heatmap(rows: list[dict]) -> dict | None:
+    """
+    Best total return / Sharpe over min_docs for each (sent_thresh, vol_thresh),
+    one grid per slippage level. Halving sweeps contribute each config's last rung.
+    """
+    df = pd.DataFrame(rows)
+    if df.empty or df[["sent_thresh", "vol_thresh"]].isna().all().any():
+        return None
+    config = ["sent_thresh", "vol_thresh", "min_docs", "slippage_bps"]
+    if df["rung"].notna().any():
+        df = df.sort_values("rung").groupby(config, dropna=False).tail(1)
+    sents = sorted(df["sent_thresh"].dropna().unique().tolist())
+    vols = sorted(df["vol_thresh"].dropna().unique().tolist())
+    slips = sorted(df["slippage_bps"].fillna(0).unique().tolist())
+    out: dict = {"sent": sents, "vol": vols, "slip": slips, "metrics": {}}
+    for metric in ("total_return", "sharpe_ann"):
+        best = df.assign(slippage_bps=df["slippage_bps"].fillna(0)).pivot_table(
+            index=["slippage_bps", "sent_thresh"], columns="vol_thresh", values=metric, aggfunc="max"
+        )
+        grids = []
+        for slip in slips:
+            grid = best.loc[slip].reindex(index=sents, columns=vols) if slip in best.index else None
+            grids.append([_rounded(r) for r in grid.to_numpy()] if grid is not None else None)
+        out["metrics"][metric] = grids
+    return out
+
+
+def _script_json(obj) -> str:
+    # Safe inside <script>: a literal "</" would end the element early.
+    return json.dumps(obj, separators=(",", ":")).replace("</", "<\\/")
+
+
+@tracing.traced(cat="dashboard")
+def build_dashboard(
+    features_path: Path,
+    signal_params: dict,
+    portfolio_csv: Path,
+    out_dir: Path = DASHBOARD_DIR,
+    registry_path: Path = REGISTRY_PATH,
+    max_points: int = TICKER_MAX_POINTS,
+) -> Path:
+    """
+    Write out_dir/index.html (ticker index, equity curve and sweep heatmap
+    inline) plus one small script per ticker under out_dir/tickers/, which the
+    page loads with a <script> tag when that ticker is opened. Script tags,
+    unlike fetch(), also work from file://, so no server is needed.
+    """
+    out_dir = Path(out_dir)
+    chunk_dir = out_dir / CHUNK_DIR
+    if chunk_dir.exists():
+        shutil.rmtree(chunk_dir)  # drop chunks of tickers no longer in the panel
+    chunk_dir.mkdir(parents=True)
+
+    timelines = aggregate_timelines(read_table(features_path), signal_params, max_points=max_points)
+    index = []
+    for ticker, g in timelines.groupby("ticker", sort=True):
+        name = chunk_name(ticker)
+        body = f"window.dashboardChunk({_script_json(ticker_chunk(ticker, g))});\n"
+        (chunk_dir / name).write_text(body, encoding="utf-8")
+        last = g.iloc[-1]
+        index.append(
+            {
+                "t": ticker,
+                "f": f"{CHUNK_DIR}/{name}",
+                "rows": int(len(g)),
+                "last": int(last["day"]),
+                "s": _rounded([last["avg_compound"]])[0],
+                "g": int(last["signal"]),
+            }
+        )
+
+    equity = None
+    eq = load_equity_curve(Path(portfolio_csv))
+    if eq is not None:
+        days = _epoch_days(eq["date"].dt.strftime("%Y-%m-%d"))
+        x, y = downsample_minmax(days, eq["equity"].to_numpy(dtype=float), EQUITY_MAX_POINTS)
+        equity = {"d": np.diff(x, prepend=0).tolist(), "e": _rounded(y)}
+
+    heatmap, run_id = None, None
+    registry = RunRegistry.open_existing(registry_path)
+    if registry is not None:
+        with registry:
+            run_id = registry.latest_sweep_run()
+            heatmap = sweep_heatmap(registry.sweep_rows(run_id)) if run_id else None
+
+    data = {
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "signal_params": signal_params,
+        "tickers": index,
+        "equity": equity,
+        "sweep": heatmap,
+        "sweep_run": run_id,
+    }
+    html = TEMPLATE.read_text(encoding="utf-8").replace("__DASHBOARD_DATA__", _script_json(data))
+    out = out_dir / "index.html"
+    out.write_text(html, encoding="utf-8")
+    return out
@@ -1,11 +1,24 @@
 from __future__ import annotations
 
-import re
+import hashlib
+import json
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
 
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 
+from src import tracing
+from src.dag import FileHasher
+from src.storage.frame_store import is_frame_path, read_table
+from src.storage.registry import REGISTRY_PATH, RunRegistry
+
+plt.switch_backend("Agg")  # files only; also the one backend that is safe in forked workers
 plt.style.use("seaborn-v0_8-whitegrid")
 plt.rcParams.update(
     {
@@ -18,13 +31,81 @@ plt.rcParams.update(
 
 REPORT_DIR = Path("report")
 FIG_DIR = REPORT_DIR / "figures"
+MERGED_TABLE = Path("data") / "intermediate" / "merged_table.frame"  # written by the simulate stage
+CHART_STATE = Path("data") / ".chart_state.json"
+
+DPI = 200
+# Bump when the drawing code changes, so figures cached under the old code are redrawn.
+CHART_VERSION = 2
+# Above this many ticker-days the sentiment/return scatter becomes a hexbin density plot.
+SCATTER_MAX_POINTS = 20_000
+HEXBIN_GRIDSIZE = 80
+# Longer equity curves are reduced to per-bucket min/max before plotting.
+EQUITY_MAX_POINTS = 4_000
+
+
+@dataclass(frozen=True)
+class ChartPaths:
+    report_dir: Path = REPORT_DIR
+    fig_dir: Path = FIG_DIR
+    registry_path: Path = REGISTRY_PATH
+    merged_table: Path = MERGED_TABLE
+
+    def scatter_table(self) -> Path:
+        """The typed merged table; the CSV export only for runs that predate it."""
+        csv = self.report_dir / "day6_merged_table.csv"
+        return self.merged_table if self.merged_table.exists() or not csv.exists() else csv
+
+
+@dataclass
+class ChartRun:
+    name: str
+    status: str  # drawn, cached or missing (inputs not there yet)
+    seconds: float = 0.0
+    out: Path | None = None
+
+
+@dataclass
+class ChartReport:
+    runs: list[ChartRun] = field(default_factory=list)
+    workers: int = 0
+    seconds: float = 0.0
+
+    def count(self, status: str) -> int:
+        return sum(r.status == status for r in self.runs)
+
+
+def downsample_minmax(x: np.ndarray, y: np.ndarray, max_points: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    At most ~max_points of (x, y): each of max_points // 2 equal-width buckets
+    keeps its min and max (in order), so peaks and drawdowns survive the cut.
+    """
+    n = len(y)
+    if n <= max_points:
+        return x, y
+    edges = np.linspace(0, n, max_points // 2 + 1).astype(np.int64)
+    keep = [0, n - 1]
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        if hi > lo:
+            seg = y[lo:hi]
+            keep += [lo + int(np.argmin(seg)), lo + int(np.argmax(seg))]
+    idx = np.unique(np.asarray(keep))
+    return x[idx], y[idx]
+
+
+def _save(fig_dir: Path, name: str) -> Path:
+    out = fig_dir / name
+    plt.savefig(out, dpi=DPI)
+    plt.close()
+    print(f"Wrote {out}")
+    return out
 
 
-def plot_equity_curve():
-    path = REPORT_DIR / "portfolio_daily.csv"
+def load_equity_curve(path: Path) -> pd.DataFrame | None:
+    """date / equity from a portfolio_daily.csv, sorted; None (with a message) if there is nothing to plot."""
     if not path.exists():
         print(f"Missing {path}. Run simulate stage first.")
-        return
+        return None
 
     df = pd.read_csv(path)
 
@@ -34,7 +115,7 @@ def plot_equity_curve():
         if "portfolio_ret" not in df.columns:
             print(f"Cannot plot equity: missing both 'equity' and 'portfolio_ret' in {path}")
             print(f"Found columns: {list(df.columns)}")
-            return
+            return None
         df["portfolio_ret"] = pd.to_numeric(df["portfolio_ret"], errors="coerce").fillna(0.0)
         df["equity"] = (1.0 + df["portfolio_ret"]).cumprod()
 
@@ -43,96 +124,88 @@ def plot_equity_curve():
     df = df.dropna(subset=["date", "equity"]).sort_values("date")
     if df.empty:
         print("No equity data to plot.")
-        return
+        return None
+    return df[["date", "equity"]]
+
+
+@tracing.traced(cat="charts")
+def plot_equity_curve(paths: ChartPaths = ChartPaths()) -> Path | None:
+    df = load_equity_curve(paths.report_dir / "portfolio_daily.csv")
+    if df is None:
+        return None
+
+    x, y = downsample_minmax(df["date"].to_numpy(), df["equity"].to_numpy(dtype=float), EQUITY_MAX_POINTS)
 
     plt.figure()
-    plt.plot(df["date"], df["equity"])
+    plt.plot(x, y)
     plt.title("Equity Curve (Simulation)")
     plt.xlabel("Date")
     plt.ylabel("Equity ($1 start)")
     plt.axhline(1.0, linestyle="--", linewidth=1)
     plt.xticks(rotation=45, ha="right")
     plt.tight_layout()
-
-    out = FIG_DIR / "equity_curve.png"
-    plt.savefig(out, dpi=200)
-    plt.close()
-    print(f"Wrote {out}")
+    return _save(paths.fig_dir, "equity_curve.png")
 
 
-
-def plot_scatter_sentiment_vs_return():
-    path = REPORT_DIR / "day6_merged_table.csv"
+@tracing.traced(cat="charts")
+def plot_scatter_sentiment_vs_return(paths: ChartPaths = ChartPaths()) -> Path | None:
+    path = paths.scatter_table()
     if not path.exists():
         print(f"Missing {path}.")
-        return
+        return None
 
-    df = pd.read_csv(path)
-    df = df.dropna(subset=["avg_compound", "fwd_ret_1d"])
+    cols = ("avg_compound", "fwd_ret_1d")
+    if is_frame_path(path):
+        df = read_table(path, columns=list(cols)).astype("float64")
+    else:
+        df = pd.read_csv(path, usecols=lambda c: c in cols, dtype={c: "float64" for c in cols})
+    df = df.dropna(subset=list(cols)) if set(cols) <= set(df.columns) else df.iloc[0:0]
     if df.empty:
         print("No data for scatter plot (avg_compound or fwd_ret_1d missing).")
-        return
+        return None
 
+    x, y = df["avg_compound"].to_numpy(), df["fwd_ret_1d"].to_numpy()
     plt.figure()
-    plt.scatter(df["avg_compound"], df["fwd_ret_1d"], alpha=0.6)
+    if len(df) > SCATTER_MAX_POINTS:
+        # Per-point drawing grows with the panel; binned counts cost the same at any size.
+        hb = plt.hexbin(x, y, gridsize=HEXBIN_GRIDSIZE, bins="log", mincnt=1, cmap="viridis")
+        plt.colorbar(hb, label="ticker-days")
+        plt.title(f"Daily Sentiment vs Next-Day Return (n={len(df):,})")
+    else:
+        plt.scatter(x, y, alpha=0.6)
+        plt.title("Daily Sentiment vs Next-Day Return")
     plt.axhline(0.0, linestyle="--", linewidth=1)
-    plt.title("Daily Sentiment vs Next-Day Return")
     plt.xlabel("avg_compound (sentiment)")
     plt.ylabel("fwd_ret_1d")
     plt.tight_layout()
+    return _save(paths.fig_dir, "sentiment_vs_return.png")
 
-    out = FIG_DIR / "sentiment_vs_return.png"
-    plt.savefig(out, dpi=200)
-    plt.close()
-    print(f"Wrote {out}")
-
-
-def _extract_event_study_numbers(md_text: str):
-    """
-    Parses from bullet lines in day5_results.md, e.g.
-    - events_n: 9
-    - event_mean_1d: 0.004464  (95% CI [-0.001589, 0.010647])
-    - event_mean_3d: -0.001841 (95% CI [-0.001841, -0.001841])
-    """
-    # n
-    m_n = re.search(r"events_n:\s*(\d+)", md_text)
-    if not m_n:
-        return None
-    n = int(m_n.group(1))
-
-    # mean + CI for 1d
-    m1 = re.search(
-        r"event_mean_1d:\s*([-\d.]+).*?\[\s*([-\d.]+)\s*,\s*([-\d.]+)\s*\]",
-        md_text,
-    )
-    # mean + CI for 3d
-    m3 = re.search(
-        r"event_mean_3d:\s*([-\d.]+).*?\[\s*([-\d.]+)\s*,\s*([-\d.]+)\s*\]",
-        md_text,
-    )
 
-    if not (m1 and m3):
+def _latest_eval(registry_path: Path) -> dict | None:
+    registry = RunRegistry.open_existing(registry_path)
+    if registry is None:
         return None
+    with registry:
+        return registry.latest_eval()
 
-    mean1, lo1, hi1 = float(m1.group(1)), float(m1.group(2)), float(m1.group(3))
-    mean3, lo3, hi3 = float(m3.group(1)), float(m3.group(2)), float(m3.group(3))
-    return n, (mean1, lo1, hi1), (mean3, lo3, hi3)
 
+def event_study_source(registry_path: Path = REGISTRY_PATH) -> str:
+    """The latest eval row (minus its run id) as stable JSON: what event_study.png is drawn from."""
+    ev = _latest_eval(registry_path)
+    return json.dumps({k: v for k, v in (ev or {}).items() if k != "run_id"}, sort_keys=True)
 
-def plot_event_study_bar():
-    path = REPORT_DIR / "day5_results.md"
-    if not path.exists():
-        print(f"Missing {path}. Run eval stage first.")
-        return
 
-    text = path.read_text(encoding="utf-8")
-    parsed = _extract_event_study_numbers(text)
-    if not parsed:
-        print("Could not parse event study numbers from day5_results.md.")
-        print("Make sure the report contains the 'Event study (burst days): ... (CI [...])' line.")
-        return
+@tracing.traced(cat="charts")
+def plot_event_study_bar(paths: ChartPaths = ChartPaths()) -> Path | None:
+    ev = _latest_eval(paths.registry_path)
+    needed = [f"event_mean_{h}{part}" for h in ("1d", "3d") for part in ("", "_ci_lo", "_ci_hi")]
+    if ev is None or any(ev[c] is None for c in needed):
+        print(f"No event study results in {paths.registry_path}. Run eval stage first.")
+        return None
 
-    n, (m1, lo1, hi1), (m3, lo3, hi3) = parsed
+    n = ev["events_n"]
+    m1, lo1, hi1 = ev["event_mean_1d"], ev["event_mean_1d_ci_lo"], ev["event_mean_1d_ci_hi"]
+    m3, lo3, hi3 = ev["event_mean_3d"], ev["event_mean_3d_ci_lo"], ev["event_mean_3d_ci_hi"]
 
     labels = ["1D", "3D"]
     means = [m1, m3]
@@ -146,18 +219,103 @@ def plot_event_study_bar():
     plt.ylabel("Mean forward return")
     plt.axhline(0.0, linestyle="--", linewidth=1)
     plt.tight_layout()
+    return _save(paths.fig_dir, "event_study.png")
+
+
+CHARTS = {
+    "equity_curve.png": plot_equity_curve,
+    "sentiment_vs_return.png": plot_scatter_sentiment_vs_return,
+    "event_study.png": plot_event_study_bar,
+}
+
+
+def chart_key(name: str, paths: ChartPaths, hasher: FileHasher) -> str:
+    """Digest of everything a figure is drawn from; unchanged key + existing PNG = nothing to redraw."""
+    if name == "event_study.png":
+        source = event_study_source(paths.registry_path)
+    elif name == "equity_curve.png":
+        source = hasher.path(paths.report_dir / "portfolio_daily.csv")
+    else:
+        table = paths.scatter_table()
+        source = [str(table), hasher.path(table)]
+    blob = json.dumps([CHART_VERSION, DPI, name, source]).encode("utf-8")
+    return hashlib.sha256(blob).hexdigest()
+
+
+def _render(name: str, paths: ChartPaths) -> ChartRun:
+    t0 = time.perf_counter()
+    out = CHARTS[name](paths)
+    return ChartRun(name, "drawn" if out is not None else "missing", time.perf_counter() - t0, out)
 
-    out = FIG_DIR / "event_study.png"
-    plt.savefig(out, dpi=200)
-    plt.close()
-    print(f"Wrote {out}")
 
+def _pool_context():
+    methods = mp.get_all_start_methods()
+    return mp.get_context("fork" if "fork" in methods else "spawn")
 
-def main():
-    FIG_DIR.mkdir(parents=True, exist_ok=True)
-    plot_equity_curve()
-    plot_scatter_sentiment_vs_return()
-    plot_event_study_bar()
+
+def _load_state(state_path: Path) -> dict:
+    try:
+        state = json.loads(state_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {"charts": {}, "files": {}}
+    return state if isinstance(state, dict) else {"charts": {}, "files": {}}
+
+
+def render_charts(
+    paths: ChartPaths = ChartPaths(), state_path: Path = CHART_STATE, workers: int = 0, force: bool = False
+) -> ChartReport:
+    """
+    Draw the figures whose inputs changed since they were last drawn (all of
+    them with `force`), in parallel processes when more than one is stale.
+    workers=0 picks one process per stale figure, capped at the CPU count.
+    """
+    t0 = time.perf_counter()
+    paths.fig_dir.mkdir(parents=True, exist_ok=True)
+    state = _load_state(state_path)
+    hasher = FileHasher(state.get("files"))
+    drawn: dict[str, str] = dict(state.get("charts", {}))
+
+    keys = {name: chart_key(name, paths, hasher) for name in CHARTS}
+    report = ChartReport()
+    stale = []
+    for name, key in keys.items():
+        if not force and drawn.get(name) == key and (paths.fig_dir / name).exists():
+            report.runs.append(ChartRun(name, "cached", out=paths.fig_dir / name))
+        else:
+            stale.append(name)
+
+    workers = min(len(stale), workers or os.cpu_count() or 1)
+    report.workers = max(workers, 1) if stale else 0
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context()) as pool:
+            runs = list(pool.map(_render, stale, [paths] * len(stale)))
+    else:
+        runs = [_render(name, paths) for name in stale]
+
+    for run in runs:
+        if run.status == "drawn":
+            drawn[run.name] = keys[run.name]
+        else:
+            drawn.pop(run.name, None)
+    report.runs += runs
+    report.runs.sort(key=lambda r: list(CHARTS).index(r.name))
+
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    state_path.write_text(json.dumps({"charts": drawn, "files": hasher.memo}, indent=2), encoding="utf-8")
+    report.seconds = time.perf_counter() - t0
+    return report
+
+
+def main(workers: int = 0, force: bool = False) -> ChartReport:
+    report = render_charts(workers=workers, force=force)
+    cached = [r.name for r in report.runs if r.status == "cached"]
+    if cached:
+        print(f"Charts unchanged: {', '.join(cached)}")
+    print(
+        f"Charts: {report.count('drawn')} drawn, {len(cached)} cached "
+        f"in {report.seconds:.2f}s ({report.workers} worker{'s' if report.workers != 1 else ''})"
+    )
+    return report
 
 
 if __name__ == "__main__":
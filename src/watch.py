@@ -0,0 +1,406 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import signal
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+from src import tracing
+from src.backtest.returns import load_price_cache
+from src.backtest.sim import build_signals
+from src.features.daily_features import articles_to_daily_features, burst_zscore
+from src.features.sentiment import get_analyzer
+from src.features.sessions import parse_timestamps_ns
+from src.instrument import append_csv_rows
+
+# fetch(ticker, query, start_dt, end_dt) -> GDELT article dicts seen in that window
+Fetch = Callable[[str, str, datetime, datetime], list]
+
+# Each poll re-asks for a little of the previous window; articles already seen are dropped.
+POLL_OVERLAP = timedelta(minutes=5)
+# Days of feature sums (and seen article ids) kept in memory, counted back from the newest day.
+KEEP_DAYS = 30
+
+DAILY_COLUMNS = ["ticker", "date", "docs", "avg_compound", "pos_frac", "neg_frac", "volume_z"]
+WATCH_METRIC_COLUMNS = [
+    "ts",
+    "tick",
+    "queue_depth",
+    "refresh_lag_sec",
+    "polls",
+    "new_articles",
+    "fetch_errors",
+    "signals_written",
+]
+
+
+def article_key(article: dict) -> str:
+    return article.get("url") or f"{article.get('seendate', '')}|{article.get('title', '')}"
+
+
+def score_articles(ticker: str, articles: list[dict]) -> pd.DataFrame:
+    """Per-day sums (docs, compound, pos, neg) of newly scored articles."""
+    scored = articles_to_daily_features(ticker, articles)
+    if scored.empty:
+        return pd.DataFrame(columns=["date", "docs", "compound", "pos", "neg"])
+    return scored.groupby("date", as_index=False).agg(
+        docs=("compound", "size"), compound=("compound", "sum"), pos=("pos", "sum"), neg=("neg", "sum")
+    )
+
+
+class FeatureState:
+    """
+    Running per-(ticker, day) sums of scored articles over the last `keep_days`
+    days, counted back from the newest day seen. Each article is scored once;
+    older days and their article ids are evicted, and articles from evicted
+    days are not folded in again. The daily table (the same columns as
+    build_and_save_daily_features) is rebuilt from the retained sums only
+    after they change.
+    """
+
+    def __init__(self, keep_days: int = KEEP_DAYS):
+        self.keep_days = keep_days
+        self.sums: dict[tuple[str, str], list[float]] = {}  # (ticker, date) -> [docs, compound, pos, neg]
+        self.seen: dict[str, dict[str, int]] = {}  # ticker -> article key -> seendate (UTC epoch-ns)
+        self.cutoff = ""  # first retained ISO day
+        self._daily: pd.DataFrame | None = None
+
+    def unseen(self, ticker: str, articles: list[dict]) -> list[dict]:
+        """Articles not folded in yet (also marks them seen)."""
+        seen = self.seen.setdefault(ticker.lower(), {})
+        stamps = parse_timestamps_ns([a.get("seendate", "") or "" for a in articles]) if articles else []
+        fresh = []
+        for a, ts in zip(articles, stamps):
+            key = article_key(a)
+            if key not in seen:
+                seen[key] = int(ts)
+                fresh.append(a)
+        return fresh
+
+    def fold(self, ticker: str, day_sums: pd.DataFrame) -> int:
+        tl = ticker.lower()
+        folded = 0
+        for day, docs, comp, pos, neg in day_sums[["date", "docs", "compound", "pos", "neg"]].itertuples(index=False):
+            if day < self.cutoff:
+                continue
+            acc = self.sums.setdefault((tl, day), [0, 0.0, 0.0, 0.0])
+            acc[0] += int(docs)
+            acc[1] += float(comp)
+            acc[2] += float(pos)
+            acc[3] += float(neg)
+            folded += int(docs)
+        if folded:
+            self._daily = None
+            self._evict()
+        return folded
+
+    def _evict(self) -> None:
+        newest = max(day for _, day in self.sums)
+        cutoff = (pd.Timestamp(newest) - pd.Timedelta(days=self.keep_days - 1)).strftime("%Y-%m-%d")
+        if cutoff <= self.cutoff:
+            return
+        self.cutoff = cutoff
+        self.sums = {k: v for k, v in self.sums.items() if k[1] >= cutoff}
+        cutoff_ns = pd.Timestamp(cutoff, tz="UTC").value
+        for ticker, seen in self.seen.items():
+            self.seen[ticker] = {key: ts for key, ts in seen.items() if ts >= cutoff_ns}
+
+    def daily(self) -> pd.DataFrame:
+        if self._daily is None:
+            self._daily = self._build_daily()
+        return self._daily
+
+    def _build_daily(self) -> pd.DataFrame:
+        keys = sorted(self.sums)
+        if not keys:
+            return pd.DataFrame(columns=DAILY_COLUMNS)
+        vals = np.array([self.sums[k] for k in keys], dtype=float)
+        docs = vals[:, 0].astype(np.int64)
+        tickers = np.array([k[0] for k in keys], dtype=object)
+        return pd.DataFrame(
+            {
+                "ticker": tickers,
+                "date": [k[1] for k in keys],
+                "docs": docs,
+                "avg_compound": vals[:, 1] / docs,
+                "pos_frac": vals[:, 2] / docs,
+                "neg_frac": vals[:, 3] / docs,
+                "volume_z": burst_zscore(tickers, docs, window=5, min_periods=2),
+            }
+        )
+
+
+class PricePanel:
+    """Cached closes per ticker, kept in memory and re-read only when a cache file changes."""
+
+    def __init__(self, tickers: list[str], cache_dir: Path):
+        self.tickers = [t.lower() for t in tickers]
+        self.cache_dir = Path(cache_dir)
+        self.frames: dict[str, pd.DataFrame] = {}
+        self._mtimes: dict[str, int] = {}
+
+    def refresh(self) -> int:
+        """Reload changed caches; returns how many were (re)loaded."""
+        reloaded = 0
+        for t in self.tickers:
+            path = self.cache_dir / f"{t}.csv"
+            try:
+                mtime = path.stat().st_mtime_ns
+            except FileNotFoundError:
+                continue
+            if self._mtimes.get(t) != mtime:
+                self.frames[t] = load_price_cache(t, self.cache_dir)
+                self._mtimes[t] = mtime
+                reloaded += 1
+        return reloaded
+
+    def last_close(self, ticker: str) -> tuple[str, float] | None:
+        px = self.frames.get(ticker.lower())
+        if px is None or px.empty:
+            return None
+        return px["Date"].iloc[-1].date().isoformat(), float(px["Close"].iloc[-1])
+
+
+@dataclass
+class TickMetrics:
+    ts: str
+    tick: int
+    queue_depth: int  # tickers still queued (not yet polled) at the end of the tick
+    refresh_lag_sec: float | None  # age of the stalest ticker's last successful poll
+    # running totals since start:
+    polls: int
+    new_articles: int
+    fetch_errors: int
+    signals_written: int
+
+
+def write_json_atomic(obj: Any, path: Path) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(obj, indent=1), encoding="utf-8")
+    os.replace(tmp, path)
+    return path
+
+
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class WatchDaemon:
+    """
+    Keeps features, prices and the sentiment analyzer warm and refreshes
+    signals on an asyncio schedule.
+
+    Every `interval_sec` the scheduler queues each ticker that is not already
+    waiting; `concurrency` workers poll GDELT for articles since that ticker's
+    last poll (in threads, so slow requests do not stall the loop), fold the
+    new ones into the feature sums and, once the queue drains, write the latest
+    signal per ticker to `out_path` (atomically). One row per tick, taken as
+    the tick ends, goes to `metrics_path`. SIGTERM / SIGINT stop the daemon:
+    queued polls are dropped and the current state is written once more.
+    """
+
+    def __init__(
+        self,
+        tickers: list[str],
+        queries: dict[str, str],
+        fetch: Fetch,
+        out_path: Path,
+        metrics_path: Path | None = None,
+        price_dir: Path | None = None,
+        interval_sec: float = 900.0,
+        concurrency: int = 2,
+        lookback_days: int = 7,
+        signal_params: dict | None = None,
+    ):
+        self.tickers = list(tickers)
+        self.queries = queries
+        self.fetch = fetch
+        self.out_path = Path(out_path)
+        self.metrics_path = Path(metrics_path) if metrics_path is not None else None
+        self.prices = PricePanel(self.tickers, price_dir) if price_dir is not None else None
+        self.interval_sec = interval_sec
+        self.concurrency = max(1, concurrency)
+        self.lookback = timedelta(days=lookback_days)
+        self.signal_params = dict(signal_params or {})
+
+        # Polls never reach back past the lookback, so evicted articles do not come back.
+        self.state = FeatureState(keep_days=max(KEEP_DAYS, lookback_days + 1))
+        self.last_polled: dict[str, datetime] = {}  # end of the last successful poll window
+        self.tick = 0
+        self.history: list[TickMetrics] = []
+        self._counts = {"polls": 0, "new_articles": 0, "fetch_errors": 0, "signals_written": 0}
+        self._pending: set[str] = set()
+        self._in_flight = 0
+        self._dirty = False
+        self._stop: asyncio.Event | None = None
+        self._queue: asyncio.Queue | None = None
+
+    def seed(self, ticker: str, articles: list[dict], as_of: datetime) -> int:
+        """Start from already-fetched articles (e.g. the news cache); polls continue from `as_of`."""
+        self.state.unseen(ticker, articles)
+        n = self.state.fold(ticker, score_articles(ticker, articles))
+        self.last_polled[ticker] = as_of
+        self._dirty = True
+        return n
+
+    def stop(self) -> None:
+        if self._stop is not None:
+            self._stop.set()
+
+    def refresh_lag_sec(self, now: datetime | None = None) -> float | None:
+        if not self.last_polled:
+            return None
+        now = now or _utc_now()
+        return round((now - min(self.last_polled.values())).total_seconds(), 3)
+
+    def signals(self) -> list[dict]:
+        """Latest day's signal per ticker, with its features and the last cached close."""
+        daily = self.state.daily()
+        if daily.empty:
+            return []
+        sig = build_signals(daily, **self.signal_params)
+        latest = sig.groupby("ticker", sort=True).tail(1)
+        out = []
+        for r in latest.itertuples(index=False):
+            row = {
+                "ticker": r.ticker,
+                "date": r.date,
+                "signal": int(r.signal),
+                "avg_compound": round(float(r.avg_compound), 6),
+                "volume_z": round(float(r.volume_z), 6),
+                "docs": int(r.docs),
+            }
+            close = self.prices.last_close(r.ticker) if self.prices is not None else None
+            if close is not None:
+                row["price_date"], row["last_close"] = close
+            out.append(row)
+        return out
+
+    def write_signals(self) -> Path:
+        with tracing.span("watch_write", cat="watch"):
+            payload = {
+                "generated_at": _utc_now().isoformat(timespec="seconds"),
+                "tick": self.tick,
+                "params": self.signal_params,
+                "metrics": {
+                    "refresh_lag_sec": self.refresh_lag_sec(),
+                    "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+                    **self._counts,
+                },
+                "signals": self.signals(),
+            }
+            write_json_atomic(payload, self.out_path)
+        self._counts["signals_written"] += 1
+        self._dirty = False
+        return self.out_path
+
+    async def _poll(self, ticker: str) -> None:
+        end = _utc_now()
+        start = max(end - self.lookback, self.last_polled.get(ticker, end - self.lookback) - POLL_OVERLAP)
+        query = self.queries.get(ticker.lower(), ticker)
+        with tracing.span("watch_poll", cat="watch", args={"ticker": ticker}):
+            articles = await asyncio.to_thread(self.fetch, ticker, query, start, end)
+        fresh = self.state.unseen(ticker, articles)
+        if fresh:
+            day_sums = await asyncio.to_thread(score_articles, ticker, fresh)
+            self._counts["new_articles"] += self.state.fold(ticker, day_sums)
+            self._dirty = True
+        self.last_polled[ticker] = end
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        while True:
+            ticker = await queue.get()
+            self._in_flight += 1
+            try:
+                await self._poll(ticker)
+                self._counts["polls"] += 1
+            except Exception as e:  # one failing ticker must not take the daemon down
+                self._counts["fetch_errors"] += 1
+                print(f"[watch] {ticker}: poll failed: {e}")
+            finally:
+                self._in_flight -= 1
+                self._pending.discard(ticker)
+                queue.task_done()
+            if self._dirty and queue.empty() and self._in_flight == 0:
+                self.write_signals()
+
+    def _record_tick(self, queue_depth: int) -> TickMetrics:
+        m = TickMetrics(
+            ts=_utc_now().isoformat(timespec="seconds"),
+            tick=self.tick,
+            queue_depth=queue_depth,
+            refresh_lag_sec=self.refresh_lag_sec(),
+            **self._counts,
+        )
+        self.history.append(m)
+        if self.metrics_path is not None:
+            append_csv_rows([asdict(m)], self.metrics_path, WATCH_METRIC_COLUMNS)
+        return m
+
+    async def _sleep_or_stop(self, seconds: float) -> None:
+        try:
+            await asyncio.wait_for(self._stop.wait(), timeout=max(0.0, seconds))
+        except asyncio.TimeoutError:
+            pass
+
+    async def run(self, ticks: int = 0, on_tick: Callable[[TickMetrics], None] | None = None) -> list[TickMetrics]:
+        """Run until stopped, or for `ticks` ticks (each one waits for its polls) when > 0."""
+        loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        self._queue = queue = asyncio.Queue()
+        handled = []
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+                handled.append(sig)
+            except (NotImplementedError, RuntimeError, ValueError):  # Windows, or not the main thread
+                pass
+
+        await asyncio.to_thread(get_analyzer)  # load the lexicon once, off the loop
+        if self.prices is not None:
+            self.prices.refresh()
+        if self._dirty:
+            self.write_signals()  # publish what the seed already knows before the first poll lands
+        workers = [asyncio.create_task(self._worker(queue)) for _ in range(self.concurrency)]
+        try:
+            while not self._stop.is_set():
+                t0 = time.monotonic()
+                self.tick += 1
+                if self.prices is not None and self.prices.refresh():
+                    self._dirty = True
+                for t in self.tickers:
+                    if t not in self._pending:
+                        self._pending.add(t)
+                        queue.put_nowait(t)
+                last = bool(ticks) and self.tick >= ticks
+                if last:
+                    drained = asyncio.ensure_future(queue.join())
+                    stopped = asyncio.ensure_future(self._stop.wait())
+                    await asyncio.wait([drained, stopped], return_when=asyncio.FIRST_COMPLETED)
+                    drained.cancel()
+                    stopped.cancel()
+                else:
+                    await self._sleep_or_stop(self.interval_sec - (time.monotonic() - t0))
+                m = self._record_tick(queue.qsize())
+                if on_tick is not None:
+                    on_tick(m)
+                if last:
+                    break
+        finally:
+            for w in workers:
+                w.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            for sig in handled:
+                loop.remove_signal_handler(sig)
+            if self._dirty:
+                self.write_signals()
+        return self.history
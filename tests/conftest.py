@@ -1,8 +1,41 @@
 import sys
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
+import pytest
+
 # Add the repo root to Python path so `import src...` works in local + CI runs.
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+
+def _build_fake_merged_table(seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2025-01-01", periods=40, freq="D").strftime("%Y-%m-%d")
+    rows = []
+    for t in ["aapl.us", "msft.us", "nvda.us", "spy.us"]:
+        for d in dates:
+            if rng.random() < 0.15:  # not every ticker has news every day
+                continue
+            rows.append(
+                {
+                    "ticker": t,
+                    "date": d,
+                    "docs": int(rng.integers(1, 30)),
+                    "avg_compound": float(rng.normal(0.0, 0.1)),
+                    "pos_frac": float(rng.random()),
+                    "neg_frac": float(rng.random()),
+                    "volume_z": float(rng.normal(0.5, 1.0)),
+                    "fwd_ret_1d": float(rng.normal(0.0, 0.01)) if rng.random() > 0.2 else np.nan,
+                    "fwd_ret_3d": float(rng.normal(0.0, 0.02)),
+                }
+            )
+    return pd.DataFrame(rows)
+
+
+@pytest.fixture
+def fake_merged_table():
+    """Builder for a small merged table (4 tickers x 40 days, with gaps and NaN returns); call with a seed."""
+    return _build_fake_merged_table
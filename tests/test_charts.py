@@ -0,0 +1,60 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.backtest.eval import EvalResult
+from src.storage.frame_store import write_table
+from src.storage.registry import RunRegistry
+from src.viz.make_charts import SCATTER_MAX_POINTS, ChartPaths, downsample_minmax, render_charts
+
+
+def test_downsample_keeps_extremes_and_order():
+    y = np.sin(np.linspace(0, 40, 100_000))
+    y[31_337] = 5.0
+    y[77_777] = -5.0
+    x = np.arange(len(y))
+    xs, ys = downsample_minmax(x, y, 1_000)
+    assert len(xs) <= 1_002 and np.all(np.diff(xs) > 0)
+    assert ys.max() == 5.0 and ys.min() == -5.0 and xs[0] == 0 and xs[-1] == len(y) - 1
+    assert len(downsample_minmax(x[:10], y[:10], 100)[0]) == 10  # short series pass through
+
+
+def test_render_charts_redraws_only_changed_inputs(tmp_path: Path):
+    paths = ChartPaths(
+        tmp_path / "report", tmp_path / "report" / "figures", tmp_path / "runs.sqlite", tmp_path / "merged.frame"
+    )
+    paths.report_dir.mkdir()
+    rng = np.random.default_rng(0)
+    n = SCATTER_MAX_POINTS * 3  # big enough for the hexbin path
+    merged = pd.DataFrame({"avg_compound": rng.normal(size=n), "fwd_ret_1d": rng.normal(size=n) * 0.01})
+    write_table(merged, paths.merged_table)  # no CSV export, as with --no-csv
+    days = pd.date_range("2000-01-03", periods=10_000, freq="D")
+    portfolio = pd.DataFrame({"date": days, "portfolio_ret": rng.normal(size=len(days)) * 0.001})
+    portfolio.to_csv(paths.report_dir / "portfolio_daily.csv", index=False)
+    state = tmp_path / "chart_state.json"
+
+    first = render_charts(paths, state_path=state, workers=2)
+    assert {r.name: r.status for r in first.runs} == {
+        "equity_curve.png": "drawn",
+        "sentiment_vs_return.png": "drawn",
+        "event_study.png": "missing",  # no registry yet
+    }
+    assert first.workers == 2 and (paths.fig_dir / "sentiment_vs_return.png").stat().st_size > 0
+
+    second = render_charts(paths, state_path=state)
+    assert second.count("cached") == 2 and second.count("drawn") == 0
+
+    portfolio.assign(portfolio_ret=portfolio["portfolio_ret"] * 2).to_csv(
+        paths.report_dir / "portfolio_daily.csv", index=False
+    )
+    third = render_charts(paths, state_path=state)
+    assert [r.name for r in third.runs if r.status == "drawn"] == ["equity_curve.png"]
+    assert render_charts(paths, state_path=state, force=True).count("drawn") == 2
+
+    with RunRegistry(paths.registry_path) as reg:
+        reg.begin_run("r1", "eval", {})
+        reg.record_eval("r1", EvalResult(120, 0.1, 0.2, 9, 0.004, 0.006, -0.001, 0.01, -0.002, 0.014))
+    fourth = render_charts(paths, state_path=state)
+    assert [r.name for r in fourth.runs if r.status == "drawn"] == ["event_study.png"]
+    assert render_charts(paths, state_path=state).count("drawn") == 0
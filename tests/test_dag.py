@@ -0,0 +1,55 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+from src.dag import Stage, StageGraph
+
+
+def test_stage_graph_skips_unchanged_and_passes_results(tmp_path: Path):
+    src = tmp_path / "in.txt"
+    mid = tmp_path / "mid.txt"
+    out = tmp_path / "out.txt"
+    src.write_text("a")
+    calls = []
+
+    def build(ctx):
+        calls.append("build")
+        mid.write_text(src.read_text().upper())
+        return mid.read_text()
+
+    def report(ctx):
+        calls.append("report")
+        text = ctx.results.get("build") or mid.read_text()  # in memory when build ran this time
+        out.write_text(text * ctx.repeat)
+
+    graph = StageGraph(
+        [
+            Stage(
+                "report",
+                report,
+                deps=("build",),
+                inputs=lambda c: [mid],
+                outputs=lambda c: [out],
+                params=lambda c: {"repeat": c.repeat},
+            ),
+            Stage("build", build, inputs=lambda c: [src], outputs=lambda c: [mid]),
+        ],
+        state_path=tmp_path / "state.json",
+    )
+
+    def run(repeat=2, **kw):
+        ctx = SimpleNamespace(results={}, repeat=repeat)
+        return [r.status for r in graph.run(["report", "build"], ctx, **kw)]
+
+    assert run() == ["ran", "ran"] and out.read_text() == "AA"
+    assert run() == ["skipped", "skipped"]
+    assert run(repeat=3) == ["skipped", "ran"] and out.read_text() == "AAA"  # params are part of the key
+
+    src.write_text("a")  # rewritten, same content: still up to date
+    assert run(repeat=3) == ["skipped", "skipped"]
+    src.write_text("b")
+    assert run(repeat=3) == ["ran", "ran"] and out.read_text() == "BBB"
+
+    out.unlink()
+    assert run(repeat=3) == ["skipped", "ran"]
+    assert run(repeat=3, force=True) == ["ran", "ran"]
+    assert calls.count("build") == 3
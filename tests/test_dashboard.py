@@ -0,0 +1,82 @@
+import json
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.storage.frame_store import write_table
+from src.storage.registry import RunRegistry
+from src.viz.dashboard import build_dashboard
+
+PARAMS = {"sent_thresh": 0.05, "vol_thresh": 1.0, "min_docs": 10}
+
+
+def _load_chunk(path: Path) -> dict:
+    m = re.fullmatch(r"window\.dashboardChunk\((.*)\);\n", path.read_text(encoding="utf-8"), re.S)
+    return json.loads(m.group(1))
+
+
+def test_dashboard_writes_index_and_lazy_ticker_chunks(tmp_path: Path):
+    rng = np.random.default_rng(0)
+    long_days = pd.date_range("2020-01-01", periods=300, freq="D").strftime("%Y-%m-%d")
+    features = pd.DataFrame(
+        {
+            "ticker": ["aapl.us"] * 300 + ["msft.us"] * 3,
+            "date": [*long_days, "2026-01-05", "2026-01-06", "2026-01-08"],
+            "docs": [12] * 303,
+            "avg_compound": np.r_[rng.normal(0, 0.2, 300), [0.2, -0.3, 0.01]],
+            "pos_frac": 0.2,
+            "neg_frac": 0.1,
+            "volume_z": np.r_[rng.normal(size=300), [2.0, 1.5, 0.0]],
+        }
+    )
+    write_table(features, tmp_path / "daily_features.frame")
+    pd.DataFrame({"date": long_days[:50], "portfolio_ret": 0.001}).to_csv(tmp_path / "portfolio_daily.csv", index=False)
+    with RunRegistry(tmp_path / "runs.sqlite") as reg:
+        reg.begin_run("r1", "sweep", {})
+        reg.record_sweep(
+            "r1",
+            [
+                {
+                    "sent_thresh": s,
+                    "vol_thresh": v,
+                    "min_docs": m,
+                    "slippage_bps": 0,
+                    "trades": 3,
+                    "total_return": s * v * m,
+                    "sharpe_ann": 1.0,
+                }
+                for s in (0.02, 0.05)
+                for v in (0.5, 1.0, 1.5)
+                for m in (5, 10)
+            ],
+            kind="grid",
+        )
+
+    out_dir = tmp_path / "dashboard"
+    index = build_dashboard(
+        tmp_path / "daily_features.frame",
+        PARAMS,
+        tmp_path / "portfolio_daily.csv",
+        out_dir=out_dir,
+        registry_path=tmp_path / "runs.sqlite",
+        max_points=100,
+    )
+
+    html = index.read_text(encoding="utf-8")
+    data = json.loads(re.search(r'<script id="dashboard-data" type="application/json">(.*?)</script>', html).group(1))
+    assert [t["t"] for t in data["tickers"]] == ["aapl.us", "msft.us"]
+    assert "avg_compound" not in json.dumps(data["tickers"])  # timelines stay in the chunks
+    assert len(data["equity"]["e"]) == 50 and data["equity"]["e"][-1] == round(1.001**50, 4)
+    heat = data["sweep"]
+    assert heat["sent"] == [0.02, 0.05] and heat["vol"] == [0.5, 1.0, 1.5] and heat["slip"] == [0.0]
+    assert heat["metrics"]["total_return"][0][1][2] == round(0.05 * 1.5 * 10, 4)  # best over min_docs
+
+    msft = _load_chunk(out_dir / data["tickers"][1]["f"])
+    assert np.cumsum(msft["d"]).tolist() == [20458, 20459, 20461]  # delta-coded epoch days
+    assert msft["g"] == [1, -1, 0] and msft["s"] == [0.2, -0.3, 0.01]
+
+    aapl = _load_chunk(out_dir / data["tickers"][0]["f"])
+    assert len(aapl["d"]) == 100 and min(aapl["d"][1:]) == 3  # 300 days in 100 buckets of 3
+    assert sorted(p.name for p in (out_dir / "tickers").iterdir()) == ["aapl.us.js", "msft.us.js"]
@@ -0,0 +1,107 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.backtest.dense import (
+    build_dense_panel,
+    dense_signals,
+    hold_positions,
+    price_forward_returns,
+    run_dense,
+    simulate_dense_portfolio,
+    size_positions,
+)
+from src.backtest.risk import rolling_volatility
+from src.backtest.sim import simulate_equal_weight_portfolio
+
+
+def test_dense_engine_matches_pandas_engine_for_one_day_holds(tmp_path: Path):
+    rng = np.random.default_rng(0)
+    dates = pd.date_range("2025-01-01", periods=60, freq="D").strftime("%Y-%m-%d")
+    df = pd.DataFrame(
+        [
+            {
+                "ticker": t,
+                "date": d,
+                "docs": int(rng.integers(1, 30)),
+                "avg_compound": float(rng.normal(0.0, 0.1)),
+                "volume_z": float(rng.normal(0.5, 1.0)),
+                "fwd_ret_1d": float(rng.normal(0.0, 0.01)),
+            }
+            for t in ["aapl.us", "msft.us", "nvda.us", "spy.us"]
+            for d in dates
+        ]
+    )
+
+    kwargs = dict(sent_thresh=0.05, vol_thresh=0.5, min_docs=5, slippage_bps=0.0)
+    ref = simulate_equal_weight_portfolio(df, out_dir=tmp_path / "pandas", **kwargs)
+    res = simulate_dense_portfolio(df, out_dir=tmp_path / "dense", hold_days=1, **kwargs)
+
+    assert res.n_signal_days == ref.n_signal_days
+    assert np.isclose(res.sharpe_annual, ref.sharpe_annual)
+    assert np.isclose(res.max_drawdown, ref.max_drawdown)
+
+
+def test_hold_positions_carries_and_renews():
+    sig = np.array([[1, 0], [0, -1], [0, 0], [0, 0], [1, 0], [0, 0]], dtype=np.int8)
+    held = hold_positions(sig, hold_days=3)
+    np.testing.assert_array_equal(
+        held,
+        np.array([[1, 0], [1, -1], [1, -1], [0, -1], [1, 0], [1, 0]], dtype=np.int8),
+    )
+
+
+def test_rolling_volatility_matches_pandas():
+    rng = np.random.default_rng(1)
+    rets = rng.normal(0.0, 0.02, size=(80, 5))
+    rets[rng.random(rets.shape) < 0.1] = np.nan
+
+    vol = rolling_volatility(rets, window=20, min_obs=10)
+    ref = pd.DataFrame(rets).rolling(20, min_periods=10).std().to_numpy()
+    np.testing.assert_allclose(vol, ref, atol=1e-12, equal_nan=True)
+
+
+def test_vol_sizing_modes():
+    pos = np.array([[1.0, -1.0, 0.0], [1.0, 1.0, 1.0]])
+    vol = np.array([[0.01, 0.02, np.nan], [0.01, np.nan, 0.04]])
+
+    w = size_positions(pos, sizing="inverse_vol", vol=vol, max_gross=1.0)
+    np.testing.assert_allclose(w[0], [2 / 3, -1 / 3, 0.0])
+    np.testing.assert_allclose(np.abs(w).sum(axis=1), 1.0)
+
+    w = size_positions(pos, sizing="vol_target", vol=vol, max_gross=10.0, target_vol=0.16)
+    book_vol = np.sqrt(((w * np.nan_to_num(vol, nan=0.025)) ** 2).sum(axis=1)) * np.sqrt(252)
+    np.testing.assert_allclose(book_vol, 0.16)
+
+    w = size_positions(pos, sizing="equal", max_weight=0.3)
+    assert np.abs(w).max() <= 0.3
+
+
+def test_multi_day_holds_over_a_news_gap():
+    # Both names go long on day 0 and are held two dates; msft has no news (no row) on day 2.
+    rows = [("aapl.us", "2025-01-06", 20), ("msft.us", "2025-01-06", 20)]
+    rows += [(t, "2025-01-07", 0) for t in ("aapl.us", "msft.us")] + [("aapl.us", "2025-01-08", 0)]
+    df = pd.DataFrame(
+        [
+            {"ticker": t, "date": d, "docs": n, "avg_compound": 0.5, "volume_z": 2.0, "fwd_ret_1d": 0.01}
+            for t, d, n in rows
+        ]
+    )
+    panel = build_dense_panel(df)
+    signals = dense_signals(panel, sent_thresh=0.05, vol_thresh=1.0, min_docs=10)
+
+    # Without prices the held msft cell has no return: it sits out, unsized and untraded.
+    run = run_dense(panel, signals, hold_days=2, slippage_bps=0.0)
+    np.testing.assert_allclose(run.portfolio_ret, [0.0, 0.01, 0.01])
+    np.testing.assert_allclose(run.weights[2], [1.0, 0.0])
+    np.testing.assert_allclose(run.turnover, [0.0, 1.0, 0.5])  # only aapl's top-up on day 2
+
+    # With the price calendar the gap day earns msft's close-to-close return.
+    dates = np.array(["2025-01-06", "2025-01-07", "2025-01-08", "2025-01-09"], dtype="datetime64[D]")
+    rets = np.array([[np.nan, np.nan], [0.01, 0.01], [0.01, 0.02], [0.01, 0.03]])
+    held_ret = price_forward_returns(panel, (dates, ["aapl.us", "msft.us"], rets))
+    run = run_dense(panel, signals, hold_days=2, slippage_bps=0.0, held_ret=held_ret)
+    np.testing.assert_allclose(run.portfolio_ret, [0.0, 0.01, 0.02])
+    np.testing.assert_allclose(run.weights[2], [0.5, 0.5])
+    assert run.n_trades == 2
@@ -0,0 +1,63 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.backtest.dense import simulate_dense_portfolio
+from src.backtest.sim import simulate_equal_weight_portfolio
+from src.backtest.sweep import run_sweep
+from src.storage.dtypes import apply_dtype_policy, object_equivalent_bytes
+from src.storage.frame_store import read_frame, write_frame
+
+
+def test_dtype_policy_is_lean_and_roundtrips(tmp_path: Path, fake_merged_table):
+    raw = fake_merged_table()
+    lean = apply_dtype_policy(raw)
+
+    assert isinstance(lean["ticker"].dtype, pd.CategoricalDtype)
+    assert isinstance(lean["date"].dtype, pd.CategoricalDtype)
+    assert lean["day"].dtype == np.int32 and lean["docs"].dtype == np.int32
+    assert lean["avg_compound"].dtype == np.float32
+    assert lean["fwd_ret_1d"].dtype == np.float64  # returns keep full precision
+    assert (pd.to_datetime(raw["date"]) - pd.Timestamp("1970-01-01")).dt.days.tolist() == lean["day"].tolist()
+
+    raw_bytes = raw.memory_usage(index=False, deep=True).sum()
+    assert lean.memory_usage(index=False, deep=True).sum() < 0.5 * raw_bytes
+    assert object_equivalent_bytes(lean) == raw_bytes  # estimate of the pre-policy layout
+
+    back = read_frame(write_frame(lean, tmp_path / "lean.frame"))
+    assert back.dtypes.to_dict() == lean.dtypes.to_dict()
+    assert back["ticker"].tolist() == raw["ticker"].tolist()
+
+
+def test_dtype_policy_keeps_results_within_tolerance(tmp_path: Path, fake_merged_table):
+    raw = fake_merged_table(seed=3)
+    lean = apply_dtype_policy(raw)
+    grid = dict(
+        sent_thresh_grid=(0.0, 0.05), vol_thresh_grid=(0.0, 1.0), min_docs_grid=(1, 10), slippage_bps_grid=(0, 5)
+    )
+    a, b = run_sweep(raw, **grid), run_sweep(lean, **grid)
+    pd.testing.assert_frame_equal(a, b, check_exact=False, rtol=1e-6, atol=1e-9)
+
+    # simulate_equal_weight_portfolio applies the policy itself, so its float64
+    # reference is the sweep on the raw table. Non-zero thresholds, with some
+    # features sitting exactly on them, exercise float32 rounding at the cut.
+    raw.loc[raw.index[::9], "avg_compound"] = 0.05
+    raw.loc[raw.index[4::9], "avg_compound"] = -0.05
+    raw.loc[raw.index[::7], "volume_z"] = 1.0
+    lean = apply_dtype_policy(raw)
+    params = dict(sent_thresh=0.05, vol_thresh=1.0, min_docs=10, slippage_bps=2.0)
+    [ref] = run_sweep(raw, **{f"{k}_grid": (v,) for k, v in params.items()}).to_dict("records")
+
+    s_lean = simulate_equal_weight_portfolio(lean, tmp_path / "lean", **params)
+    assert s_lean.n_trades == ref["trades"] > 0
+    np.testing.assert_allclose(
+        [s_lean.sharpe_annual, s_lean.max_drawdown], [ref["sharpe_ann"], ref["max_drawdown"]], rtol=1e-9
+    )
+
+    d_raw = simulate_dense_portfolio(raw, tmp_path / "d_raw", **params)
+    d_lean = simulate_dense_portfolio(lean, tmp_path / "d_lean", **params)
+    assert d_lean.n_trades == d_raw.n_trades > 0
+    np.testing.assert_allclose(
+        [d_lean.sharpe_annual, d_lean.max_drawdown], [d_raw.sharpe_annual, d_raw.max_drawdown], rtol=1e-9
+    )
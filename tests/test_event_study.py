@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.backtest.event_study import market_model_event_study
+
+TICKERS = ["aapl.us", "msft.us", "spy.us"]
+PRE, POST, WINDOW, MIN_OBS = 2, 4, 30, 20
+
+
+def _returns(n_dates: int = 90, seed: int = 3) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    dates = np.datetime64("2025-01-01") + np.arange(n_dates)
+    market = rng.normal(0.0, 0.01, n_dates)
+    aapl = 0.0005 + 1.5 * market + rng.normal(0.0, 0.002, n_dates)
+    msft = -0.0002 + 0.7 * market + rng.normal(0.0, 0.002, n_dates)
+    return dates, np.column_stack([aapl, msft, market])
+
+
+def _events(dates: np.ndarray, rows: list[tuple[str, int]]) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "ticker": [t for t, _ in rows],
+            "date": [str(dates[i]) for _, i in rows],
+            "volume_z": 2.0,
+            "docs": 20,
+        }
+    )
+
+
+def _study(eval_df, dates, rets):
+    return market_model_event_study(
+        eval_df, dates, TICKERS, rets, pre=PRE, post=POST, est_window=WINDOW, min_obs=MIN_OBS
+    )
+
+
+def test_abnormal_returns_are_market_model_residuals():
+    dates, rets = _returns()
+    d0, col = 60, 0
+    res = _study(_events(dates, [("aapl.us", d0)]), dates, rets)
+    assert res.n_events == 1 and res.n_dropped == 0
+
+    est = slice(d0 - PRE - WINDOW, d0 - PRE)  # the WINDOW sessions ending just before t-pre
+    beta, alpha = np.polyfit(rets[est, 2], rets[est, col], 1)
+    win = slice(d0 - PRE, d0 + POST + 1)
+    expected = rets[win, col] - (alpha + beta * rets[win, 2])
+    assert res.curve["offset"].tolist() == list(range(-PRE, POST + 1))
+    np.testing.assert_allclose(res.curve["mean_ar"], expected, atol=1e-12)
+    np.testing.assert_allclose(res.curve["mean_car"], np.cumsum(expected), atol=1e-12)
+
+
+def test_events_without_estimation_history_are_dropped():
+    dates, rets = _returns()
+    res = _study(
+        _events(
+            dates,
+            [
+                ("aapl.us", 1),  # no estimation window at all
+                ("msft.us", PRE + MIN_OBS - 1),  # window exists but has fewer than min_obs sessions
+                ("aapl.us", len(dates) - 2),  # event window runs past the last session
+                ("aapl.us", 50),
+                ("msft.us", 70),
+                ("spy.us", 60),  # the market itself is never an event
+            ],
+        ),
+        dates,
+        rets,
+    )
+    assert res.n_events == 2
+    assert res.n_dropped == 3
+
+
+def test_final_car_is_sum_of_mean_abnormal_returns():
+    dates, rets = _returns(seed=4)
+    res = _study(_events(dates, [("aapl.us", 40), ("msft.us", 45), ("aapl.us", 70), ("msft.us", 80)]), dates, rets)
+    assert res.n_events == 4
+    assert res.car_final == pytest.approx(res.curve["mean_ar"].sum())
+    assert res.car_final_ci_lo < res.car_final < res.car_final_ci_hi
@@ -1,8 +1,10 @@
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
-from src.features.daily_features import build_and_save_daily_features
+from src.features.daily_features import build_and_save_daily_features, burst_zscore
+from src.features.sessions import build_session_index
 
 
 def test_build_and_save_daily_features_writes_expected_columns(tmp_path: Path):
@@ -37,3 +39,77 @@ def test_build_and_save_daily_features_writes_expected_columns(tmp_path: Path):
     # Sanity checks
     assert res.rows_written == len(df)
     assert res.unique_days >= 1
+
+
+def test_session_alignment_rolls_weekend_and_after_close_news(tmp_path: Path):
+    sessions = build_session_index(["2025-07-03", "2025-07-07", "2025-11-03", "2025-11-04"])
+    ticker_to_articles = {
+        "aapl.us": [
+            {"seendate": "20250703T195959Z", "title": "Apple before the close"},
+            {"seendate": "20250703T200000Z", "title": "Apple at the close"},  # 16:00 EDT
+            {"seendate": "20250705T120000Z", "title": "Apple on Saturday"},
+            {"seendate": "20251103T205900Z", "title": "Apple before the EST close"},
+            {"seendate": "20251103T210000Z", "title": "Apple at the EST close"},
+        ]
+    }
+
+    out_path = tmp_path / "daily_features.csv"
+    build_and_save_daily_features(ticker_to_articles=ticker_to_articles, out_path=out_path, sessions=sessions)
+    df = pd.read_csv(out_path)
+
+    assert dict(zip(df["date"], df["docs"])) == {"2025-07-03": 1, "2025-07-07": 2, "2025-11-03": 1, "2025-11-04": 1}
+
+
+def test_session_alignment_leaves_news_outside_the_calendar_unmapped(tmp_path: Path):
+    sessions = build_session_index(["2025-11-03", "2025-11-04"], future_sessions=5)
+    assert sessions.n_projected == 5 and str(sessions.sessions[-1]) == "2025-11-11"
+    ticker_to_articles = {
+        "aapl.us": [
+            {"seendate": "20251104T150000Z", "title": "Apple on the last priced day"},
+            {"seendate": "20251104T220000Z", "title": "Apple after the last close"},
+            {"seendate": "20251108T120000Z", "title": "Apple on the weekend after"},
+            {"seendate": "20260105T120000Z", "title": "Apple far past the calendar"},
+            {"seendate": "not a date", "title": "Apple undated"},
+            {"seendate": "20240101T120000Z", "title": "Apple long before the calendar"},
+            {"seendate": "20251031T195900Z", "title": "Apple before the previous close"},  # Friday 15:59 EDT
+            {"seendate": "20251031T210000Z", "title": "Apple after the previous close"},
+        ]
+    }
+
+    out_path = tmp_path / "daily_features.csv"
+    res = build_and_save_daily_features(ticker_to_articles=ticker_to_articles, out_path=out_path, sessions=sessions)
+    df = pd.read_csv(out_path)
+
+    assert dict(zip(df["date"], df["docs"])) == {"2025-11-03": 1, "2025-11-04": 1, "2025-11-05": 1, "2025-11-10": 1}
+    assert res.unmapped == 4
+
+
+def test_burst_zscore_matches_per_ticker_rolling():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"ticker": np.sort(rng.choice(["a", "b", "c"], 300)), "docs": rng.integers(1, 40, 300)})
+    df.loc[40:50, "docs"] = 7  # flat stretch -> zero std -> z = 0
+
+    ref = np.zeros(len(df))
+    for _, g in df.groupby("ticker"):
+        roll_mean = g["docs"].rolling(window=5, min_periods=2).mean()
+        roll_std = g["docs"].rolling(window=5, min_periods=2).std(ddof=0)
+        ref[g.index] = ((g["docs"] - roll_mean) / roll_std.where(roll_std > 1e-9)).fillna(0.0)
+
+    z = burst_zscore(df["ticker"].to_numpy(), df["docs"].to_numpy(), window=5, min_periods=2)
+    np.testing.assert_allclose(z, ref, atol=1e-9)
+
+
+def test_hourly_buckets_label_articles(tmp_path: Path):
+    ticker_to_articles = {
+        "aapl.us": [
+            {"seendate": "20251229T143000Z", "title": "Apple rallies"},
+            {"seendate": "20251229T145900Z", "title": "Apple extends gains"},
+            {"seendate": "20251229T150000Z", "title": "Apple slips"},
+        ]
+    }
+    out_path = tmp_path / "bars.csv"
+    build_and_save_daily_features(ticker_to_articles=ticker_to_articles, out_path=out_path, bucket_minutes=60)
+    df = pd.read_csv(out_path)
+
+    assert df["date"].tolist() == ["2025-12-29 14:00", "2025-12-29 15:00"]
+    assert df["docs"].tolist() == [2, 1]
@@ -0,0 +1,46 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.storage.frame_store import read_frame, read_table, write_frame, write_table
+
+
+def test_frame_roundtrip_keeps_dtypes(tmp_path: Path):
+    df = pd.DataFrame(
+        {
+            "ticker": ["aapl.us", "msft.us", None],
+            "date": ["2025-01-02", "2025-01-03", "2025-01-06"],
+            "docs": np.array([3, 12, 7], dtype=np.int64),
+            "avg_compound": [0.1 + 0.2, -1e-17, np.nan],
+            "flag": [True, False, True],
+            "ts": pd.to_datetime(["2025-01-02 15:30", "2025-01-03 16:00", "2025-01-06 09:30"]).tz_localize("UTC"),
+        }
+    )
+    path = write_table(df, tmp_path / "t.frame", csv_copy=tmp_path / "t.csv")
+
+    out = read_frame(path)
+    assert out.dtypes.to_dict() == df.dtypes.to_dict()
+    assert out["avg_compound"].iloc[0] == 0.1 + 0.2  # bit-exact floats
+    assert out["ticker"].isna().tolist() == [False, False, True]
+    assert read_table(path, columns=["docs"]).columns.tolist() == ["docs"]
+    assert (tmp_path / "t.csv").exists()
+
+    # Mapped columns are copy-on-write: edits never reach the file.
+    out.loc[0, "docs"] = 99
+    assert read_frame(path)["docs"].iloc[0] == 3
+
+
+def test_frame_rejects_foreign_files(tmp_path: Path):
+    bad = tmp_path / "bad.frame"
+    bad.write_bytes(b"ticker,date\n")
+    with pytest.raises(ValueError):
+        read_frame(bad)
+
+    path = write_frame(pd.DataFrame({"x": [1.0]}), tmp_path / "ok.frame")
+    raw = bytearray(path.read_bytes())
+    raw[8] = 99  # version field
+    path.write_bytes(bytes(raw))
+    with pytest.raises(ValueError, match="version"):
+        read_frame(path)
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.backtest.ic import compute_ic_report, daily_ic, ic_matrix, rolling_ic
+from src.backtest.stats import spearman_ic
+
+
+def test_ic_matrix_matches_pairwise_spearman(fake_merged_table):
+    df = fake_merged_table(seed=2)
+    df.loc[::7, "fwd_ret_3d"] = np.nan  # different missingness per horizon
+
+    out = ic_matrix(df, n_perm=200)
+    assert len(out) == 5 * 2
+    for _, r in out.iterrows():
+        ref = spearman_ic(df[r["feature"]], df[f"fwd_ret_{int(r['horizon_days'])}d"])
+        assert np.isclose(r["ic"], ref, atol=1e-12)
+        assert 0.0 <= r["perm_pvalue"] <= r["perm_pvalue_max"] <= 1.0
+
+
+def _ic_panel(seed: int = 5, n_dates: int = 60, n_tickers: int = 14) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2025-01-01", periods=n_dates, freq="D").strftime("%Y-%m-%d")
+    df = pd.DataFrame([{"ticker": f"t{j:02d}.us", "date": d} for d in dates for j in range(n_tickers)]).assign(
+        avg_compound=lambda x: rng.normal(size=len(x)),
+        fwd_ret_1d=lambda x: 0.3 * x["avg_compound"] + rng.normal(size=len(x)),
+        fwd_ret_3d=lambda x: 0.1 * x["avg_compound"] + rng.normal(size=len(x)),
+    )
+    for col in ("avg_compound", "fwd_ret_1d", "fwd_ret_3d"):
+        df.loc[rng.random(len(df)) < 0.12, col] = np.nan  # some dates end up under min_names
+    return df
+
+
+def _per_date_spearman(df: pd.DataFrame, ret_col: str, min_names: int) -> pd.Series:
+    def one(g):
+        n = int((g["avg_compound"].notna() & g[ret_col].notna()).sum())
+        return spearman_ic(g["avg_compound"], g[ret_col]) if n >= min_names else np.nan
+
+    return df.groupby("date").apply(one, include_groups=False)
+
+
+def test_daily_ic_matches_per_date_spearman_loop():
+    df = _ic_panel()
+    x = df.pivot(index="date", columns="ticker", values="avg_compound").to_numpy()
+    y = df.pivot(index="date", columns="ticker", values="fwd_ret_1d").to_numpy()
+
+    ic, n = daily_ic(x, y, min_names=10)  # spearman_ic needs 10 names too
+    ref = _per_date_spearman(df, "fwd_ret_1d", min_names=10).to_numpy()
+    assert np.isnan(ic).any() and np.isfinite(ic).sum() > 20
+    np.testing.assert_allclose(ic, ref, atol=1e-12, equal_nan=True)
+    assert (n == (np.isfinite(x) & np.isfinite(y)).sum(axis=1)).all()
+
+
+def test_rolling_ic_is_names_weighted_rolling_mean():
+    df = _ic_panel(seed=6)
+    x = df.pivot(index="date", columns="ticker", values="avg_compound").to_numpy()
+    y = df.pivot(index="date", columns="ticker", values="fwd_ret_1d").to_numpy()
+    ic, n = daily_ic(x, y, min_names=10)
+    window, min_days = 8, 5
+
+    roll = rolling_ic(ic, n, window=window, min_days=min_days)
+
+    s = pd.Series(ic)
+    w = pd.Series(np.where(s.notna(), n, 0.0))
+    days = s.notna().astype(float).rolling(window, min_periods=1).sum()
+    weighted = (s.fillna(0.0) * w).rolling(window, min_periods=1).sum() / w.rolling(window, min_periods=1).sum()
+    expected = weighted.where(days >= min_days)
+    np.testing.assert_allclose(roll["ic_roll"], expected.to_numpy(), atol=1e-12, equal_nan=True)
+    np.testing.assert_allclose(
+        roll["ic_roll_mean"], s.rolling(window, min_periods=min_days).mean().to_numpy(), atol=1e-12, equal_nan=True
+    )
+    assert np.isnan(roll["ic_roll"][: min_days - 1]).all()  # window edge: not enough days yet
+
+
+def test_ic_decay_t_stat_is_mean_over_std_times_sqrt_days():
+    df = _ic_panel(seed=8)
+    report = compute_ic_report(df, window=10, min_names=10, min_days=3)
+
+    assert report.decay["horizon_days"].tolist() == [1, 3]
+    for _, row in report.decay.iterrows():
+        ics = _per_date_spearman(df, f"fwd_ret_{int(row['horizon_days'])}d", min_names=10).dropna()
+        assert row["days"] == len(ics)
+        assert row["mean_ic"] == pytest.approx(ics.mean())
+        assert row["ic_t"] == pytest.approx(ics.mean() / ics.std(ddof=0) * np.sqrt(len(ics)))
@@ -0,0 +1,43 @@
+import csv
+from pathlib import Path
+
+from src import instrument
+from src.instrument import Instrumentation, append_csv_rows
+
+
+def test_nested_steps_counters_and_heap():
+    inst = Instrumentation(trace_heap=True)
+    instrument.activate(inst)
+    inst.start()
+    try:
+        with instrument.step("features"):
+            instrument.count(instrument.CACHE_HITS, 3)
+            with instrument.step("score"):
+                blob = bytearray(4 * 1024 * 1024)
+                instrument.count(instrument.CACHE_MISSES)
+                instrument.rows(rows_in=10, rows_out=2)
+                del blob
+        instrument.skipped("eval")
+    finally:
+        inst.stop()
+        instrument.activate(None)
+
+    stage, sub, skipped = inst.records
+    assert [r.name for r in inst.records] == ["features", "features/score", "eval"]
+    assert stage.counters == {"cache_hits": 3, "cache_misses": 1} and sub.counters == {"cache_misses": 1}
+    assert sub.rows_out == 2 and stage.rows_out is None
+    assert sub.peak_heap_mb >= 4 and stage.peak_heap_mb >= sub.peak_heap_mb  # child peak counts for the parent
+    assert skipped.status == "skipped"
+    assert inst.cache_hit_rate_pct() == 75.0
+    instrument.count("http_requests")  # no active run: ignored
+
+
+def test_append_csv_rows_grows_header(tmp_path: Path):
+    path = tmp_path / "METRICS.csv"
+    path.write_text("day,date,sharpe\n1,2025-12-17,\n", encoding="utf-8")
+    append_csv_rows([{"day": 2, "date": "2025-12-18", "sharpe": 0.5, "run_id": "r1"}], path, ["day", "run_id"])
+    append_csv_rows([{"day": 3, "run_id": "r2"}], path, ["day", "run_id"])
+
+    rows = list(csv.DictReader(path.open(encoding="utf-8")))
+    assert list(rows[0]) == ["day", "date", "sharpe", "run_id"]
+    assert [(r["day"], r["run_id"], r["sharpe"]) for r in rows] == [("1", "", ""), ("2", "r1", "0.5"), ("3", "r2", "")]
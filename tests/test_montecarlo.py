@@ -0,0 +1,44 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.backtest.montecarlo import mc_report_lines, monte_carlo_null
+from src.backtest.sim import simulate_equal_weight_portfolio
+
+PARAMS = dict(sent_thresh=0.0, vol_thresh=0.0, min_docs=1, slippage_bps=2.0)
+
+
+def test_seed_reproduces_null_across_worker_counts(fake_merged_table):
+    df = fake_merged_table(seed=1)
+    # A tiny budget splits the sims into several chunks, each with its own spawned seed.
+    runs = [monte_carlo_null(df, **PARAMS, n_sims=60, memory_budget_mb=0.05, workers=w, seed=7) for w in (1, 1, 3)]
+    for res in runs[1:]:
+        np.testing.assert_array_equal(res.null_sharpe, runs[0].null_sharpe)
+        np.testing.assert_array_equal(res.null_max_drawdown, runs[0].null_max_drawdown)
+    assert runs[0].n_sims == 60 and np.unique(runs[0].null_sharpe).size > 1
+
+    other = monte_carlo_null(df, **PARAMS, n_sims=60, memory_budget_mb=0.05, seed=8)
+    assert not np.array_equal(other.null_sharpe, runs[0].null_sharpe)
+
+
+def test_p_values_use_plus_one_correction(fake_merged_table):
+    res = monte_carlo_null(fake_merged_table(seed=2), **PARAMS, n_sims=50, seed=3)
+    assert res.p_value_sharpe == pytest.approx((1 + (res.null_sharpe >= res.observed_sharpe).sum()) / 51)
+    assert res.p_value_drawdown == pytest.approx((1 + (res.null_max_drawdown >= res.observed_max_drawdown).sum()) / 51)
+    for p in (res.p_value_sharpe, res.p_value_drawdown):
+        assert 0.0 < p <= 1.0
+    assert res.p_value_sharpe >= 1 / 51  # never zero, even when no sim beats the strategy
+
+
+def test_observed_statistics_match_the_simulate_stage(tmp_path: Path, fake_merged_table):
+    df = fake_merged_table(seed=4)  # tickers skip dates, so next row != next date
+    sim = simulate_equal_weight_portfolio(df, out_dir=tmp_path, **PARAMS)
+    res = monte_carlo_null(df, **PARAMS, n_sims=10)
+    assert sim.n_trades > 10
+    assert res.observed_sharpe == pytest.approx(sim.sharpe_annual)
+    assert res.observed_max_drawdown == pytest.approx(sim.max_drawdown)
+
+    dense = monte_carlo_null(df, **PARAMS, n_sims=10, delay="date")
+    assert dense.observed_sharpe != pytest.approx(sim.sharpe_annual)
+    assert "dense-engine" in "\n".join(mc_report_lines(dense))
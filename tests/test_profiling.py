@@ -0,0 +1,25 @@
+import pstats
+from pathlib import Path
+
+import numpy as np
+
+from src.backtest.stats import spearman_ic
+from src.profiling import profiled
+
+
+def test_profiled_writes_pstats_and_collapsed_stacks(tmp_path: Path, capsys):
+    rng = np.random.default_rng(0)
+    x, y = rng.normal(size=500), rng.normal(size=500)
+    with profiled("both", tmp_path, name="ic", interval=0.001):
+        for _ in range(200):
+            spearman_ic(x, y)
+
+    stats = pstats.Stats(str(tmp_path / "ic.pstats"))
+    assert any(func == "spearman_ic" for _, _, func in stats.stats)
+
+    lines = (tmp_path / "ic.collapsed").read_text(encoding="utf-8").splitlines()
+    assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert any("spearman_ic (src/backtest/stats.py:" in line for line in lines)
+
+    out = capsys.readouterr().out
+    assert "Top src/ functions by cumulative time" in out and "spearman_ic" in out
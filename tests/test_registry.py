@@ -0,0 +1,94 @@
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.backtest.eval import EvalResult
+from src.backtest.sim import SimResult
+from src.reporting import latest_results
+from src.storage.registry import RunRegistry, new_run_id
+
+
+def _eval(ic: float, events_n: int) -> EvalResult:
+    return EvalResult(
+        merged_rows=120,
+        ic_spearman_1d=ic,
+        ic_perm_pvalue=0.2,
+        events_n=np.int64(events_n),
+        event_mean_1d=0.004,
+        event_mean_3d=float("nan"),
+        event_mean_1d_ci_lo=-0.001,
+        event_mean_1d_ci_hi=0.01,
+        event_mean_3d_ci_lo=float("nan"),
+        event_mean_3d_ci_hi=float("nan"),
+    )
+
+
+SWEEP = [
+    {"sent_thresh": 0.05, "vol_thresh": 1.0, "min_docs": 10, "slippage_bps": 0, "trades": 4, "total_return": 0.03,
+     "sharpe_ann": 0.5, "max_drawdown": -0.02},
+    {"sent_thresh": 0.02, "vol_thresh": 0.5, "min_docs": 5, "slippage_bps": 2, "trades": 9, "total_return": -0.01,
+     "sharpe_ann": -0.1, "max_drawdown": -0.05},
+    {"sent_thresh": 0.02, "vol_thresh": 0.5, "min_docs": 5, "slippage_bps": 0, "trades": 9, "total_return": 0.02,
+     "sharpe_ann": 0.3, "max_drawdown": -0.04},
+]  # fmt: skip
+
+
+def test_registry_records_runs_and_answers_latest_queries(tmp_path: Path, monkeypatch):
+    db = tmp_path / "runs.sqlite"
+    with RunRegistry(db) as reg:
+        reg.begin_run("r1", "eval", {"tickers": ["aapl.us"], "sent_thresh": 0.05})
+        reg.record_eval("r1", _eval(0.11, 7))
+        reg.finish_run("r1", "ok", 1.5, {"ic_1d": 0.11})
+
+        reg.begin_run("r2", "demo", {"tickers": ["aapl.us"]})
+        reg.record_eval("r2", _eval(0.22, 9))
+        reg.record_sim("r2", SimResult(5, 4, 1.25, -0.03, Path("report/portfolio_daily.csv")))
+        assert reg.record_sweep("r2", SWEEP, kind="grid") == 3
+        reg.record_timings("r2", [{"step": "eval", "status": "ok", "seconds": 0.5, "rows_in": None}])
+        reg.finish_run("r2", "ok", 3.0)
+
+        reg.begin_run("r3", "sweep", {})
+        reg.record_sweep("r3", [{"rule": "a > 0", "slippage_bps": 0, "trades": 50, "total_return": 0.5}], kind="rules")
+        reg.finish_run("r3", "failed", 0.1)
+
+        latest = reg.latest_eval()
+        assert latest["run_id"] == "r2" and latest["ic_spearman_1d"] == 0.22 and latest["events_n"] == 9
+        assert latest["event_mean_3d"] is None  # NaN is stored as NULL
+        assert reg.latest_sim()["sharpe_annual"] == 1.25
+        # Rule sweeps are not candidates for the best grid config; ties on trades go to the higher return.
+        best = reg.best_sweep_row()
+        assert (best["run_id"], best["slippage_bps"], best["trades"]) == ("r2", 0.0, 9)
+        assert reg.timings("r2")[0]["rows_in"] is None
+
+        runs = reg.list_runs()
+        assert [r["run_id"] for r in runs] == ["r3", "r2", "r1"]
+        assert runs[1]["n_trades"] == 4 and runs[1]["sweep_rows"] == 3 and runs[0]["status"] == "failed"
+        assert [r["run_id"] for r in reg.list_runs(stage="eval")] == ["r1"]
+        assert [r["ic_spearman_1d"] for r in reg.compare_runs(["r1", "r2"])] == [0.11, 0.22]
+
+    plan = sqlite3.connect(db).execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM sweep_rows WHERE run_id = ? ORDER BY trades DESC, total_return DESC",
+        ("r2",),
+    )
+    assert any("sweep_best" in row[-1] for row in plan)
+
+    monkeypatch.setattr(latest_results, "REPORT_DIR", tmp_path / "report")
+    text = latest_results.write_latest_results(["aapl.us"], registry_path=db).read_text(encoding="utf-8")
+    assert "- IC (Spearman, 1D): 0.2200 (perm p=0.2000)" in text
+    assert "- event study burst days: n=9" in text
+    assert "- best sweep config: sent=0.02, vol=0.5, min_docs=5, slip_bps=0 (trades=9, total_return=0.0200)" in text
+
+
+def test_run_ids_are_unique_and_collisions_fail_loudly(tmp_path: Path):
+    ids = [new_run_id() for _ in range(200)]
+    assert len(set(ids)) == len(ids) and ids == sorted(ids, key=lambda r: r.split("-")[0])
+
+    with RunRegistry(tmp_path / "runs.sqlite") as reg:
+        reg.begin_run(ids[0], "sweep", {"a": 1})
+        reg.finish_run(ids[0], "ok", 1.0, {"sharpe": 0.5})
+        with pytest.raises(sqlite3.IntegrityError):
+            reg.begin_run(ids[0], "eval", {})
+        run = reg.list_runs()[0]
+        assert (run["stage"], run["status"]) == ("sweep", "ok")  # the first run is left intact
@@ -0,0 +1,85 @@
+import http.client
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from src.serve import SignalServer, build_snapshot, route_request
+
+PARAMS = {"sent_thresh": 0.05, "vol_thresh": 1.0, "min_docs": 10}
+
+
+def _features(compound: float = 0.2) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "ticker": ["aapl.us"] * 3 + ["msft.us"] * 2,
+            "date": ["2026-01-05", "2026-01-06", "2026-01-07", "2026-01-05", "2026-01-07"],
+            "docs": [5, 12, 20, 11, 3],
+            "avg_compound": [0.1, -0.3, compound, 0.01, 0.5],
+            "pos_frac": [0.2] * 5,
+            "neg_frac": [0.1] * 5,
+            "volume_z": [0.0, 1.5, 2.0, 1.2, 0.3],
+        }
+    )
+
+
+def test_routes_answer_from_the_indexed_snapshot():
+    snap = build_snapshot(_features(), PARAMS)
+
+    def get(target):
+        _, status, body = route_request(snap, target)
+        return status, json.loads(body)
+
+    assert get("/signal/AAPL.US") == (
+        200,
+        {"ticker": "aapl.us", "date": "2026-01-07", "signal": 1, "avg_compound": 0.2, "docs": 20, "volume_z": 2.0},
+    )
+    assert get("/signal/aapl.us?date=2026-01-06")[1]["signal"] == -1
+    assert get("/signal/msft.us?date=2026-01-06")[1]["date"] == "2026-01-05"  # as of: last row on/before
+    assert get("/signal/msft.us?date=2026-01-01")[0] == 404
+    assert [r["date"] for r in get("/history/aapl.us?start=2026-01-06")[1]] == ["2026-01-06", "2026-01-07"]
+    assert [r["ticker"] for r in get("/signals")[1]] == ["aapl.us", "msft.us"]
+    assert get("/signal/tsla.us")[0] == 404 and get("/nope")[0] == 404
+
+
+def test_server_hot_swaps_snapshot_and_reports_latency(tmp_path: Path):
+    path = tmp_path / "daily_features.csv"
+    _features().to_csv(path, index=False)
+    server = SignalServer(("127.0.0.1", 0), path, PARAMS)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        conn = http.client.HTTPConnection(*server.server_address[:2], timeout=5)
+
+        def get(target):
+            conn.request("GET", target)
+            resp = conn.getresponse()
+            return resp.status, json.loads(resp.read())
+
+        lat = []
+        for _ in range(500):  # one keep-alive connection
+            t0 = time.perf_counter()
+            status, row = get("/signal/aapl.us")
+            lat.append(time.perf_counter() - t0)
+        assert status == 200 and row["signal"] == 1
+        assert sorted(lat)[int(0.99 * len(lat))] < 0.05
+
+        _features(compound=-0.2).to_csv(path, index=False)
+        st = path.stat()
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+        assert server.reload_if_changed()
+        assert get("/signal/aapl.us")[1]["signal"] == -1
+        assert not server.reload_if_changed()  # unchanged file: no reload
+
+        metrics = get("/metrics")[1]
+        assert metrics["swaps"] == 1 and metrics["snapshot"]["version"] == 2
+        signal_latency = metrics["latency"]["signal"]
+        assert signal_latency["count"] == 501 and sum(signal_latency["buckets"].values()) == 501
+        assert signal_latency["p99_us"] is not None
+        conn.close()
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,38 @@
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Cumulative `python -X importtime` budget for `import src.pipeline` (about 50 ms here;
+# the eager imports it replaced took about 460 ms).
+IMPORT_BUDGET_US = 200_000
+HEAVY = ("pandas", "numpy", "requests", "vaderSentiment", "matplotlib", "src.backtest.eval")
+
+
+def test_pipeline_import_stays_light():
+    code = (
+        "import sys\n"
+        "import src.pipeline\n"
+        "import src.features.sentiment\n"
+        f"print(','.join(m for m in {HEAVY!r} if m in sys.modules))\n"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    assert proc.stdout.strip() == "", f"imported at startup: {proc.stdout.strip()}"
+
+    # stderr lines look like "import time: <self us> | <cumulative us> | <module>".
+    cumulative = {
+        parts[2].strip(): int(parts[1])
+        for parts in (line.split("|") for line in proc.stderr.splitlines() if line.startswith("import time:"))
+        if parts[1].strip().isdigit()
+    }
+    assert cumulative["src.pipeline"] < IMPORT_BUDGET_US, cumulative["src.pipeline"]
+
+
+def test_sentiment_analyzer_is_built_once_on_first_use():
+    from src.features.sentiment import get_analyzer, score_title
+
+    assert score_title("Great quarter, strong beat").compound > 0
+    assert get_analyzer() is get_analyzer()
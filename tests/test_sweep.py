@@ -0,0 +1,155 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.backtest.rules import RuleBatch, RuleSyntaxError, compile_rule
+from src.backtest.search import halving_savings, successive_halving
+from src.backtest.sim import simulate_equal_weight_portfolio
+from src.backtest.sweep import build_sweep_panel, evaluate_rules, run_sweep
+from src.backtest.sweep_exec import run_sweep_parallel
+from src.backtest.walkforward import walk_forward
+
+
+def test_run_sweep_matches_simulator(tmp_path: Path, fake_merged_table):
+    df = fake_merged_table()
+    grid = dict(
+        sent_thresh_grid=(0.0, 0.05, 0.1),
+        vol_thresh_grid=(0.0, 1.0),
+        min_docs_grid=(1, 10),
+        slippage_bps_grid=(0, 5),
+    )
+
+    out = run_sweep(df, **grid)
+    assert len(out) == 3 * 2 * 2 * 2
+
+    for _, r in out.iterrows():
+        ref = simulate_equal_weight_portfolio(
+            merged_df=df,
+            out_dir=tmp_path,
+            sent_thresh=r["sent_thresh"],
+            vol_thresh=r["vol_thresh"],
+            min_docs=int(r["min_docs"]),
+            slippage_bps=float(r["slippage_bps"]),
+        )
+        port = pd.read_csv(ref.out_portfolio_csv)
+        total_return = float(port["equity"].iloc[-1] - 1.0) if len(port) else 0.0
+
+        assert int(r["trades"]) == ref.n_trades
+        assert np.isclose(r["sharpe_ann"], ref.sharpe_annual, atol=1e-9)
+        assert np.isclose(r["max_drawdown"], ref.max_drawdown, atol=1e-12)
+        assert np.isclose(r["total_return"], total_return, atol=1e-12)
+
+
+def test_parallel_sweep_resumes_from_checkpoint(tmp_path: Path, fake_merged_table):
+    df = fake_merged_table(seed=1)
+    grid = dict(sent_thresh_grid=(0.0, 0.05), vol_thresh_grid=(0.0, 1.0), min_docs_grid=(1, 10), slippage_bps_grid=(0, 5))
+    ref = run_sweep(df, **grid)
+
+    ckpt = tmp_path / "sweep.jsonl"
+    first, stats = run_sweep_parallel(df, checkpoint_path=ckpt, workers=2, shard_size=3, progress=None, **grid)
+    assert stats.configs_run == len(ref)
+    pd.testing.assert_frame_equal(first, ref)
+
+    # Simulate an interrupted run: keep the header + 5 results and a torn line.
+    lines = ckpt.read_text(encoding="utf-8").splitlines(keepends=True)
+    ckpt.write_text("".join(lines[:6]) + lines[6][:8], encoding="utf-8")
+
+    resumed, stats = run_sweep_parallel(df, checkpoint_path=ckpt, workers=1, shard_size=3, progress=None, **grid)
+    assert stats.configs_resumed == 5
+    assert stats.configs_run == len(ref) - 5
+    pd.testing.assert_frame_equal(resumed, ref)
+
+
+def test_successive_halving_saves_work_and_matches_full_sweep():
+    rng = np.random.default_rng(2)
+    dates = pd.date_range("2024-01-01", periods=120, freq="D").strftime("%Y-%m-%d")
+    df = pd.DataFrame(
+        [
+            {
+                "ticker": t,
+                "date": d,
+                "docs": int(rng.integers(1, 30)),
+                "avg_compound": float(rng.normal(0.0, 0.1)),
+                "volume_z": float(rng.normal(0.5, 1.0)),
+                "fwd_ret_1d": float(rng.normal(0.0, 0.01)),
+            }
+            for t in ["aapl.us", "msft.us", "nvda.us"]
+            for d in dates
+        ]
+    )
+
+    out = successive_halving(df, eta=3)
+    full = run_sweep(df)
+    assert len(out) == len(full)
+
+    saved = halving_savings(out)
+    assert saved["ticker_days_saved"] > 0
+
+    final = out[out["rung"] == out["rung"].max()]
+    assert 0 < len(final) < len(out)
+    cols = ["trades", "sharpe_ann", "max_drawdown", "total_return"]
+    np.testing.assert_allclose(final[cols].to_numpy(dtype=float), full.loc[final.index, cols].to_numpy(dtype=float))
+
+
+def test_sweeps_run_on_bar_tables_with_their_return_column(fake_merged_table):
+    daily = fake_merged_table(seed=4)
+    # Intraday merged tables carry fwd_ret_1b / fwd_ret_3b and no day-horizon columns.
+    bars = daily.rename(columns={"fwd_ret_1d": "fwd_ret_1b", "fwd_ret_3d": "fwd_ret_3b"})
+    kw = {"ret_col": "fwd_ret_1b", "periods_per_year": 252 * 7}
+
+    ref = run_sweep(daily)
+    out = run_sweep(bars, **kw)
+    pd.testing.assert_series_equal(out["total_return"], ref["total_return"])
+    np.testing.assert_allclose(out["sharpe_ann"], ref["sharpe_ann"] * 7**0.5)
+
+    par, _ = run_sweep_parallel(bars, workers=2, shard_size=50, progress=None, **kw)
+    pd.testing.assert_frame_equal(par, out)
+    assert len(successive_halving(bars, eta=3, **kw)) == len(out)
+    assert walk_forward(bars, train_days=10, test_days=5, **kw).n_folds > 0
+
+
+def test_rule_batch_matches_threshold_sweep(tmp_path: Path, fake_merged_table):
+    df = fake_merged_table(seed=3)
+    panel = build_sweep_panel(df)
+    grid = run_sweep(df, sent_thresh_grid=(0.0, 0.05), vol_thresh_grid=(1.0,), min_docs_grid=(10,), slippage_bps_grid=(2,))
+
+    rules = [
+        f"long: avg_compound >= {s} and volume_z >= 1.0 and docs >= 10; "
+        f"short: avg_compound <= -{s} and volume_z >= 1.0 and docs >= 10"
+        for s in (0.0, 0.05)
+    ]
+    out = evaluate_rules(panel, rules, slippage_bps_grid=(2,))
+    for col in ("trades", "sharpe_ann", "max_drawdown", "total_return"):
+        assert np.allclose(out[col].to_numpy(dtype=float), grid[col].to_numpy(dtype=float), atol=1e-12)
+
+    ref = simulate_equal_weight_portfolio(df, out_dir=tmp_path, sent_thresh=0.05, vol_thresh=1.0, min_docs=10)
+    via_rule = simulate_equal_weight_portfolio(df, out_dir=tmp_path, rule=rules[1])
+    assert via_rule.n_trades == ref.n_trades
+    assert np.isclose(via_rule.sharpe_annual, ref.sharpe_annual, atol=1e-12)
+
+
+def test_rule_parsing():
+    rule = compile_rule("long: abs(avg_compound) > 0.05 and not docs < 5 ; short: 0 < -avg_compound < 1")
+    assert rule.columns == {"avg_compound", "docs"}
+
+    env = {"avg_compound": np.array([0.1, -0.1, 0.01, np.nan]), "docs": np.array([10.0, 10.0, 10.0, 10.0])}
+    assert RuleBatch([rule]).evaluate(env).tolist() == [[1, -1, 0, 0]]
+
+    for bad in ("buy: docs > 1", "long: __import__('os')", "long: docs.real > 1", "long: docs >"):
+        with pytest.raises(RuleSyntaxError):
+            compile_rule(bad)
+
+
+def test_negated_clauses_stay_flat_on_nan_rows():
+    env = {"avg_compound": np.array([0.1, np.nan, 0.1, -0.1]), "volume_z": np.array([2.0, 2.0, np.nan, 2.0])}
+    batch = RuleBatch(
+        [
+            "long: not avg_compound < 0.05",
+            "long: not (avg_compound < 0 or volume_z < 1)",
+            "long: not not avg_compound > 0",
+            "long: avg_compound != 0 and volume_z > 1",
+        ]
+    )
+    assert batch.evaluate(env).tolist() == [[1, 0, 1, 0], [1, 0, 0, 0], [1, 0, 1, 0], [1, 0, 0, 1]]
@@ -0,0 +1,60 @@
+import json
+import multiprocessing as mp
+import timeit
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from src import tracing
+
+
+@tracing.traced(cat="test")
+def _square(x: int) -> int:
+    return x * x
+
+
+def test_spans_and_worker_processes_merge_into_one_chrome_trace(tmp_path: Path):
+    if "fork" not in mp.get_all_start_methods():
+        pytest.skip("needs fork to share the test module with workers")
+    out = tmp_path / "trace.json"
+    tracing.start(tmp_path / "parts")
+    try:
+        with tracing.span("outer", cat="test", args={"n": 4}):
+            with ProcessPoolExecutor(max_workers=2, mp_context=mp.get_context("fork")) as pool:
+                assert list(pool.map(_square, range(4))) == [0, 1, 4, 9]
+            _square(5)
+    finally:
+        tracing.stop(out)
+
+    events = json.loads(out.read_text(encoding="utf-8"))["traceEvents"]
+    spans = [e for e in events if e["ph"] == "X"]
+    assert all({"name", "ts", "dur", "pid", "tid"} <= e.keys() for e in spans)
+
+    outer = next(e for e in spans if e["name"] == "outer")
+    assert outer["args"] == {"n": 4}
+    squares = [e for e in spans if e["name"] == "_square"]
+    assert len(squares) == 5
+    worker_pids = {e["pid"] for e in squares} - {outer["pid"]}
+    assert worker_pids
+    for e in squares:  # worker clocks line up with the parent's
+        assert outer["ts"] <= e["ts"] <= outer["ts"] + outer["dur"]
+
+    names = {(e["pid"], e["args"]["name"]) for e in events if e["name"] == "process_name"}
+    assert (outer["pid"], "pipeline") in names
+    assert {pid for pid, _ in names} == {outer["pid"], *worker_pids}
+    assert not (tmp_path / "parts").exists()
+    assert not tracing.enabled()
+
+
+def test_disabled_span_is_well_under_a_microsecond():
+    assert not tracing.enabled()
+
+    def noop():
+        with tracing.span("x", cat="test"):
+            pass
+
+    n = 200_000
+    per_call = min(timeit.repeat(noop, number=n, repeat=3)) / n
+    assert per_call < 1e-6
+    assert tracing.stop(Path("unused.json")) is None
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.backtest.sweep import config_grid, run_sweep
+from src.backtest.walkforward import fold_windows, walk_forward
+
+CONFIGS = config_grid(
+    sent_thresh_grid=(0.0, 0.05), vol_thresh_grid=(0.0, 0.5), min_docs_grid=(1, 10), slippage_bps_grid=(0, 5)
+)
+CONFIG_COLS = ["sent_thresh", "vol_thresh", "min_docs", "slippage_bps"]
+
+
+def _panel(n_dates: int = 45, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2025-01-01", periods=n_dates, freq="D").strftime("%Y-%m-%d")
+    return pd.DataFrame(
+        [
+            {
+                "ticker": t,
+                "date": d,
+                "docs": int(rng.integers(1, 30)),
+                "avg_compound": float(rng.normal(0.0, 0.1)),
+                "volume_z": float(rng.normal(0.5, 1.0)),
+                "fwd_ret_1d": float(rng.normal(0.0, 0.01)),
+            }
+            for t in ["aapl.us", "msft.us", "nvda.us"]
+            for d in dates
+        ]
+    )
+
+
+@pytest.mark.parametrize("mode", ["rolling", "expanding"])
+def test_fold_windows_test_right_after_train_without_overlap(mode):
+    windows = fold_windows(n_dates=47, train_days=20, test_days=6, mode=mode)
+    assert windows[0][2] == 20 and windows[-1][3] == 47
+    for k, (tr0, tr1, te0, te1) in enumerate(windows):
+        assert te0 == tr1 and te1 > te0  # test starts where train ends
+        assert tr0 == (0 if mode == "expanding" else tr1 - 20)
+        if k:
+            assert te0 == windows[k - 1][3]  # consecutive, non-overlapping test windows
+
+    df = _panel()
+    res = walk_forward(df, configs=CONFIGS, train_days=20, test_days=6, mode=mode)
+    dates = sorted(df["date"].unique())
+    for _, f in res.folds.iterrows():
+        assert dates.index(f["test_start"]) == dates.index(f["train_end"]) + 1
+    assert (res.folds["test_start"].iloc[1:].to_numpy() > res.folds["test_end"].iloc[:-1].to_numpy()).all()
+    if mode == "expanding":
+        assert (res.folds["train_start"] == dates[0]).all()
+
+
+@pytest.mark.parametrize("mode", ["rolling", "expanding"])
+def test_fold_choice_matches_a_sweep_of_the_train_rows(mode):
+    df = _panel()
+    dates = sorted(df["date"].unique())
+    res = walk_forward(df, configs=CONFIGS, train_days=20, test_days=6, mode=mode)
+    assert res.n_folds == len(fold_windows(len(dates), 20, 6, mode))
+
+    for _, f in res.folds.iterrows():
+        i0, i1 = dates.index(f["train_start"]), dates.index(f["train_end"])
+        # Keep the date before the window for the one-day feature lag, but without a return to trade.
+        rows = df[df["date"].isin(dates[max(0, i0 - 1) : i1 + 1])].copy()
+        if i0 > 0:
+            rows.loc[rows["date"] == dates[i0 - 1], "fwd_ret_1d"] = np.nan
+        sweep = run_sweep(rows, **{f"{c}_grid": tuple(CONFIGS[c].unique()) for c in CONFIG_COLS})
+        eligible = sweep[sweep["trades"] >= 1]
+        best = eligible.loc[eligible["sharpe_ann"].idxmax()]
+        assert [f[c] for c in CONFIG_COLS] == [best[c] for c in CONFIG_COLS]
+        assert f["train_sharpe_ann"] == pytest.approx(best["sharpe_ann"])
+        assert f["train_trades"] == best["trades"]
+
+
+def test_stitched_oos_return_is_product_of_fold_returns():
+    res = walk_forward(_panel(), configs=CONFIGS, train_days=15, test_days=5)
+    assert res.n_folds >= 5
+    expected = np.prod(1.0 + res.folds["test_total_return"].to_numpy()) - 1.0
+    assert res.oos_total_return == pytest.approx(expected)
+    assert res.oos_daily["equity"].iloc[-1] - 1.0 == pytest.approx(expected)
+    assert res.oos_trades == res.folds["test_trades"].sum()
@@ -0,0 +1,110 @@
+import asyncio
+import json
+import os
+import signal
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pandas as pd
+
+from src.features.daily_features import build_and_save_daily_features
+from src.watch import POLL_OVERLAP, FeatureState, WatchDaemon, score_articles
+
+SEED = [
+    {"url": "u1", "seendate": "20260105T140000Z", "title": "Apple rallies on record iPhone sales"},
+    {"url": "u2", "seendate": "20260106T140000Z", "title": "Apple slips after weak guidance"},
+]
+
+
+def _fetcher(polls: list):
+    def fetch(ticker, query, start_dt, end_dt):
+        polls.append((ticker, start_dt, end_dt))
+        n = len(polls)
+        # The previous poll's article comes back again (overlapping window) and must not count twice.
+        return [
+            {"url": f"{ticker}-{n - 1}", "seendate": "20260107T140000Z", "title": "Apple extends gains"},
+            {"url": f"{ticker}-{n}", "seendate": "20260107T150000Z", "title": "Apple beats estimates"},
+        ]
+
+    return fetch
+
+
+def test_watch_folds_new_articles_and_writes_signals(tmp_path: Path):
+    polls = []
+    out, metrics = tmp_path / "latest_signals.json", tmp_path / "watch_metrics.csv"
+    daemon = WatchDaemon(
+        ["aapl.us"], {}, _fetcher(polls), out_path=out, metrics_path=metrics, interval_sec=0.01, concurrency=2
+    )
+    as_of = datetime.now(timezone.utc) - timedelta(hours=1)
+    daemon.seed("aapl.us", SEED, as_of=as_of)
+
+    history = asyncio.run(daemon.run(ticks=3))
+
+    assert [m.tick for m in history] == [1, 2, 3]
+    assert len(polls) == 3 and polls[0][1] == as_of - POLL_OVERLAP  # first poll picks up where the seed ends
+    assert history[-1].polls == 3 and history[-1].new_articles == 4 and history[-1].queue_depth == 0
+    assert len(pd.read_csv(metrics)) == 3
+
+    # Same features as a batch build over the distinct articles: aapl.us-0 .. aapl.us-3.
+    titles = ["Apple extends gains", "Apple beats estimates", "Apple beats estimates", "Apple beats estimates"]
+    articles = SEED + [{"seendate": "20260107T150000Z", "title": t} for t in titles]
+    batch = tmp_path / "batch.csv"
+    build_and_save_daily_features({"aapl.us": articles}, out_path=batch)
+    expected = pd.read_csv(batch).iloc[-1]
+
+    payload = json.loads(out.read_text(encoding="utf-8"))
+    [sig] = payload["signals"]
+    assert sig["date"] == "2026-01-07" and sig["docs"] == expected["docs"] == 4
+    assert abs(sig["avg_compound"] - expected["avg_compound"]) < 1e-6
+    assert payload["metrics"]["refresh_lag_sec"] < 60
+    assert not out.with_name(out.name + ".tmp").exists()
+
+
+def test_watch_stops_cleanly_on_sigterm(tmp_path: Path):
+    out = tmp_path / "latest_signals.json"
+    daemon = WatchDaemon(["aapl.us"], {}, _fetcher([]), out_path=out, interval_sec=0.05)
+    daemon.seed("aapl.us", SEED, as_of=datetime.now(timezone.utc))
+
+    async def main():
+        asyncio.get_running_loop().call_later(0.3, os.kill, os.getpid(), signal.SIGTERM)
+        return await daemon.run()
+
+    history = asyncio.run(main())
+
+    assert history and history[-1].fetch_errors == 0
+    assert json.loads(out.read_text(encoding="utf-8"))["signals"][0]["ticker"] == "aapl.us"
+    assert signal.getsignal(signal.SIGTERM) == signal.SIG_DFL  # handler removed again
+
+
+def test_feature_state_stays_bounded_over_many_days(tmp_path: Path):
+    state = FeatureState(keep_days=10)
+    titles = ["Apple rallies on record sales", "Apple slips after weak guidance", "Apple holds steady"]
+    days = pd.date_range("2025-01-01", periods=200, freq="D")
+    by_day = {}
+    for i, d in enumerate(days):
+        articles = [
+            {"url": f"u{i}-{j}", "seendate": d.strftime(f"%Y%m%dT{10 + j:02d}0000Z"), "title": titles[(i + j) % 3]}
+            for j in range(1 + i % 3)
+        ]
+        by_day[d] = articles
+        for ticker in ("aapl.us", "msft.us"):
+            state.fold(ticker, score_articles(ticker, state.unseen(ticker, articles)))
+        assert len(state.sums) <= 2 * 10 and sum(map(len, state.seen.values())) <= 2 * 3 * 10
+
+    daily = state.daily()
+    assert state.cutoff == "2025-07-10" and daily["date"].min() == "2025-07-10"
+    assert state.daily() is daily  # cached until the sums change
+
+    # An article from an evicted day is not folded in again.
+    old = by_day[days[0]]
+    assert state.fold("aapl.us", score_articles("aapl.us", state.unseen("aapl.us", old))) == 0
+    assert state.daily() is daily
+
+    # The retained window matches a batch build over the same days' articles.
+    batch = tmp_path / "batch.csv"
+    build_and_save_daily_features({"aapl.us": [a for d in days[-10:] for a in by_day[d]]}, out_path=batch)
+    expected = pd.read_csv(batch)
+    got = daily[daily["ticker"] == "aapl.us"].reset_index(drop=True)
+    assert got["docs"].tolist() == expected["docs"].tolist()
+    pd.testing.assert_series_equal(got["volume_z"], expected["volume_z"], check_dtype=False, atol=1e-6)
+    pd.testing.assert_series_equal(got["avg_compound"], expected["avg_compound"], check_dtype=False, atol=1e-6)